@@ -1,9 +1,19 @@
 """Simple Device Creator integration for Home Assistant."""
 
+import dataclasses
+import hashlib
+import json
+import logging
+from time import perf_counter
+from typing import NamedTuple
+
+import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 from homeassistant.core import Event, HomeAssistant, callback
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.typing import ConfigType
 
 from .const import (
     CONF_ENTITY_IDS,
@@ -12,56 +22,354 @@ from .const import (
     CONF_MODEL,
     CONF_NAME,
     CONF_SW_VERSION,
+    DATA_STORES,
     DEFAULT_ENTRY_TITLE,
     DOMAIN,
     PLATFORMS,
 )
+from .device_index import async_get_device_index
+from .dispatcher import async_get_dispatcher
+from .metrics import (
+    METRIC_DEVICE_HANDLER,
+    METRIC_ENTITY_HANDLER,
+    METRIC_RELOAD,
+    METRIC_SETUP,
+    HubMetrics,
+    async_get_hub_metrics,
+    async_remove_hub_metrics,
+    async_update_entry,
+)
+from .orphans import async_release_orphan_index
+from .runtime import HubRuntime, async_get_hub_runtime
+from .services import async_setup_services
+from .storage import (
+    DeviceRecord,
+    HubStore,
+    async_get_hub_store,
+    async_remove_hub_store,
+    entry_storage_data,
+)
+from .yaml_hubs import (
+    YAML_CONFIG_SCHEMA,
+    async_apply_yaml_hubs,
+    async_setup_reload_service,
+)
 
-CURRENT_ENTRY_VERSION = 2
+HUB_ENTRY_VERSION = 2
+CURRENT_ENTRY_VERSION = 3
 
+_LOGGER = logging.getLogger(__name__)
 
-def _copy_entry_data(entry_data: dict) -> dict:
-    """Copy entry data while preserving nested device dictionaries."""
-    copied_data = dict(entry_data)
-    copied_devices = []
-    for device in entry_data.get("devices", []):
-        copied_device = device.copy()
-        copied_device[CONF_ENTITY_IDS] = list(device.get(CONF_ENTITY_IDS, []))
-        copied_devices.append(copied_device)
-    copied_data["devices"] = copied_devices
-    return copied_data
+CONFIG_SCHEMA = vol.Schema({vol.Optional(DOMAIN): YAML_CONFIG_SCHEMA}, extra=vol.ALLOW_EXTRA)
 
 
-def _remove_entity_link(updated_data: dict, entity_id: str) -> bool:
-    """Remove a linked entity from stored device data."""
-    changed = False
-    for device_data in updated_data.get("devices", []):
-        entity_ids = list(device_data.get(CONF_ENTITY_IDS, []))
-        if entity_id not in entity_ids:
-            continue
-        device_data[CONF_ENTITY_IDS] = [linked_id for linked_id in entity_ids if linked_id != entity_id]
-        changed = True
-    return changed
+class _DeviceSyncResult(NamedTuple):
+    """Outcome of syncing one stored device with the registries."""
+
+    registry_device_id: str
+    device_data: DeviceRecord
+    data_changed: bool
+    registry_written: bool
+
+
+def _unlink_entity(device_data: DeviceRecord, entity_id: str) -> DeviceRecord:
+    """Return the device without the linked entity, or the same record when it is not linked."""
+    entity_ids = device_data.get(CONF_ENTITY_IDS, ())
+    if entity_id not in entity_ids:
+        return device_data
+    return dataclasses.replace(
+        device_data,
+        entity_ids=tuple(linked_id for linked_id in entity_ids if linked_id != entity_id),
+    )
+
+
+def _rename_device(device_data: DeviceRecord, name: str) -> DeviceRecord:
+    """Return the device with the name, or the same record when it already has it."""
+    if device_data.get(CONF_NAME) == name:
+        return device_data
+    return dataclasses.replace(device_data, name=name)
+
+
+def _entry_fingerprint(entry: ConfigEntry) -> str:
+    """Return a fingerprint of the entry data and options, ignoring the title."""
+    payload = json.dumps(
+        {"data": entry.data, "options": entry.options}, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
 
 
-def _linked_entity_targets(entry_data: dict) -> dict[str, str]:
-    """Return the target internal device ID for each stored linked entity."""
-    linked_entities: dict[str, str] = {}
-    for device_data in entry_data.get("devices", []):
-        device_id = device_data.get("id")
-        if not device_id:
+def _device_metadata(device_data: DeviceRecord) -> tuple:
+    """Return the registry-facing metadata of a stored device."""
+    return (
+        device_data.get(CONF_NAME),
+        device_data.get(CONF_MANUFACTURER),
+        device_data.get(CONF_MODEL),
+        device_data.get(CONF_SW_VERSION),
+        device_data.get(CONF_HW_VERSION),
+    )
+
+
+def _registry_metadata(device_entry: dr.DeviceEntry) -> tuple:
+    """Return the metadata of a registry device in stored-device order."""
+    return (
+        device_entry.name,
+        device_entry.manufacturer,
+        device_entry.model,
+        device_entry.sw_version,
+        device_entry.hw_version,
+    )
+
+
+@callback
+def _async_link_entities(
+    entity_reg: er.EntityRegistry,
+    device_data: DeviceRecord,
+    registry_device_id: str,
+    entity_ids: list[str],
+    metrics: HubMetrics,
+) -> DeviceRecord:
+    """Attach stored linked entities to the registry device.
+
+    Entities missing from the entity registry are dropped from the stored
+    links. Returns the device record, replaced when its links changed.
+    """
+    missing_entity_ids = set()
+    for entity_id in entity_ids:
+        entity_entry = entity_reg.async_get(entity_id)
+        if entity_entry is None:
+            missing_entity_ids.add(entity_id)
             continue
-        for entity_id in device_data.get(CONF_ENTITY_IDS, []):
-            linked_entities[entity_id] = device_id
-    return linked_entities
+        if entity_entry.device_id != registry_device_id:
+            entity_reg.async_update_entity(entity_id, device_id=registry_device_id)
+            metrics.entity_registry_writes += 1
+
+    if not missing_entity_ids:
+        return device_data
+
+    return DeviceRecord.from_dict(
+        {
+            **device_data,
+            CONF_ENTITY_IDS: [
+                entity_id
+                for entity_id in device_data.get(CONF_ENTITY_IDS, [])
+                if entity_id not in missing_entity_ids
+            ],
+        }
+    )
+
+
+@callback
+def _async_detach_entities(
+    entity_reg: er.EntityRegistry,
+    registry_device_id: str,
+    entity_ids: set[str],
+    metrics: HubMetrics,
+) -> None:
+    """Detach unlinked entities from the registry device.
+
+    Entities that were moved to another device in the meantime are left
+    where they are.
+    """
+    for entity_id in entity_ids:
+        entity_entry = entity_reg.async_get(entity_id)
+        if entity_entry is not None and entity_entry.device_id == registry_device_id:
+            entity_reg.async_update_entity(entity_id, device_id=None)
+            metrics.entity_registry_writes += 1
+
+
+@callback
+def _async_sync_device(
+    device_reg: dr.DeviceRegistry,
+    entity_reg: er.EntityRegistry,
+    entry: ConfigEntry,
+    device_data: DeviceRecord,
+    device_entry: dr.DeviceEntry | None,
+    metrics: HubMetrics,
+) -> _DeviceSyncResult:
+    """Create or update the registry device and reattach its linked entities.
+
+    ``device_entry`` is the existing registry device, if any. The registry
+    write is skipped when it already belongs to the entry and carries the
+    stored metadata. The result holds a new device record when the stored
+    data changed.
+    """
+    device_id = device_data["id"]
+    data_changed = False
+
+    if device_entry and device_entry.name_by_user:
+        if device_data.get(CONF_NAME) != device_entry.name_by_user:
+            device_data = DeviceRecord.from_dict({**device_data, CONF_NAME: device_entry.name_by_user})
+            data_changed = True
+        device_reg.async_update_device(device_entry.id, name_by_user=None)
+        metrics.device_registry_writes += 1
+
+    registry_written = not (
+        device_entry is not None
+        and entry.entry_id in device_entry.config_entries
+        and _registry_metadata(device_entry) == _device_metadata(device_data)
+    )
+    if registry_written:
+        registry_device_id = device_reg.async_get_or_create(
+            config_entry_id=entry.entry_id,
+            identifiers={(DOMAIN, device_id)},
+            name=device_data.get(CONF_NAME),
+            manufacturer=device_data.get(CONF_MANUFACTURER),
+            model=device_data.get(CONF_MODEL),
+            sw_version=device_data.get(CONF_SW_VERSION),
+            hw_version=device_data.get(CONF_HW_VERSION),
+        ).id
+        metrics.device_registry_writes += 1
+    else:
+        registry_device_id = device_entry.id
+
+    linked_entity_ids = device_data.get(CONF_ENTITY_IDS, [])
+    if linked_entity_ids:
+        linked_device_data = _async_link_entities(
+            entity_reg, device_data, registry_device_id, linked_entity_ids, metrics
+        )
+        if linked_device_data is not device_data:
+            device_data = linked_device_data
+            data_changed = True
+
+    return _DeviceSyncResult(registry_device_id, device_data, data_changed, registry_written)
+
+
+def _replaced_positions(hub_store: HubStore, runtime: HubRuntime) -> list[int] | None:
+    """Return the positions of the devices the store replaced one by one.
+
+    Returns None when the store replaced its devices as a whole, or when the
+    devices last applied no longer line up with the stored ones, so the
+    reconcile compares the whole hub.
+    """
+    if hub_store.changed_ids is None or len(runtime.devices) != len(hub_store.devices):
+        return None
+    positions = [hub_store.device_positions[device_id] for device_id in hub_store.changed_ids]
+    for position in positions:
+        if runtime.devices[position]["id"] != hub_store.devices[position]["id"]:
+            return None
+    return positions
+
+
+@callback
+def _async_reconcile_entry(hass: HomeAssistant, entry: ConfigEntry, runtime: HubRuntime) -> None:
+    """Apply only the device and link changes since the devices last applied.
+
+    Registry devices of known hub devices are resolved through the runtime
+    map. Devices new to the hub, such as devices moved in from another hub,
+    are resolved through the domain-wide device ID index. Entities dropped
+    from a device's links are detached from its registry device. When the
+    store only replaced single devices, only those are compared and applied.
+    """
+    hub_store = runtime.hub_store
+    devices = list(hub_store.devices)
+    replaced_positions = _replaced_positions(hub_store, runtime)
+    if replaced_positions is None:
+        if devices == runtime.devices:
+            return
+        positions = range(len(devices))
+        previous_devices = {device_data["id"]: device_data for device_data in runtime.devices}
+    else:
+        positions = [
+            position
+            for position in replaced_positions
+            if devices[position] is not runtime.devices[position]
+        ]
+        if not positions:
+            return
+        previous_devices = {
+            devices[position]["id"]: runtime.devices[position] for position in positions
+        }
 
+    start = perf_counter()
+    metrics = async_get_hub_metrics(hass, entry.entry_id)
+    device_reg = dr.async_get(hass)
+    entity_reg = er.async_get(hass)
+    dispatcher = async_get_dispatcher(hass)
+    device_index = async_get_device_index(hass)
+    registry_device_ids = runtime.registry_device_ids
+    current_ids = set()
+    data_changed = False
 
-def _find_internal_device_id(device_entry) -> str | None:
-    """Extract the integration-owned device identifier from the registry entry."""
-    for domain, identifier in device_entry.identifiers:
-        if domain == DOMAIN:
-            return identifier
-    return None
+    with dispatcher.async_suppress_echoes(entry.entry_id):
+        for position in positions:
+            device_data = devices[position]
+            device_id = device_data["id"]
+            current_ids.add(device_id)
+            previous_device = previous_devices.get(device_id)
+            if previous_device is device_data:
+                continue
+            registry_device_id = registry_device_ids.get(device_id)
+
+            if previous_device is not None and registry_device_id is not None:
+                removed_links = set(previous_device.get(CONF_ENTITY_IDS, ())).difference(
+                    device_data.get(CONF_ENTITY_IDS, ())
+                )
+                if removed_links:
+                    _async_detach_entities(entity_reg, registry_device_id, removed_links, metrics)
+
+            if previous_device is None or _device_metadata(previous_device) != _device_metadata(
+                device_data
+            ):
+                if registry_device_id is None:
+                    registry_device_id = device_index.registry_device_id(device_id)
+                device_entry = (
+                    None if registry_device_id is None else device_reg.async_get(registry_device_id)
+                )
+                result = _async_sync_device(
+                    device_reg, entity_reg, entry, device_data, device_entry, metrics
+                )
+            else:
+                previous_links = set(previous_device.get(CONF_ENTITY_IDS, []))
+                new_links = [
+                    entity_id
+                    for entity_id in device_data.get(CONF_ENTITY_IDS, [])
+                    if entity_id not in previous_links
+                ]
+                if not new_links:
+                    continue
+
+                if registry_device_id is not None:
+                    linked_device_data = _async_link_entities(
+                        entity_reg, device_data, registry_device_id, new_links, metrics
+                    )
+                    if linked_device_data is not device_data:
+                        devices[position] = linked_device_data
+                        data_changed = True
+                    continue
+
+                result = _async_sync_device(
+                    device_reg, entity_reg, entry, device_data, None, metrics
+                )
+
+            registry_device_ids[device_id] = result.registry_device_id
+            dispatcher.async_watch_device(entry.entry_id, result.registry_device_id)
+            devices[position] = result.device_data
+            data_changed = data_changed or result.data_changed
+
+        for device_id in previous_devices.keys() - current_ids:
+            registry_device_id = registry_device_ids.pop(device_id, None)
+            if registry_device_id is None:
+                continue
+            dispatcher.async_unwatch_device(entry.entry_id, registry_device_id)
+            registry_device = device_reg.async_get(registry_device_id)
+            # Devices moved to another hub are no longer attached to this entry.
+            if registry_device is not None and entry.entry_id in registry_device.config_entries:
+                device_reg.async_remove_device(registry_device_id)
+                metrics.device_registry_writes += 1
+
+    if replaced_positions is None:
+        runtime.async_set_devices(devices)
+        dispatcher.async_set_links(entry.entry_id, runtime.linked_entities)
+    else:
+        relinked_entity_ids = runtime.async_replace_devices(devices, positions)
+        dispatcher.async_update_links(entry.entry_id, relinked_entity_ids)
+    metrics.durations[METRIC_RELOAD].record(perf_counter() - start)
+    if not data_changed:
+        return
+    if replaced_positions is None:
+        hub_store.async_set_devices(devices)
+    else:
+        hub_store.async_replace_devices(devices[position] for position in positions)
 
 
 def _entry_version(entry: ConfigEntry) -> int:
@@ -70,26 +378,52 @@ def _entry_version(entry: ConfigEntry) -> int:
     return version if isinstance(version, int) else CURRENT_ENTRY_VERSION
 
 
+async def _async_move_devices_to_store(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Move devices kept in the config entry data into the hub store."""
+    hub_store = await async_get_hub_store(hass, entry)
+    hub_store.devices = [
+        device_data for device_data in entry.data.get("devices", []) if device_data.get("id")
+    ]
+    await hub_store.async_save()
+    async_update_entry(
+        hass,
+        entry,
+        data=entry_storage_data(entry),
+        version=CURRENT_ENTRY_VERSION,
+    )
+
+
 async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Migrate legacy single-device entries into one General entry."""
-    if _entry_version(entry) >= CURRENT_ENTRY_VERSION:
+    """Migrate older config entries to the current layout."""
+    version = _entry_version(entry)
+    if version >= CURRENT_ENTRY_VERSION:
         return True
 
+    if version < HUB_ENTRY_VERSION and not await _async_migrate_legacy_entries(hass, entry):
+        return False
+
+    await _async_move_devices_to_store(hass, entry)
+    return True
+
+
+async def _async_migrate_legacy_entries(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Migrate legacy single-device entries into one General entry."""
     async_entries = getattr(hass.config_entries, "async_entries", None)
     if not callable(async_entries):
-        hass.config_entries.async_update_entry(
+        async_update_entry(
+            hass,
             entry,
             title=DEFAULT_ENTRY_TITLE,
-            version=CURRENT_ENTRY_VERSION,
+            version=HUB_ENTRY_VERSION,
         )
         return True
 
     all_entries = list(async_entries(DOMAIN))
     legacy_entries = [
-        existing for existing in all_entries if _entry_version(existing) < CURRENT_ENTRY_VERSION
+        existing for existing in all_entries if _entry_version(existing) < HUB_ENTRY_VERSION
     ]
     if not legacy_entries:
-        hass.config_entries.async_update_entry(entry, version=CURRENT_ENTRY_VERSION)
+        async_update_entry(hass, entry, version=HUB_ENTRY_VERSION)
         return True
 
     general_entry = next(
@@ -106,14 +440,15 @@ async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             device_id = device_data.get("id")
             if not device_id or device_id in seen_ids:
                 continue
-            merged_devices.append(device_data.copy())
+            merged_devices.append(device_data)
             seen_ids.add(device_id)
 
-    hass.config_entries.async_update_entry(
+    async_update_entry(
+        hass,
         general_entry,
         title=DEFAULT_ENTRY_TITLE,
         data={"devices": merged_devices},
-        version=CURRENT_ENTRY_VERSION,
+        version=HUB_ENTRY_VERSION,
     )
 
     async_remove = getattr(hass.config_entries, "async_remove", None)
@@ -126,143 +461,176 @@ async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Register the integration services and apply the hubs declared in YAML."""
+    async_setup_services(hass)
+    async_setup_reload_service(hass)
+    if DOMAIN in config:
+        await async_apply_yaml_hubs(hass, config[DOMAIN])
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Simple Device Creator from a config entry."""
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = entry.data
+    if "devices" in entry.data:
+        # Entries created by the config flow carry their initial devices.
+        await _async_move_devices_to_store(hass, entry)
+    hub_store = await async_get_hub_store(hass, entry)
 
     device_reg = dr.async_get(hass)
     entity_reg = er.async_get(hass)
-    new_data = _copy_entry_data(entry.data)
-    devices = new_data.get("devices", [])
-    current_ids = set()
-    data_changed = False
-
-    for device_data in devices:
-        device_id = device_data["id"]
-        current_ids.add(device_id)
-
-        device_entry = device_reg.async_get_device(identifiers={(DOMAIN, device_id)})
-        if device_entry and device_entry.name_by_user:
-            if device_data.get(CONF_NAME) != device_entry.name_by_user:
-                device_data[CONF_NAME] = device_entry.name_by_user
-                data_changed = True
-            device_reg.async_update_device(device_entry.id, name_by_user=None)
-
-        registry_device = device_reg.async_get_or_create(
-            config_entry_id=entry.entry_id,
-            identifiers={(DOMAIN, device_id)},
-            name=device_data.get(CONF_NAME),
-            manufacturer=device_data.get(CONF_MANUFACTURER),
-            model=device_data.get(CONF_MODEL),
-            sw_version=device_data.get(CONF_SW_VERSION),
-            hw_version=device_data.get(CONF_HW_VERSION),
-        )
-
-        linked_entity_ids = list(device_data.get(CONF_ENTITY_IDS, []))
-        if not linked_entity_ids:
+    start = perf_counter()
+    metrics = async_get_hub_metrics(hass, entry.entry_id)
+    device_index = async_get_device_index(hass)
+    runtime = HubRuntime(hub_store, _entry_fingerprint(entry))
+    devices = list(hub_store.devices)
+
+    registry_devices = {}
+    stale_registry_device_ids = []
+    for device_entry in dr.async_entries_for_config_entry(device_reg, entry.entry_id):
+        internal_device_id = device_index.internal_device_id(device_entry.id)
+        if internal_device_id is None:
+            stale_registry_device_ids.append(device_entry.id)
             continue
+        registry_devices[internal_device_id] = device_entry
 
-        remaining_entity_ids = []
-        for entity_id in linked_entity_ids:
-            entity_entry = entity_reg.async_get(entity_id)
-            if entity_entry is None:
-                data_changed = True
-                continue
-            remaining_entity_ids.append(entity_id)
-            if entity_entry.device_id != registry_device.id:
-                entity_reg.async_update_entity(entity_id, device_id=registry_device.id)
+    data_changed = False
+    written_count = 0
 
-        if remaining_entity_ids != linked_entity_ids:
-            device_data[CONF_ENTITY_IDS] = remaining_entity_ids
+    for position, device_data in enumerate(devices):
+        result = _async_sync_device(
+            device_reg,
+            entity_reg,
+            entry,
+            device_data,
+            registry_devices.pop(device_data["id"], None),
+            metrics,
+        )
+        devices[position] = result.device_data
+        runtime.registry_device_ids[device_data["id"]] = result.registry_device_id
+        data_changed = data_changed or result.data_changed
+        written_count += result.registry_written
+
+    _LOGGER.debug(
+        "Hub %s: %s registry devices written, %s already up to date",
+        entry.entry_id,
+        written_count,
+        len(devices) - written_count,
+    )
 
+    runtime.async_set_devices(devices)
+    hass.data[DOMAIN][entry.entry_id] = runtime
+    dispatcher = async_get_dispatcher(hass)
+    dispatcher.async_set_links(entry.entry_id, runtime.linked_entities)
     if data_changed:
-        hass.config_entries.async_update_entry(entry, data=new_data)
-        hass.data[DOMAIN][entry.entry_id] = new_data
+        hub_store.async_set_devices(devices)
 
-    for device_entry in dr.async_entries_for_config_entry(device_reg, entry.entry_id):
-        internal_device_id = _find_internal_device_id(device_entry)
-        if internal_device_id not in current_ids:
-            device_reg.async_remove_device(device_entry.id)
+    # Registry devices left in the map are no longer stored in the hub.
+    stale_registry_device_ids.extend(device_entry.id for device_entry in registry_devices.values())
+    for registry_device_id in stale_registry_device_ids:
+        device_reg.async_remove_device(registry_device_id)
+    metrics.device_registry_writes += len(stale_registry_device_ids)
+    dispatcher.async_set_devices(entry.entry_id, set(runtime.registry_device_ids.values()))
+    metrics.durations[METRIC_SETUP].record(perf_counter() - start)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     @callback
-    def async_entity_registry_updated(event: Event) -> None:
-        """Reapply stored entity-to-device links after registry changes."""
-        if "entity_id" not in event.data:
-            return
-
+    def async_entity_registry_updated(event: Event, internal_device_id: str) -> None:
+        """Reapply a stored entity-to-device link after registry changes."""
         entity_id = event.data["entity_id"]
-        linked_entities = _linked_entity_targets(entry.data)
-        if entity_id not in linked_entities:
-            return
 
         if event.data["action"] == "remove":
-            updated_data = _copy_entry_data(entry.data)
-            if _remove_entity_link(updated_data, entity_id):
-                hass.config_entries.async_update_entry(entry, data=updated_data)
+            dispatcher.async_unlink(entity_id)
+            hub_store.write_buffer.async_add(
+                internal_device_id, lambda device_data: _unlink_entity(device_data, entity_id)
+            )
             return
 
         entity_entry = entity_reg.async_get(entity_id)
         if entity_entry is None:
             return
 
-        target_device = device_reg.async_get_device(
-            identifiers={(DOMAIN, linked_entities[entity_id])}
-        )
-        if target_device is None:
+        target_device_id = runtime.registry_device_ids.get(internal_device_id)
+        if target_device_id is None:
             return
 
-        if entity_entry.device_id != target_device.id:
-            entity_reg.async_update_entity(entity_id, device_id=target_device.id)
+        if entity_entry.device_id != target_device_id:
+            with dispatcher.async_suppress_echoes(entry.entry_id):
+                entity_reg.async_update_entity(entity_id, device_id=target_device_id)
+            metrics.entity_registry_writes += 1
 
     @callback
-    def async_registry_updated(event: Event) -> None:
-        """Handle device registry updates."""
-        if event.data["action"] != "update":
-            return
-        if "device_id" not in event.data:
-            return
+    def async_registry_updated(event: Event, registry_device: dr.DeviceEntry) -> None:
+        """Sync user renames of a hub device back into the stored data.
 
-        registry_device = device_reg.async_get(event.data["device_id"])
-        if not registry_device:
-            return
-        if entry.entry_id not in registry_device.config_entries:
-            return
+        The user name stays on the registry device until the write buffer
+        stores it. The reconcile that follows then clears it, and a rename
+        that was never stored is picked up again by the next setup.
+        """
         if not registry_device.name_by_user:
             return
 
-        internal_device_id = _find_internal_device_id(registry_device)
-        if not internal_device_id:
+        internal_device_id = device_index.internal_device_id(registry_device.id)
+        if runtime.registry_device_ids.get(internal_device_id) != registry_device.id:
             return
 
-        updated_data = _copy_entry_data(entry.data)
-        for device_data in updated_data.get("devices", []):
-            if device_data["id"] != internal_device_id:
-                continue
+        name_by_user = registry_device.name_by_user
+        hub_store.write_buffer.async_add(
+            internal_device_id, lambda device_data: _rename_device(device_data, name_by_user)
+        )
+        stored_device = hub_store.device(internal_device_id)
+        if stored_device is not None and stored_device.get(CONF_NAME) == name_by_user:
+            # The stored name does not change, so no reconcile will clear it.
+            with dispatcher.async_suppress_echoes(entry.entry_id):
+                device_reg.async_update_device(registry_device.id, name_by_user=None)
+            metrics.device_registry_writes += 1
 
-            if device_data.get(CONF_NAME) != registry_device.name_by_user:
-                device_data[CONF_NAME] = registry_device.name_by_user
-                hass.config_entries.async_update_entry(entry, data=updated_data)
+    @callback
+    def async_flush_write_buffer(event: Event) -> None:
+        """Store pending handler changes before Home Assistant writes its stores."""
+        hub_store.write_buffer.async_flush()
 
-            device_reg.async_update_device(registry_device.id, name_by_user=None)
-            return
+    @callback
+    def async_hub_updated() -> None:
+        """Reconcile the registries after the stored devices changed."""
+        _async_reconcile_entry(hass, entry, runtime)
 
     entry.async_on_unload(
-        hass.bus.async_listen(dr.EVENT_DEVICE_REGISTRY_UPDATED, async_registry_updated)
-    )
-    entry.async_on_unload(
-        hass.bus.async_listen(er.EVENT_ENTITY_REGISTRY_UPDATED, async_entity_registry_updated)
+        dispatcher.async_register_hub(
+            entry.entry_id,
+            metrics.async_timed(METRIC_ENTITY_HANDLER, async_entity_registry_updated),
+            metrics.async_timed(METRIC_DEVICE_HANDLER, async_registry_updated),
+        )
     )
+    entry.async_on_unload(device_index.async_register_hub(entry.entry_id))
+    entry.async_on_unload(hub_store.async_add_listener(async_hub_updated))
+    entry.async_on_unload(hass.bus.async_listen(EVENT_HOMEASSISTANT_STOP, async_flush_write_buffer))
     entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
     return True
 
 
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Reload config entry."""
-    await hass.config_entries.async_reload(entry.entry_id)
+    """Apply config entry updates to the registries.
+
+    A loaded hub reconciles only the devices and links that changed since the
+    last applied data. Updates that leave the entry data and options untouched,
+    such as renaming the hub, return right away. The full setup only runs when
+    the hub is not loaded.
+    """
+    runtime = async_get_hub_runtime(hass, entry.entry_id)
+    if runtime is None:
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    fingerprint = _entry_fingerprint(entry)
+    if runtime.fingerprint == fingerprint:
+        return
+    runtime.fingerprint = fingerprint
+
+    _async_reconcile_entry(hass, entry, runtime)
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -270,6 +638,21 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
     if unload_ok:
+        hub_store: HubStore | None = hass.data[DOMAIN].get(DATA_STORES, {}).get(entry.entry_id)
+        if hub_store is not None:
+            # Apply pending handler changes while the hub can still reconcile them.
+            hub_store.write_buffer.async_flush()
         hass.data[DOMAIN].pop(entry.entry_id)
+        if not any(
+            other_entry.entry_id in hass.data[DOMAIN]
+            for other_entry in hass.config_entries.async_entries(DOMAIN)
+        ):
+            async_release_orphan_index(hass)
+
+    return unload_ok
+
 
-    return unload_ok
\ No newline at end of file
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the device store and the metrics of a removed hub."""
+    await async_remove_hub_store(hass, entry)
+    async_remove_hub_metrics(hass, entry.entry_id)
\ No newline at end of file
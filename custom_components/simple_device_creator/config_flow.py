@@ -1,7 +1,5 @@
 """Config flow for Simple Device Creator integration."""
 
-import uuid
-
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.core import callback
@@ -18,6 +16,7 @@ from .const import (
     CONF_MODEL,
     CONF_NAME,
     CONF_SW_VERSION,
+    CONF_YAML_KEY,
     DEFAULT_DEVICE_NAME,
     DEFAULT_ENTRY_TITLE,
     DEFAULT_HW_VERSION,
@@ -33,23 +32,33 @@ from .const import (
     MENU_MOVE_DEVICE,
     MENU_REMOVE_LINKED_ENTITY,
     MENU_RENAME_ENTRY,
+    YAML_UNIQUE_ID_PREFIX,
+)
+from .device_index import async_get_device_index
+from .metrics import HubMetrics, async_get_hub_metrics, async_update_entry
+from .orphans import ORPHAN_PAGE_SIZE, async_get_orphan_index
+from .runtime import async_get_hub_runtime
+from .storage import (
+    DeviceRecord,
+    HubStore,
+    async_get_hub_store,
+    build_device_payload,
+    is_yaml_managed,
+    normalize_name,
+    replace_device,
 )
 
 
 CONF_DEVICE_ID = "device_id"
 CONF_CONFIRM_DELETE = "confirm_delete"
+CONF_DETACH_ALL = "detach_all"
 CONF_ENTITY_ID = "entity_id"
+CONF_NEXT_PAGE = "next_page"
+CONF_SEARCH = "search"
+CONF_SEARCH_DOMAIN = "domain"
 CONF_TARGET_ENTRY_ID = "target_entry_id"
 
-
-def _copy_devices(devices: list[dict]) -> list[dict]:
-    """Copy stored device dictionaries."""
-    copied_devices = []
-    for device in devices:
-        copied_device = device.copy()
-        copied_device[CONF_ENTITY_IDS] = list(device.get(CONF_ENTITY_IDS, []))
-        copied_devices.append(copied_device)
-    return copied_devices
+DEVICE_OPTION_LIMIT = 100
 
 
 def _build_device_schema(defaults: dict | None = None) -> vol.Schema:
@@ -75,62 +84,36 @@ def _build_device_schema(defaults: dict | None = None) -> vol.Schema:
     )
 
 
-def _build_device_selector_schema(devices: list[dict]) -> vol.Schema:
-    """Build the device selection schema for hub-managed devices."""
-    sorted_devices = sorted(
-        devices,
-        key=lambda device: (device.get(CONF_NAME, "").casefold(), device["id"]),
-    )
-    return vol.Schema(
-        {
-            vol.Required(CONF_DEVICE_ID): selector.SelectSelector(
-                selector.SelectSelectorConfig(
-                    options=[
-                        selector.SelectOptionDict(
-                            value=device["id"],
-                            label=device[CONF_NAME],
-                        )
-                        for device in sorted_devices
-                    ],
-                    mode=selector.SelectSelectorMode.DROPDOWN,
-                )
-            )
-        }
-    )
-
+def _build_device_selector_schema(options: list[dict], with_search: bool = False) -> vol.Schema:
+    """Build the device selection schema from pre-sorted selector options.
 
-def _name_exists(devices: list[dict], name: str, excluded_id: str | None = None) -> bool:
-    """Check whether a device name already exists inside the same entry."""
-    normalized_name = name.strip().casefold()
-    return any(
-        device.get("id") != excluded_id
-        and device.get(CONF_NAME, "").strip().casefold() == normalized_name
-        for device in devices
-    )
-
-
-def _build_device_payload(user_input: dict, existing_id: str | None = None) -> dict:
-    """Convert form input into the stored device payload."""
-    return {
-        "id": existing_id or str(uuid.uuid4()),
-        CONF_NAME: user_input[CONF_NAME].strip(),
-        CONF_MANUFACTURER: user_input[CONF_MANUFACTURER],
-        CONF_MODEL: user_input[CONF_MODEL],
-        CONF_SW_VERSION: user_input[CONF_SW_VERSION],
-        CONF_HW_VERSION: user_input[CONF_HW_VERSION],
-        CONF_ENTITY_IDS: list(user_input.get(CONF_ENTITY_IDS, [])),
+    With a search field the device becomes optional, so the form can be
+    submitted with a name prefix alone to narrow the options down.
+    """
+    device_key = vol.Optional(CONF_DEVICE_ID) if with_search else vol.Required(CONF_DEVICE_ID)
+    schema = {
+        device_key: selector.SelectSelector(
+            selector.SelectSelectorConfig(
+                options=options,
+                mode=selector.SelectSelectorMode.DROPDOWN,
+            )
+        )
     }
+    if with_search:
+        schema[vol.Optional(CONF_SEARCH)] = str
+    return vol.Schema(schema)
 
 
 class SimpleDeviceCreatorConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Simple Device Creator."""
 
-    VERSION = 2
+    VERSION = 3
 
     def __init__(self) -> None:
         """Initialize the config flow."""
         self.entry_title = DEFAULT_ENTRY_TITLE
         self.devices: list[dict] = []
+        self._device_names: set[str] = set()
 
     async def async_step_user(self, user_input=None) -> FlowResult:
         """Collect the entry title for the new device hub."""
@@ -145,15 +128,30 @@ class SimpleDeviceCreatorConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             ),
         )
 
+    async def async_step_import(self, import_data: dict) -> FlowResult:
+        """Create the entry of a hub declared in YAML.
+
+        The entry carries no devices; they are applied from YAML once the
+        entry is set up.
+        """
+        await self.async_set_unique_id(f"{YAML_UNIQUE_ID_PREFIX}{import_data[CONF_YAML_KEY]}")
+        self._abort_if_unique_id_configured()
+        return self.async_create_entry(
+            title=import_data[CONF_ENTRY_TITLE],
+            data={CONF_YAML_KEY: import_data[CONF_YAML_KEY]},
+        )
+
     async def async_step_add_device(self, user_input=None) -> FlowResult:
         """Add a device to the pending config entry."""
         errors = {}
 
         if user_input is not None:
-            if _name_exists(self.devices, user_input[CONF_NAME]):
+            normalized_name = normalize_name(user_input[CONF_NAME])
+            if normalized_name in self._device_names:
                 errors["base"] = "name_already_exists"
             else:
-                self.devices.append(_build_device_payload(user_input))
+                self.devices.append(build_device_payload(user_input))
+                self._device_names.add(normalized_name)
                 return await self.async_step_configure_devices()
 
         return self.async_show_form(
@@ -170,7 +168,11 @@ class SimpleDeviceCreatorConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
     async def async_step_finish(self, user_input=None) -> FlowResult:
-        """Create the entry once devices are ready."""
+        """Create the entry once devices are ready.
+
+        The initial devices travel in the entry data and are moved into the
+        hub store when the entry is first set up.
+        """
         return self.async_create_entry(
             title=self.entry_title,
             data={"devices": self.devices},
@@ -189,29 +191,46 @@ class SimpleDeviceCreatorOptionsFlow(config_entries.OptionsFlow):
     def __init__(self, config_entry):
         """Initialize options flow."""
         self._config_entry = config_entry
-        self.devices = _copy_devices(config_entry.data.get("devices", []))
+        self._hub_store: HubStore | None = None
+        self.devices: list[DeviceRecord] = []
         self._selected_device_id: str | None = None
         self._pending_action: str | None = None
+        self._orphan_query: str | None = None
+        self._orphan_domain: str | None = None
+        self._orphan_offset = 0
+        self._orphan_selection: list[str] = []
+        self._linked_views: dict[str, list[str]] = {}
 
     def _available_target_entries(self) -> list:
-        """Return candidate destination entries for a move operation."""
+        """Return candidate destination entries for a move operation.
+
+        Hubs declared in YAML are left out, as the next reload would drop
+        the moved device again.
+        """
         return [
             entry
             for entry in self.hass.config_entries.async_entries(DOMAIN)
             if entry.entry_id != self._config_entry.entry_id
+            and not is_yaml_managed(entry)
         ]
 
-    def _updated_entry_data(self) -> dict:
-        """Build the updated config entry data payload."""
-        return {**self._config_entry.data, "devices": self.devices}
+    def _registry_device_id(self, device_id: str) -> str | None:
+        """Return the registry device ID of a hub device.
 
-    def _orphan_entities(self) -> list:
-        """Return entity registry entries not linked to any device."""
-        registry = er.async_get(self.hass)
-        return sorted(
-            [entry for entry in registry.entities.values() if entry.device_id is None],
-            key=lambda entry: entry.entity_id,
-        )
+        A loaded hub resolves it through the registry device IDs of its
+        runtime, a hub that is not loaded through the device ID index.
+        """
+        runtime = async_get_hub_runtime(self.hass, self._config_entry.entry_id)
+        if runtime is None:
+            return async_get_device_index(self.hass).registry_device_id(device_id)
+        return runtime.registry_device_ids.get(device_id)
+
+    def _registry_device(self, device_id: str) -> dr.DeviceEntry | None:
+        """Return the registry device of a hub device."""
+        registry_device_id = self._registry_device_id(device_id)
+        if registry_device_id is None:
+            return None
+        return dr.async_get(self.hass).async_get(registry_device_id)
 
     def _selected_registry_device_id(self) -> str | None:
         """Return the Home Assistant registry device ID for the selected hub device."""
@@ -219,36 +238,42 @@ class SimpleDeviceCreatorOptionsFlow(config_entries.OptionsFlow):
         if device_data is None:
             return None
 
-        registry = dr.async_get(self.hass)
-        registry_device = registry.async_get_device(identifiers={(DOMAIN, device_data["id"])})
-        if registry_device is None:
-            return None
+        return self._registry_device_id(device_data["id"])
 
-        return registry_device.id
+    def _linked_entities_for_selected_device(self) -> list[str]:
+        """Return the sorted entity IDs linked to the selected hub device.
 
-    def _linked_entities_for_selected_device(self) -> list:
-        """Return entity registry entries linked to the selected hub device."""
+        The view is built once per device from the stored links and dropped
+        whenever the devices are saved.
+        """
         device_data = self._get_device()
         if device_data is None:
             return []
 
-        registry = er.async_get(self.hass)
-        linked_entities = []
-        for entity_id in device_data.get(CONF_ENTITY_IDS, []):
-            entity_entry = registry.async_get(entity_id)
-            if entity_entry is not None:
-                linked_entities.append(entity_entry)
-
-        return sorted(linked_entities, key=lambda entry: entry.entity_id)
-
-    def _save_devices(self) -> None:
-        """Persist the current device list to the config entry."""
-        self.hass.config_entries.async_update_entry(
-            self._config_entry,
-            data=self._updated_entry_data(),
-        )
-
-    def _get_device(self, device_id: str | None = None) -> dict | None:
+        device_id = device_data["id"]
+        if device_id not in self._linked_views:
+            self._linked_views[device_id] = sorted(set(device_data.get(CONF_ENTITY_IDS, [])))
+        return self._linked_views[device_id]
+
+    def _save_devices(self, updated_device: DeviceRecord | None = None) -> None:
+        """Persist the current device list to the hub store.
+
+        The store keeps its own list of the same immutable records, so the
+        flow can keep editing its list afterwards. When only one device was
+        replaced, only its record is handed over, so the store and the
+        reconcile update their indexes for that device alone.
+        """
+        self._linked_views.clear()
+        if updated_device is None:
+            self._hub_store.async_set_devices(self.devices)
+        else:
+            self._hub_store.async_replace_devices([updated_device])
+
+    def _hub_metrics(self) -> HubMetrics:
+        """Return the metrics of the hub, which count the flow's registry writes."""
+        return async_get_hub_metrics(self.hass, self._config_entry.entry_id)
+
+    def _get_device(self, device_id: str | None = None) -> DeviceRecord | None:
         """Return the matching stored device, if any."""
         target_id = device_id or self._selected_device_id
         if not target_id:
@@ -262,6 +287,15 @@ class SimpleDeviceCreatorOptionsFlow(config_entries.OptionsFlow):
 
     async def async_step_init(self, user_input=None) -> FlowResult:
         """Show the main action menu."""
+        if is_yaml_managed(self._config_entry):
+            return self.async_abort(reason="yaml_managed")
+
+        if self._hub_store is None:
+            self._hub_store = await async_get_hub_store(self.hass, self._config_entry)
+            # Start from the devices including renames and unlinks not yet saved.
+            self._hub_store.write_buffer.async_flush()
+            self.devices = list(self._hub_store.devices)
+
         menu_options = [MENU_RENAME_ENTRY, MENU_ADD_DEVICE]
         if self.devices:
             menu_options.extend(
@@ -286,10 +320,7 @@ class SimpleDeviceCreatorOptionsFlow(config_entries.OptionsFlow):
         """Rename the hub entry."""
         if user_input is not None:
             entry_title = user_input[CONF_ENTRY_TITLE].strip() or DEFAULT_ENTRY_TITLE
-            self.hass.config_entries.async_update_entry(
-                self._config_entry,
-                title=entry_title,
-            )
+            async_update_entry(self.hass, self._config_entry, title=entry_title)
             return self.async_create_entry(title="", data={})
 
         return self.async_show_form(
@@ -309,10 +340,10 @@ class SimpleDeviceCreatorOptionsFlow(config_entries.OptionsFlow):
         errors = {}
 
         if user_input is not None:
-            if _name_exists(self.devices, user_input[CONF_NAME]):
+            if self._hub_store.name_taken(user_input[CONF_NAME]):
                 errors["base"] = "name_already_exists"
             else:
-                self.devices.append(_build_device_payload(user_input))
+                self.devices.append(DeviceRecord.from_dict(build_device_payload(user_input)))
                 self._save_devices()
                 return self.async_create_entry(title="", data={})
 
@@ -327,7 +358,8 @@ class SimpleDeviceCreatorOptionsFlow(config_entries.OptionsFlow):
         if not self.devices:
             return self.async_abort(reason="no_devices")
 
-        if user_input is not None:
+        errors = {}
+        if user_input is not None and user_input.get(CONF_DEVICE_ID):
             self._selected_device_id = user_input[CONF_DEVICE_ID]
             if self._pending_action == MENU_EDIT_DEVICE:
                 return await self.async_step_edit_device()
@@ -341,9 +373,19 @@ class SimpleDeviceCreatorOptionsFlow(config_entries.OptionsFlow):
                 return await self.async_step_move_device()
             return await self.async_step_init()
 
+        prefix = user_input.get(CONF_SEARCH, "") if user_input else ""
+        options, total = self._hub_store.device_options(prefix, DEVICE_OPTION_LIMIT)
+        if not total:
+            errors["base"] = "no_matching_devices"
+            options, total = self._hub_store.device_options(limit=DEVICE_OPTION_LIMIT)
+
         return self.async_show_form(
             step_id="select_device",
-            data_schema=_build_device_selector_schema(self.devices),
+            data_schema=_build_device_selector_schema(
+                options, with_search=len(self.devices) > DEVICE_OPTION_LIMIT
+            ),
+            errors=errors,
+            description_placeholders={"shown": str(len(options)), "total": str(total)},
         )
 
     async def async_step_edit_device(self, user_input=None) -> FlowResult:
@@ -357,31 +399,33 @@ class SimpleDeviceCreatorOptionsFlow(config_entries.OptionsFlow):
             return self.async_abort(reason="device_not_found")
 
         registry = dr.async_get(self.hass)
-        device_entry = registry.async_get_device(
-            identifiers={(DOMAIN, device_data["id"])}
-        )
+        device_entry = self._registry_device(device_data["id"])
 
         if user_input is not None:
-            if _name_exists(self.devices, user_input[CONF_NAME], excluded_id=device_data["id"]):
+            if self._hub_store.name_taken(user_input[CONF_NAME], excluded_id=device_data["id"]):
                 return self.async_show_form(
                     step_id="edit_device",
                     data_schema=_build_device_schema(user_input),
                     errors={"base": "name_already_exists"},
                 )
 
-            updated_device_data = _build_device_payload(user_input, existing_id=device_data["id"])
-            updated_device_data[CONF_ENTITY_IDS] = list(device_data.get(CONF_ENTITY_IDS, []))
-            device_data.update(updated_device_data)
-            self._save_devices()
-
-            if device_entry:
+            # Clear the user name before saving, so the reconcile and the rename
+            # handler that follow the save never see the old name.
+            if device_entry and device_entry.name_by_user:
                 registry.async_update_device(device_entry.id, name_by_user=None)
+                self._hub_metrics().device_registry_writes += 1
+
+            updated_device_data = build_device_payload(user_input, existing_id=device_data["id"])
+            updated_device_data[CONF_ENTITY_IDS] = device_data.get(CONF_ENTITY_IDS, [])
+            updated_device = replace_device(self.devices, device_data["id"], updated_device_data)
+            if updated_device is not None:
+                self._save_devices(updated_device)
 
             self._selected_device_id = None
             self._pending_action = None
             return self.async_create_entry(title="", data={})
 
-        defaults = device_data.copy()
+        defaults = dict(device_data)
         if device_entry:
             defaults[CONF_NAME] = device_entry.name_by_user or device_entry.name or defaults[CONF_NAME]
             defaults[CONF_MANUFACTURER] = device_entry.manufacturer or defaults.get(CONF_MANUFACTURER, "")
@@ -449,47 +493,136 @@ class SimpleDeviceCreatorOptionsFlow(config_entries.OptionsFlow):
         if registry_device_id is None:
             return self.async_abort(reason="device_registry_entry_not_found")
 
-        orphan_entities = self._orphan_entities()
-        if not orphan_entities:
+        orphan_index = async_get_orphan_index(self.hass)
+        if not orphan_index:
             return self.async_abort(reason="no_orphan_entities")
 
+        if self._orphan_query is None and len(orphan_index) > ORPHAN_PAGE_SIZE:
+            return await self.async_step_search_orphan_entity()
+
         if user_input is not None:
-            entity_id = user_input[CONF_ENTITY_ID]
-            entity_entry = next(
-                (entry for entry in orphan_entities if entry.entity_id == entity_id),
-                None,
+            for entity_id in user_input.get(CONF_ENTITY_ID, []):
+                if entity_id not in self._orphan_selection:
+                    self._orphan_selection.append(entity_id)
+        if user_input is not None and user_input.get(CONF_NEXT_PAGE):
+            self._orphan_offset += ORPHAN_PAGE_SIZE
+        elif user_input is not None and self._orphan_selection:
+            return self._link_orphan_entities(device_data, registry_device_id)
+
+        page, total = orphan_index.search(
+            self._orphan_query or "", self._orphan_domain, self._orphan_offset
+        )
+        if not page and self._orphan_offset:
+            self._orphan_offset = 0
+            page, total = orphan_index.search(self._orphan_query or "", self._orphan_domain)
+
+        has_next_page = self._orphan_offset + len(page) < total
+        entity_key = vol.Optional if has_next_page or self._orphan_selection else vol.Required
+        schema: dict = {
+            entity_key(CONF_ENTITY_ID): selector.EntitySelector(
+                selector.EntitySelectorConfig(include_entities=page, multiple=True)
             )
-            if entity_entry is None:
-                return self.async_abort(reason="entity_not_found")
+        }
+        if has_next_page:
+            schema[vol.Optional(CONF_NEXT_PAGE, default=False)] = selector.BooleanSelector()
+
+        return self.async_show_form(
+            step_id="add_orphan_entity",
+            data_schema=vol.Schema(schema),
+            description_placeholders={
+                CONF_NAME: device_data[CONF_NAME],
+                "first": str(self._orphan_offset + 1 if page else 0),
+                "last": str(self._orphan_offset + len(page)),
+                "total": str(total),
+                "selected": str(len(self._orphan_selection)),
+            },
+        )
 
-            registry = er.async_get(self.hass)
+    def _link_orphan_entities(
+        self, device_data: DeviceRecord, registry_device_id: str
+    ) -> FlowResult:
+        """Link the selected orphan entities to the device and save the hub once.
+
+        Entities that were linked elsewhere or removed since the page was shown
+        are skipped.
+        """
+        orphan_index = async_get_orphan_index(self.hass)
+        entity_ids = [
+            entity_id for entity_id in self._orphan_selection if entity_id in orphan_index
+        ]
+        skipped = len(self._orphan_selection) - len(entity_ids)
+        self._reset_orphan_search()
+        if not entity_ids:
+            return self.async_abort(reason="entity_not_found")
+
+        registry = er.async_get(self.hass)
+        for entity_id in entity_ids:
             registry.async_update_entity(entity_id, device_id=registry_device_id)
-            linked_entity_ids = device_data.setdefault(CONF_ENTITY_IDS, [])
-            if entity_id not in linked_entity_ids:
-                linked_entity_ids.append(entity_id)
-                self._save_devices()
-            self._selected_device_id = None
-            self._pending_action = None
-            return self.async_create_entry(title="", data={})
+        self._hub_metrics().entity_registry_writes += len(entity_ids)
+        linked_entity_ids = device_data.get(CONF_ENTITY_IDS, [])
+        linked = set(linked_entity_ids)
+        if new_entity_ids := [entity_id for entity_id in entity_ids if entity_id not in linked]:
+            updated_device = replace_device(
+                self.devices,
+                device_data["id"],
+                {CONF_ENTITY_IDS: [*linked_entity_ids, *new_entity_ids]},
+            )
+            self._save_devices(updated_device)
+
+        self._selected_device_id = None
+        self._pending_action = None
+        return self.async_create_entry(
+            title="",
+            data={},
+            description="entities_linked",
+            description_placeholders={
+                CONF_NAME: device_data[CONF_NAME],
+                "applied": str(len(entity_ids)),
+                "skipped": str(skipped),
+            },
+        )
+
+    async def async_step_search_orphan_entity(self, user_input=None) -> FlowResult:
+        """Narrow the orphan entities down before showing the picker."""
+        orphan_index = async_get_orphan_index(self.hass)
+        errors = {}
+        if user_input is not None:
+            query = user_input.get(CONF_SEARCH, "").strip()
+            domain = user_input.get(CONF_SEARCH_DOMAIN) or None
+            _page, total = orphan_index.search(query, domain, limit=0)
+            if total:
+                self._orphan_query = query
+                self._orphan_domain = domain
+                self._orphan_offset = 0
+                return await self.async_step_add_orphan_entity()
+            errors["base"] = "no_matching_entities"
 
         return self.async_show_form(
-            step_id="add_orphan_entity",
+            step_id="search_orphan_entity",
             data_schema=vol.Schema(
                 {
-                    vol.Required(CONF_ENTITY_ID): selector.EntitySelector(
-                        selector.EntitySelectorConfig(
-                            include_entities=[
-                                entry.entity_id for entry in orphan_entities
-                            ]
+                    vol.Optional(CONF_SEARCH): str,
+                    vol.Optional(CONF_SEARCH_DOMAIN): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=orphan_index.domains,
+                            mode=selector.SelectSelectorMode.DROPDOWN,
                         )
-                    )
+                    ),
                 }
             ),
-            description_placeholders={CONF_NAME: device_data[CONF_NAME]},
+            errors=errors,
+            description_placeholders={"total": str(len(orphan_index))},
         )
 
+    def _reset_orphan_search(self) -> None:
+        """Forget the orphan search so the next visit starts over."""
+        self._orphan_query = None
+        self._orphan_domain = None
+        self._orphan_offset = 0
+        self._orphan_selection = []
+
     async def async_step_remove_linked_entity(self, user_input=None) -> FlowResult:
-        """Detach a previously linked entity from a hub device."""
+        """Detach selected or all linked entities from a hub device."""
         if self._selected_device_id is None:
             self._pending_action = MENU_REMOVE_LINKED_ENTITY
             return await self.async_step_select_device()
@@ -502,43 +635,78 @@ class SimpleDeviceCreatorOptionsFlow(config_entries.OptionsFlow):
         if not linked_entities:
             return self.async_abort(reason="no_linked_entities")
 
+        errors = {}
         if user_input is not None:
-            entity_id = user_input[CONF_ENTITY_ID]
-            entity_entry = next(
-                (entry for entry in linked_entities if entry.entity_id == entity_id),
-                None,
-            )
-            if entity_entry is None:
-                return self.async_abort(reason="entity_not_found")
-
-            registry = er.async_get(self.hass)
-            device_data[CONF_ENTITY_IDS] = [
-                linked_id
-                for linked_id in device_data.get(CONF_ENTITY_IDS, [])
-                if linked_id != entity_id
-            ]
-            self._save_devices()
-            registry.async_update_entity(entity_id, device_id=None)
-            self._selected_device_id = None
-            self._pending_action = None
-            return self.async_create_entry(title="", data={})
+            if user_input.get(CONF_DETACH_ALL):
+                entity_ids = list(linked_entities)
+            else:
+                linked = set(linked_entities)
+                entity_ids = [
+                    entity_id for entity_id in user_input.get(CONF_ENTITY_ID, []) if entity_id in linked
+                ]
+            if entity_ids:
+                return self._unlink_entities(device_data, entity_ids)
+            errors["base"] = "no_entities_selected"
 
         return self.async_show_form(
             step_id="remove_linked_entity",
             data_schema=vol.Schema(
                 {
-                    vol.Required(CONF_ENTITY_ID): selector.EntitySelector(
+                    vol.Optional(CONF_ENTITY_ID): selector.EntitySelector(
                         selector.EntitySelectorConfig(
-                            include_entities=[
-                                entry.entity_id for entry in linked_entities
-                            ]
+                            include_entities=list(linked_entities), multiple=True
                         )
-                    )
+                    ),
+                    vol.Optional(CONF_DETACH_ALL, default=False): selector.BooleanSelector(),
                 }
             ),
+            errors=errors,
             description_placeholders={CONF_NAME: device_data[CONF_NAME]},
         )
 
+    def _unlink_entities(self, device_data: DeviceRecord, entity_ids: list[str]) -> FlowResult:
+        """Detach entities from the device with one hub save.
+
+        The hub is saved first so it stops reapplying the links before the
+        registry updates are emitted.
+        """
+        unlinked = set(entity_ids)
+        updated_device = replace_device(
+            self.devices,
+            device_data["id"],
+            {
+                CONF_ENTITY_IDS: [
+                    linked_id
+                    for linked_id in device_data.get(CONF_ENTITY_IDS, [])
+                    if linked_id not in unlinked
+                ]
+            },
+        )
+        if updated_device is not None:
+            self._save_devices(updated_device)
+
+        registry = er.async_get(self.hass)
+        applied = 0
+        for entity_id in entity_ids:
+            if registry.async_get(entity_id) is None:
+                continue
+            registry.async_update_entity(entity_id, device_id=None)
+            applied += 1
+        self._hub_metrics().entity_registry_writes += applied
+
+        self._selected_device_id = None
+        self._pending_action = None
+        return self.async_create_entry(
+            title="",
+            data={},
+            description="entities_unlinked",
+            description_placeholders={
+                CONF_NAME: device_data[CONF_NAME],
+                "applied": str(applied),
+                "skipped": str(len(entity_ids) - applied),
+            },
+        )
+
     async def async_step_select_target_entry(self, user_input=None) -> FlowResult:
         """Select the destination hub for the current device."""
         available_entries = sorted(
@@ -565,20 +733,12 @@ class SimpleDeviceCreatorOptionsFlow(config_entries.OptionsFlow):
             if target_entry is None:
                 return self.async_abort(reason="target_entry_not_found")
 
-            target_devices = _copy_devices(target_entry.data.get("devices", []))
-            if _name_exists(target_devices, device_data[CONF_NAME]):
+            target_store = await async_get_hub_store(self.hass, target_entry)
+            if target_store.name_taken(device_data[CONF_NAME]):
                 errors["base"] = "name_already_exists"
             else:
-                target_devices.append(device_data.copy())
-                self.hass.config_entries.async_update_entry(
-                    target_entry,
-                    data={**target_entry.data, "devices": target_devices},
-                )
-
                 registry = dr.async_get(self.hass)
-                registry_device = registry.async_get_device(
-                    identifiers={(DOMAIN, device_data["id"])}
-                )
+                registry_device = self._registry_device(device_data["id"])
                 registry.async_get_or_create(
                     config_entry_id=target_entry.entry_id,
                     identifiers={(DOMAIN, device_data["id"])},
@@ -588,12 +748,15 @@ class SimpleDeviceCreatorOptionsFlow(config_entries.OptionsFlow):
                     sw_version=device_data.get(CONF_SW_VERSION),
                     hw_version=device_data.get(CONF_HW_VERSION),
                 )
+                async_get_hub_metrics(self.hass, target_entry.entry_id).device_registry_writes += 1
                 if registry_device:
                     registry.async_update_device(
                         registry_device.id,
                         remove_config_entry_id=self._config_entry.entry_id,
                     )
+                    self._hub_metrics().device_registry_writes += 1
 
+                target_store.async_set_devices([*target_store.devices, device_data])
                 self.devices = [
                     device
                     for device in self.devices
@@ -10,6 +10,16 @@ CONF_MODEL = "model"
 CONF_SW_VERSION = "sw_version"
 CONF_HW_VERSION = "hw_version"
 CONF_ENTITY_IDS = "entity_ids"
+CONF_EXTERNAL_KEY = "external_key"
+
+# YAML configuration keys
+CONF_HUBS = "hubs"
+CONF_YAML_KEY = "yaml_key"
+YAML_UNIQUE_ID_PREFIX = "yaml_"
+
+# Config entry data keys pointing at the hub store
+CONF_STORAGE_KEY = "storage_key"
+CONF_STORAGE_VERSION = "storage_version"
 
 # Menu options for config flow
 MENU_ADD_DEVICE = "add_device"
@@ -40,3 +50,14 @@ DEFAULT_MANUFACTURER = ""
 DEFAULT_MODEL = ""
 DEFAULT_SW_VERSION = ""
 DEFAULT_HW_VERSION = ""
+
+# Services
+SERVICE_EXPORT_DEVICES = "export_devices"
+SERVICE_IMPORT_DEVICES = "import_devices"
+
+# hass.data keys
+DATA_DEVICE_INDEX = "device_index"
+DATA_DISPATCHER = "dispatcher"
+DATA_METRICS = "metrics"
+DATA_STORES = "stores"
+DATA_ORPHAN_INDEX = "orphan_index"
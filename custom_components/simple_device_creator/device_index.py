@@ -0,0 +1,147 @@
+"""Domain-wide map between internal device IDs and registry device IDs."""
+
+from collections.abc import Mapping
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+
+from .const import DATA_DEVICE_INDEX, DOMAIN
+from .dispatcher import event_filter_data
+
+
+def _internal_device_id(device_entry: dr.DeviceEntry) -> str | None:
+    """Extract the integration-owned device identifier from the registry entry."""
+    for domain, identifier in device_entry.identifiers:
+        if domain == DOMAIN:
+            return identifier
+    return None
+
+
+class DeviceIdIndex:
+    """Map internal device IDs to registry device IDs and back.
+
+    The index is built from the device registry once and then follows device
+    registry events, so resolving a hub device never searches the registry
+    by identifier and registry devices are never scanned for the integration
+    identifier more than once per change.
+
+    Registry events are handled after the write that caused them. Code that
+    creates a registry device uses the returned entry rather than the index.
+
+    Loaded hubs register with the index. When the last of them unregisters,
+    the index stops following registry events and is forgotten, the same
+    way the registry event dispatcher is torn down.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the index."""
+        self._hass = hass
+        self._device_reg = dr.async_get(hass)
+        self._registry_device_ids: dict[str, str] = {}
+        self._internal_device_ids: dict[str, str] = {}
+        for device_entry in self._device_reg.devices.values():
+            if (device_id := _internal_device_id(device_entry)) is not None:
+                self._async_add(device_id, device_entry.id)
+        self._unsub_listener: CALLBACK_TYPE | None = None
+        self._hub_entry_ids: set[str] = set()
+
+    def __len__(self) -> int:
+        """Return the number of indexed devices."""
+        return len(self._registry_device_ids)
+
+    def registry_device_id(self, device_id: str) -> str | None:
+        """Return the registry device ID of an internal device ID."""
+        return self._registry_device_ids.get(device_id)
+
+    def internal_device_id(self, registry_device_id: str) -> str | None:
+        """Return the internal device ID of a registry device ID."""
+        return self._internal_device_ids.get(registry_device_id)
+
+    @callback
+    def async_register_hub(self, entry_id: str) -> CALLBACK_TYPE:
+        """Keep the index for a loaded hub and return the unregister callback."""
+        self._hub_entry_ids.add(entry_id)
+
+        @callback
+        def async_unregister() -> None:
+            """Release the index, tearing it down after the last hub."""
+            self._hub_entry_ids.discard(entry_id)
+            if self._hub_entry_ids:
+                return
+            self.async_stop()
+            domain_data = self._hass.data.get(DOMAIN, {})
+            if domain_data.get(DATA_DEVICE_INDEX) is self:
+                del domain_data[DATA_DEVICE_INDEX]
+
+        return async_unregister
+
+    @callback
+    def async_start(self) -> None:
+        """Follow device registry events."""
+        self._unsub_listener = self._hass.bus.async_listen(
+            dr.EVENT_DEVICE_REGISTRY_UPDATED,
+            self.async_device_registry_updated,
+            event_filter=self._async_event_filter,
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop following device registry events."""
+        if self._unsub_listener is not None:
+            self._unsub_listener()
+            self._unsub_listener = None
+
+    @callback
+    def _async_event_filter(self, event: Event | Mapping[str, Any]) -> bool:
+        """Return True for events that can change the identifiers of a device.
+
+        Created devices always pass, as the event does not say which
+        identifiers they carry.
+        """
+        event_data = event_filter_data(event)
+        action = event_data.get("action")
+        if action == "create":
+            return True
+        if action == "remove":
+            return event_data.get("device_id") in self._internal_device_ids
+        return "identifiers" in event_data.get("changes", {})
+
+    @callback
+    def async_device_registry_updated(self, event: Event) -> None:
+        """Apply a device registry change to the index."""
+        registry_device_id = event.data["device_id"]
+        self._async_discard(registry_device_id)
+        if event.data["action"] == "remove":
+            return
+
+        device_entry = self._device_reg.async_get(registry_device_id)
+        if device_entry is None:
+            return
+        if (device_id := _internal_device_id(device_entry)) is not None:
+            self._async_add(device_id, registry_device_id)
+
+    @callback
+    def _async_add(self, device_id: str, registry_device_id: str) -> None:
+        """Record the registry device of an internal device ID."""
+        self._registry_device_ids[device_id] = registry_device_id
+        self._internal_device_ids[registry_device_id] = device_id
+
+    @callback
+    def _async_discard(self, registry_device_id: str) -> None:
+        """Forget a registry device."""
+        device_id = self._internal_device_ids.pop(registry_device_id, None)
+        if device_id is not None and self._registry_device_ids.get(device_id) == registry_device_id:
+            del self._registry_device_ids[device_id]
+
+
+@callback
+def async_get_device_index(hass: HomeAssistant) -> DeviceIdIndex:
+    """Return the device ID index, building it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_DEVICE_INDEX not in domain_data:
+        device_index = DeviceIdIndex(hass)
+        device_index.async_start()
+        domain_data[DATA_DEVICE_INDEX] = device_index
+    return domain_data[DATA_DEVICE_INDEX]
+
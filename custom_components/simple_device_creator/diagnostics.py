@@ -0,0 +1,56 @@
+"""Diagnostics support for Simple Device Creator."""
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_DEVICE_INDEX, DATA_DISPATCHER, DATA_ORPHAN_INDEX, DOMAIN
+from .metrics import async_get_hub_metrics
+from .runtime import async_get_hub_runtime
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the metrics and index sizes of a hub.
+
+    Only counts and durations are reported, so no device or entity names
+    leave the instance. Domain-wide indexes that are not built are reported
+    as None rather than built for the download.
+    """
+    domain_data = hass.data.get(DOMAIN, {})
+    dispatcher = domain_data.get(DATA_DISPATCHER)
+    orphan_index = domain_data.get(DATA_ORPHAN_INDEX)
+    device_index = domain_data.get(DATA_DEVICE_INDEX)
+    diagnostics: dict[str, Any] = {
+        "loaded": False,
+        "metrics": async_get_hub_metrics(hass, entry.entry_id).as_dict(),
+    }
+
+    if (runtime := async_get_hub_runtime(hass, entry.entry_id)) is not None:
+        hub_store = runtime.hub_store
+        diagnostics["loaded"] = True
+        diagnostics["hub"] = {
+            "devices": len(runtime.devices),
+            "registry_devices": len(runtime.registry_device_ids),
+            "linked_entities": len(runtime.linked_entities),
+            "name_index": len(runtime.name_index),
+            "selector_options": runtime.device_options(limit=0)[1],
+            "write_buffer": {
+                "pending": hub_store.write_buffer.pending,
+                "flushes": hub_store.write_buffer.flushes,
+                "dropped": hub_store.write_buffer.dropped,
+            },
+            "suppressed_echoes": (
+                0 if dispatcher is None else dispatcher.suppressed_echoes.get(entry.entry_id, 0)
+            ),
+        }
+
+    diagnostics["domain"] = {
+        "linked_entities": None if dispatcher is None else dispatcher.linked_entity_count,
+        "watched_devices": None if dispatcher is None else dispatcher.watched_device_count,
+        "orphan_index": None if orphan_index is None else len(orphan_index),
+        "device_index": None if device_index is None else len(device_index),
+    }
+    return diagnostics
@@ -0,0 +1,246 @@
+"""Domain-wide registry event dispatcher for Simple Device Creator."""
+
+from collections.abc import Callable, Generator, Iterable, Mapping
+from contextlib import contextmanager
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+
+from .const import DATA_DISPATCHER, DOMAIN
+
+EntityEventHandler = Callable[[Event, str], None]
+DeviceEventHandler = Callable[[Event, dr.DeviceEntry], None]
+
+
+class RegistryEventDispatcher:
+    """Route registry events to the hub that owns the affected entity or device.
+
+    One pair of bus listeners serves every hub of the domain. Linked entities
+    are kept in a reverse index so each entity event reaches the owning hub
+    with a single dictionary lookup. The listeners are registered with event
+    filters backed by the watched entity and registry device IDs, so events
+    for unrelated entities and devices never schedule a handler.
+
+    Registry updates made by a hub inside ``async_suppress_echoes`` are
+    recognised by the same filters and skipped, so a hub does not process
+    the events caused by its own writes.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the dispatcher."""
+        self._hass = hass
+        self._device_reg = dr.async_get(hass)
+        self._entity_handlers: dict[str, EntityEventHandler] = {}
+        self._device_handlers: dict[str, DeviceEventHandler] = {}
+        self._linked_entities: dict[str, tuple[str, str]] = {}
+        self._hub_links: dict[str, dict[str, str]] = {}
+        self._watched_devices: dict[str, str] = {}
+        self._hub_devices: dict[str, set[str]] = {}
+        self._unsub_listeners: list[CALLBACK_TYPE] = []
+        self._echo_entry_id: str | None = None
+        self.suppressed_echoes: dict[str, int] = {}
+
+    @property
+    def linked_entity_count(self) -> int:
+        """Return the number of linked entities of all hubs."""
+        return len(self._linked_entities)
+
+    @property
+    def watched_device_count(self) -> int:
+        """Return the number of registry devices of all hubs."""
+        return len(self._watched_devices)
+
+    @callback
+    def async_linked_entities(self) -> dict[str, tuple[str, str]]:
+        """Return a copy of the entity index, mapping entities to their hub and device."""
+        return dict(self._linked_entities)
+
+    @callback
+    def async_register_hub(
+        self,
+        entry_id: str,
+        entity_handler: EntityEventHandler,
+        device_handler: DeviceEventHandler,
+    ) -> CALLBACK_TYPE:
+        """Register the event handlers of a hub and return the unregister callback."""
+        if not self._unsub_listeners:
+            self._unsub_listeners = [
+                self._hass.bus.async_listen(
+                    dr.EVENT_DEVICE_REGISTRY_UPDATED,
+                    self.async_device_registry_updated,
+                    event_filter=self._async_device_event_filter,
+                ),
+                self._hass.bus.async_listen(
+                    er.EVENT_ENTITY_REGISTRY_UPDATED,
+                    self.async_entity_registry_updated,
+                    event_filter=self._async_entity_event_filter,
+                ),
+            ]
+
+        self._entity_handlers[entry_id] = entity_handler
+        self._device_handlers[entry_id] = device_handler
+
+        @callback
+        def async_unregister() -> None:
+            """Drop the hub handlers and its linked entities."""
+            self._entity_handlers.pop(entry_id, None)
+            self._device_handlers.pop(entry_id, None)
+            self.async_set_links(entry_id, {})
+            self._hub_links.pop(entry_id, None)
+            self.async_set_devices(entry_id, set())
+            self._hub_devices.pop(entry_id, None)
+            self.suppressed_echoes.pop(entry_id, None)
+            if self._entity_handlers:
+                return
+            for unsub in self._unsub_listeners:
+                unsub()
+            self._unsub_listeners = []
+            self._hass.data.get(DOMAIN, {}).pop(DATA_DISPATCHER, None)
+
+        return async_unregister
+
+    @callback
+    def async_set_links(self, entry_id: str, links: dict[str, str]) -> None:
+        """Replace the linked entities of a hub, touching only the changed ones.
+
+        The mapping is kept as given, so it stays shared with the hub runtime
+        and unlinked entities drop out of both. Hubs pass a new mapping when
+        they rebuild it, and report in-place edits with ``async_update_links``.
+        """
+        previous_links = self._hub_links.get(entry_id, {})
+        for entity_id in previous_links.keys() - links.keys():
+            if self._linked_entities.get(entity_id, (None,))[0] == entry_id:
+                del self._linked_entities[entity_id]
+        for entity_id, device_id in links.items():
+            if previous_links.get(entity_id) != device_id:
+                self._linked_entities[entity_id] = (entry_id, device_id)
+        self._hub_links[entry_id] = links
+
+    @callback
+    def async_update_links(self, entry_id: str, entity_ids: Iterable[str]) -> None:
+        """Apply the changed links of some entities of a hub.
+
+        The hub edited the mapping it passed to ``async_set_links`` in place,
+        so the targets of the given entities are read from it.
+        """
+        links = self._hub_links.get(entry_id, {})
+        for entity_id in entity_ids:
+            if (device_id := links.get(entity_id)) is not None:
+                self._linked_entities[entity_id] = (entry_id, device_id)
+            elif self._linked_entities.get(entity_id, (None,))[0] == entry_id:
+                del self._linked_entities[entity_id]
+
+    @callback
+    def async_unlink(self, entity_id: str) -> None:
+        """Forget a single linked entity."""
+        target = self._linked_entities.pop(entity_id, None)
+        if target is not None:
+            self._hub_links.get(target[0], {}).pop(entity_id, None)
+
+    @callback
+    def async_set_devices(self, entry_id: str, registry_device_ids: set[str]) -> None:
+        """Replace the watched registry devices of a hub."""
+        for device_id in self._hub_devices.get(entry_id, set()) - registry_device_ids:
+            self.async_unwatch_device(entry_id, device_id)
+        for device_id in registry_device_ids:
+            self.async_watch_device(entry_id, device_id)
+
+    @callback
+    def async_watch_device(self, entry_id: str, registry_device_id: str) -> None:
+        """Watch a registry device created or updated by a hub."""
+        self._watched_devices[registry_device_id] = entry_id
+        self._hub_devices.setdefault(entry_id, set()).add(registry_device_id)
+
+    @callback
+    def async_unwatch_device(self, entry_id: str, registry_device_id: str) -> None:
+        """Stop watching a registry device removed from a hub."""
+        self._hub_devices.get(entry_id, set()).discard(registry_device_id)
+        if self._watched_devices.get(registry_device_id) == entry_id:
+            del self._watched_devices[registry_device_id]
+
+    @contextmanager
+    def async_suppress_echoes(self, entry_id: str) -> Generator[None, None, None]:
+        """Skip the registry events caused by a hub's own updates in this block.
+
+        Registry updates fire their events synchronously, so the event filters
+        run while the block is still active.
+        """
+        previous_entry_id = self._echo_entry_id
+        self._echo_entry_id = entry_id
+        try:
+            yield
+        finally:
+            self._echo_entry_id = previous_entry_id
+
+    @callback
+    def _async_is_echo(self, entry_id: str) -> bool:
+        """Return True and count it when an event was caused by the hub itself."""
+        if entry_id != self._echo_entry_id:
+            return False
+        self.suppressed_echoes[entry_id] = self.suppressed_echoes.get(entry_id, 0) + 1
+        return True
+
+    @callback
+    def _async_entity_event_filter(self, event: Event | Mapping[str, Any]) -> bool:
+        """Return True for events about a linked entity not caused by its hub."""
+        target = self._linked_entities.get(event_filter_data(event).get("entity_id"))
+        return target is not None and not self._async_is_echo(target[0])
+
+    @callback
+    def _async_device_event_filter(self, event: Event | Mapping[str, Any]) -> bool:
+        """Return True for updates of a hub registry device not caused by its hub."""
+        event_data = event_filter_data(event)
+        if event_data.get("action") != "update":
+            return False
+        entry_id = self._watched_devices.get(event_data.get("device_id"))
+        return entry_id is not None and not self._async_is_echo(entry_id)
+
+    @callback
+    def async_entity_registry_updated(self, event: Event) -> None:
+        """Route an entity registry event to the hub that links the entity."""
+        target = self._linked_entities.get(event.data.get("entity_id"))
+        if target is None:
+            return
+
+        entry_id, device_id = target
+        handler = self._entity_handlers.get(entry_id)
+        if handler is not None:
+            handler(event, device_id)
+
+    @callback
+    def async_device_registry_updated(self, event: Event) -> None:
+        """Route a device registry update to the hubs attached to the device."""
+        if event.data["action"] != "update":
+            return
+        if "device_id" not in event.data:
+            return
+
+        registry_device = self._device_reg.async_get(event.data["device_id"])
+        if not registry_device:
+            return
+
+        for entry_id in registry_device.config_entries:
+            handler = self._device_handlers.get(entry_id)
+            if handler is not None:
+                handler(event, registry_device)
+
+
+def event_filter_data(event: Event | Mapping[str, Any]) -> Mapping[str, Any]:
+    """Return the event data passed to an event filter.
+
+    Home Assistant 2024.4 and later pass the event data to filters instead of
+    the event itself. Every registry event filter of the integration reads
+    its event through this helper.
+    """
+    return event.data if isinstance(event, Event) else event
+
+
+@callback
+def async_get_dispatcher(hass: HomeAssistant) -> RegistryEventDispatcher:
+    """Return the domain dispatcher, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_DISPATCHER not in domain_data:
+        domain_data[DATA_DISPATCHER] = RegistryEventDispatcher(hass)
+    return domain_data[DATA_DISPATCHER]
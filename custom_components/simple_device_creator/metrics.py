@@ -0,0 +1,134 @@
+"""Runtime metrics of Simple Device Creator hubs."""
+
+from bisect import bisect_left
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from functools import wraps
+from time import perf_counter
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_METRICS, DOMAIN
+
+METRIC_SETUP = "setup"
+METRIC_RELOAD = "reload"
+METRIC_ENTITY_HANDLER = "entity_registry_handler"
+METRIC_DEVICE_HANDLER = "device_registry_handler"
+
+# Upper bounds of the histogram buckets, in milliseconds.
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1.0, 5.0, 10.0, 50.0, 100.0, 500.0, 1000.0)
+
+
+class LatencyHistogram:
+    """Count durations in fixed millisecond buckets.
+
+    Recording a duration is a bisection and a few additions, so handlers on
+    the event loop can be timed on every call.
+    """
+
+    __slots__ = ("counts", "count", "total", "last", "max")
+
+    def __init__(self) -> None:
+        """Initialize an empty histogram."""
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Add one duration."""
+        milliseconds = seconds * 1000
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.last = milliseconds
+        self.max = max(self.max, milliseconds)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram for diagnostics."""
+        buckets = {f"le_{bound:g}ms": count for bound, count in zip(LATENCY_BUCKETS_MS, self.counts)}
+        buckets["over"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "last_ms": round(self.last, 3),
+            "max_ms": round(self.max, 3),
+            "buckets": buckets,
+        }
+
+
+@dataclass(slots=True)
+class HubMetrics:
+    """Durations and write counts of one hub.
+
+    Setup and reload durations cover the registry sync, which runs on the
+    event loop without yielding. Registry writes count the device and entity
+    registry updates made by setup, reconciles, the registry event handlers,
+    and the options flow, and entry writes count the config entry updates
+    that changed the entry.
+    """
+
+    durations: dict[str, LatencyHistogram] = field(
+        default_factory=lambda: {
+            name: LatencyHistogram()
+            for name in (METRIC_SETUP, METRIC_RELOAD, METRIC_ENTITY_HANDLER, METRIC_DEVICE_HANDLER)
+        }
+    )
+    device_registry_writes: int = 0
+    entity_registry_writes: int = 0
+    entry_writes: int = 0
+
+    def async_timed(self, name: str, handler: Callable[..., None]) -> Callable[..., None]:
+        """Return the handler, recording the duration of every call."""
+        histogram = self.durations[name]
+
+        @callback
+        @wraps(handler)
+        def async_timed_handler(*args: Any) -> None:
+            """Run the handler and record how long it took."""
+            start = perf_counter()
+            try:
+                handler(*args)
+            finally:
+                histogram.record(perf_counter() - start)
+
+        return async_timed_handler
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics for diagnostics."""
+        return {
+            "durations": {name: histogram.as_dict() for name, histogram in self.durations.items()},
+            "device_registry_writes": self.device_registry_writes,
+            "entity_registry_writes": self.entity_registry_writes,
+            "entry_writes": self.entry_writes,
+        }
+
+
+@callback
+def async_get_hub_metrics(hass: HomeAssistant, entry_id: str) -> HubMetrics:
+    """Return the metrics of a hub, creating them on first use.
+
+    Metrics outlive the hub runtime, so they keep counting across reloads.
+    """
+    metrics: dict[str, HubMetrics] = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_METRICS, {})
+    if entry_id not in metrics:
+        metrics[entry_id] = HubMetrics()
+    return metrics[entry_id]
+
+
+@callback
+def async_update_entry(hass: HomeAssistant, entry: ConfigEntry, **kwargs: Any) -> bool:
+    """Update a config entry and count the write when something changed."""
+    changed = hass.config_entries.async_update_entry(entry, **kwargs)
+    if changed:
+        async_get_hub_metrics(hass, entry.entry_id).entry_writes += 1
+    return changed
+
+
+@callback
+def async_remove_hub_metrics(hass: HomeAssistant, entry_id: str) -> None:
+    """Forget the metrics of a removed hub."""
+    hass.data.get(DOMAIN, {}).get(DATA_METRICS, {}).pop(entry_id, None)
@@ -0,0 +1,214 @@
+"""Domain-wide index of entities not linked to any device."""
+
+from bisect import bisect_left, insort
+from collections.abc import Iterator, Mapping
+import re
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+
+from .const import DATA_ORPHAN_INDEX, DOMAIN
+from .dispatcher import event_filter_data
+
+ORPHAN_PAGE_SIZE = 50
+
+_WORD_SEPARATORS = re.compile(r"[._\s]+")
+
+
+def _words(text: str) -> set[str]:
+    """Return the casefolded words of an entity ID or search query."""
+    return {word for word in _WORD_SEPARATORS.split(text.casefold()) if word}
+
+
+class OrphanEntityIndex:
+    """Keep the entity IDs without a device sorted and up to date.
+
+    The index is built from the entity registry once and then follows entity
+    registry events, so the options flow reads a ready-made sorted list
+    instead of scanning and sorting the whole registry on every step.
+
+    A sorted word list maps each word of the entity IDs to the entities that
+    contain it, so searches match words by prefix with a bisection instead of
+    testing every entity ID.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the index."""
+        self._hass = hass
+        self._entity_reg = er.async_get(hass)
+        self._entity_ids: list[str] = sorted(
+            entry.entity_id
+            for entry in self._entity_reg.entities.values()
+            if entry.device_id is None
+        )
+        self._members: set[str] = set(self._entity_ids)
+        self._word_entities: dict[str, set[str]] = {}
+        self._domain_counts: dict[str, int] = {}
+        for entity_id in self._entity_ids:
+            self._async_index_words(entity_id, sort_words=False)
+        self._words: list[str] = sorted(self._word_entities)
+        self._unsub_listener: CALLBACK_TYPE | None = None
+
+    @property
+    def entity_ids(self) -> list[str]:
+        """Return the sorted orphan entity IDs. The list must not be modified."""
+        return self._entity_ids
+
+    def __contains__(self, entity_id: object) -> bool:
+        """Return True when the entity is an orphan."""
+        return entity_id in self._members
+
+    def __len__(self) -> int:
+        """Return the number of orphan entities."""
+        return len(self._entity_ids)
+
+    @property
+    def domains(self) -> list[str]:
+        """Return the sorted domains that have orphan entities."""
+        return sorted(self._domain_counts)
+
+    def search(
+        self,
+        query: str = "",
+        domain: str | None = None,
+        offset: int = 0,
+        limit: int = ORPHAN_PAGE_SIZE,
+    ) -> tuple[list[str], int]:
+        """Return one sorted page of matching orphan entity IDs and the match count.
+
+        Every word of the query must be the start of a word of the entity ID.
+        Without a query the page is sliced straight from the sorted list.
+        """
+        domain_prefix = f"{domain}." if domain else ""
+        query_words = _words(query)
+        if not query_words:
+            start = bisect_left(self._entity_ids, domain_prefix)
+            end = (
+                bisect_left(self._entity_ids, f"{domain}/", start)
+                if domain
+                else len(self._entity_ids)
+            )
+            page_start = min(start + offset, end)
+            return self._entity_ids[page_start : min(page_start + limit, end)], end - start
+
+        matches = set.intersection(
+            *(
+                set().union(*self._entities_with_word_prefix(word))
+                for word in query_words
+            )
+        )
+        sorted_matches = sorted(
+            entity_id for entity_id in matches if entity_id.startswith(domain_prefix)
+        )
+        return sorted_matches[offset : offset + limit], len(sorted_matches)
+
+    def _entities_with_word_prefix(self, prefix: str) -> Iterator[set[str]]:
+        """Yield the entity sets of every indexed word starting with the prefix."""
+        for position in range(bisect_left(self._words, prefix), len(self._words)):
+            word = self._words[position]
+            if not word.startswith(prefix):
+                return
+            yield self._word_entities[word]
+
+    @callback
+    def async_start(self) -> None:
+        """Follow entity registry events."""
+        self._unsub_listener = self._hass.bus.async_listen(
+            er.EVENT_ENTITY_REGISTRY_UPDATED,
+            self.async_entity_registry_updated,
+            event_filter=self._async_event_filter,
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop following entity registry events."""
+        if self._unsub_listener is not None:
+            self._unsub_listener()
+            self._unsub_listener = None
+
+    @callback
+    def _async_event_filter(self, event: Event | Mapping[str, Any]) -> bool:
+        """Return True for events that can change whether an entity is an orphan."""
+        event_data = event_filter_data(event)
+        return (
+            event_data.get("action") != "update"
+            or "device_id" in event_data.get("changes", {})
+            or "old_entity_id" in event_data
+        )
+
+    @callback
+    def async_entity_registry_updated(self, event: Event) -> None:
+        """Apply an entity registry change to the index."""
+        entity_id = event.data["entity_id"]
+        if old_entity_id := event.data.get("old_entity_id"):
+            self._async_discard(old_entity_id)
+
+        entity_entry = self._entity_reg.async_get(entity_id)
+        if event.data["action"] == "remove" or entity_entry is None:
+            self._async_discard(entity_id)
+        elif entity_entry.device_id is None:
+            self._async_add(entity_id)
+        else:
+            self._async_discard(entity_id)
+
+    @callback
+    def _async_add(self, entity_id: str) -> None:
+        """Insert an orphan entity at its sorted position."""
+        if entity_id in self._members:
+            return
+        self._members.add(entity_id)
+        insort(self._entity_ids, entity_id)
+        self._async_index_words(entity_id)
+
+    @callback
+    def _async_discard(self, entity_id: str) -> None:
+        """Drop an entity that is no longer an orphan."""
+        if entity_id not in self._members:
+            return
+        self._members.discard(entity_id)
+        del self._entity_ids[bisect_left(self._entity_ids, entity_id)]
+        domain = entity_id.partition(".")[0]
+        if self._domain_counts[domain] == 1:
+            del self._domain_counts[domain]
+        else:
+            self._domain_counts[domain] -= 1
+        for word in _words(entity_id):
+            word_entities = self._word_entities[word]
+            word_entities.discard(entity_id)
+            if not word_entities:
+                del self._word_entities[word]
+                del self._words[bisect_left(self._words, word)]
+
+    @callback
+    def _async_index_words(self, entity_id: str, sort_words: bool = True) -> None:
+        """Add the domain and words of an orphan entity to the search index."""
+        domain = entity_id.partition(".")[0]
+        self._domain_counts[domain] = self._domain_counts.get(domain, 0) + 1
+        for word in _words(entity_id):
+            if word not in self._word_entities:
+                self._word_entities[word] = set()
+                if sort_words:
+                    insort(self._words, word)
+            self._word_entities[word].add(entity_id)
+
+
+@callback
+def async_get_orphan_index(hass: HomeAssistant) -> OrphanEntityIndex:
+    """Return the orphan entity index, building it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_ORPHAN_INDEX not in domain_data:
+        orphan_index = OrphanEntityIndex(hass)
+        orphan_index.async_start()
+        domain_data[DATA_ORPHAN_INDEX] = orphan_index
+    return domain_data[DATA_ORPHAN_INDEX]
+
+
+@callback
+def async_release_orphan_index(hass: HomeAssistant) -> None:
+    """Stop and forget the orphan entity index."""
+    orphan_index: OrphanEntityIndex | None = hass.data.get(DOMAIN, {}).pop(
+        DATA_ORPHAN_INDEX, None
+    )
+    if orphan_index is not None:
+        orphan_index.async_stop()
@@ -0,0 +1,91 @@
+"""Runtime state of a loaded Simple Device Creator hub."""
+
+from collections.abc import Collection, Iterable, Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import CONF_ENTITY_IDS, DOMAIN
+from .storage import DeviceRecord, HubStore
+
+
+def linked_entity_targets(devices: Iterable[Mapping[str, Any]]) -> dict[str, str]:
+    """Return the target internal device ID for each stored linked entity."""
+    linked_entities: dict[str, str] = {}
+    for device_data in devices:
+        device_id = device_data.get("id")
+        if not device_id:
+            continue
+        for entity_id in device_data.get(CONF_ENTITY_IDS, []):
+            linked_entities[entity_id] = device_id
+    return linked_entities
+
+
+@dataclass(slots=True)
+class HubRuntime:
+    """Precomputed lookups of a loaded hub.
+
+    The entry setup builds it from the registry devices it already reads.
+    The reconcile pass and the registry event handlers keep it current, and
+    the options flow reads it, so none of them query the device registry by
+    identifier or rescan the stored devices. The name index and the sorted
+    selector options belong to the hub store, which rebuilds them whenever
+    the devices are replaced.
+    """
+
+    hub_store: HubStore
+    fingerprint: str
+    devices: list[DeviceRecord] = field(default_factory=list)
+    registry_device_ids: dict[str, str] = field(default_factory=dict)
+    linked_entities: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def name_index(self) -> dict[str, str]:
+        """Return the normalized device names of the hub."""
+        return self.hub_store.name_index
+
+    def device_options(
+        self, prefix: str = "", limit: int | None = None
+    ) -> tuple[list[dict[str, str]], int]:
+        """Return the sorted device selector options and the match count."""
+        return self.hub_store.device_options(prefix, limit)
+
+    @callback
+    def async_set_devices(self, devices: list[DeviceRecord]) -> None:
+        """Record the devices applied to the registries and their entity links."""
+        self.devices = devices
+        self.linked_entities = linked_entity_targets(devices)
+
+    @callback
+    def async_replace_devices(
+        self, devices: list[DeviceRecord], positions: Collection[int]
+    ) -> set[str]:
+        """Record devices that only changed at the given positions.
+
+        The entity links of the other devices are kept as they are, and the
+        link map is updated in place. Returns the entities whose link was
+        added, moved or removed.
+        """
+        linked_entities = self.linked_entities
+        relinked_entity_ids: set[str] = set()
+        for position in positions:
+            previous_entity_ids = self.devices[position].get(CONF_ENTITY_IDS, ())
+            device_data = devices[position]
+            entity_ids = device_data.get(CONF_ENTITY_IDS, ())
+            if entity_ids == previous_entity_ids:
+                continue
+            device_id = device_data["id"]
+            for entity_id in previous_entity_ids:
+                if linked_entities.get(entity_id) == device_id:
+                    del linked_entities[entity_id]
+            linked_entities.update(dict.fromkeys(entity_ids, device_id))
+            relinked_entity_ids.update(previous_entity_ids, entity_ids)
+        self.devices = devices
+        return relinked_entity_ids
+
+
+@callback
+def async_get_hub_runtime(hass: HomeAssistant, entry_id: str) -> HubRuntime | None:
+    """Return the runtime of a loaded hub, or None when it is not loaded."""
+    return hass.data.get(DOMAIN, {}).get(entry_id)
@@ -0,0 +1,609 @@
+"""Services for Simple Device Creator."""
+
+import asyncio
+from collections.abc import Iterator, Mapping
+import csv
+from dataclasses import dataclass, field
+from functools import partial
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import IO, Any
+
+import voluptuous as vol
+import yaml
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+
+from .const import (
+    CONF_ENTITY_IDS,
+    CONF_EXTERNAL_KEY,
+    CONF_HW_VERSION,
+    CONF_MANUFACTURER,
+    CONF_MODEL,
+    CONF_NAME,
+    CONF_SW_VERSION,
+    DATA_DISPATCHER,
+    DEFAULT_HW_VERSION,
+    DEFAULT_MANUFACTURER,
+    DEFAULT_MODEL,
+    DEFAULT_SW_VERSION,
+    DOMAIN,
+    SERVICE_EXPORT_DEVICES,
+    SERVICE_IMPORT_DEVICES,
+)
+from .storage import (
+    DeviceRecord,
+    HubStore,
+    async_get_hub_store,
+    build_device_payload,
+    is_yaml_managed,
+    normalize_name,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_ENTRY_ID = "entry_id"
+ATTR_FORMAT = "format"
+ATTR_HUB = "hub"
+ATTR_MODE = "mode"
+ATTR_PATH = "path"
+ATTR_PAYLOAD = "payload"
+
+FORMAT_CSV = "csv"
+FORMAT_JSON = "json"
+FORMAT_JSONL = "jsonl"
+FORMAT_YAML = "yaml"
+IMPORT_FORMATS = (FORMAT_CSV, FORMAT_JSON, FORMAT_JSONL, FORMAT_YAML)
+IMPORT_MODE_MERGE = "merge"
+IMPORT_MODE_SYNC = "sync"
+IMPORT_CHUNK_SIZE = 500
+EXPORT_CHUNK_SIZE = 500
+
+_FILE_FORMATS = {
+    ".csv": FORMAT_CSV,
+    ".json": FORMAT_JSON,
+    ".jsonl": FORMAT_JSONL,
+    ".yaml": FORMAT_YAML,
+    ".yml": FORMAT_YAML,
+}
+_METADATA_KEYS = (CONF_MANUFACTURER, CONF_MODEL, CONF_SW_VERSION, CONF_HW_VERSION)
+_CONTENT_KEYS = (CONF_NAME, *_METADATA_KEYS)
+_METADATA_DEFAULTS = {
+    CONF_MANUFACTURER: DEFAULT_MANUFACTURER,
+    CONF_MODEL: DEFAULT_MODEL,
+    CONF_SW_VERSION: DEFAULT_SW_VERSION,
+    CONF_HW_VERSION: DEFAULT_HW_VERSION,
+}
+
+IMPORT_DEVICES_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required(ATTR_ENTRY_ID): cv.string,
+            vol.Exclusive(ATTR_PATH, "source"): cv.string,
+            vol.Exclusive(ATTR_PAYLOAD, "source"): vol.Any(cv.string, list, dict),
+            vol.Optional(ATTR_FORMAT): vol.In(IMPORT_FORMATS),
+            vol.Optional(ATTR_MODE, default=IMPORT_MODE_MERGE): vol.In(
+                (IMPORT_MODE_MERGE, IMPORT_MODE_SYNC)
+            ),
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_PATH, ATTR_PAYLOAD),
+)
+
+EXPORT_DEVICES_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_PATH): cv.string,
+        vol.Optional(ATTR_ENTRY_ID): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(CONF_MANUFACTURER): cv.string,
+        vol.Optional(CONF_MODEL): cv.string,
+    }
+)
+
+IMPORT_ROW_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_NAME): vol.All(cv.string, str.strip, vol.Length(min=1)),
+        vol.Optional(CONF_MANUFACTURER): cv.string,
+        vol.Optional(CONF_MODEL): cv.string,
+        vol.Optional(CONF_SW_VERSION): cv.string,
+        vol.Optional(CONF_HW_VERSION): cv.string,
+        vol.Optional(CONF_ENTITY_IDS, default=list): cv.entity_ids,
+        vol.Optional(CONF_EXTERNAL_KEY): vol.All(cv.string, str.strip, vol.Length(min=1)),
+    },
+    extra=vol.REMOVE_EXTRA,
+)
+
+
+@dataclass
+class _ImportPlan:
+    """The changes an import makes to a hub."""
+
+    created: list[dict] = field(default_factory=list)
+    updated: list[tuple[str, dict]] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)
+    unchanged: int = 0
+    errors: list[dict] = field(default_factory=list)
+
+
+def _read_rows(source: str | list | dict, source_format: str, from_path: bool) -> Iterator[Any]:
+    """Yield the raw rows of an import file or inline payload.
+
+    CSV and JSON Lines files, such as the ones written by ``export_devices``,
+    are read one row at a time. JSON and YAML documents are either a list of
+    rows or a mapping with a ``devices`` list.
+    """
+    if isinstance(source, (list, dict)):
+        document: Any = source
+    elif source_format in (FORMAT_CSV, FORMAT_JSONL):
+        row_reader = _csv_rows if source_format == FORMAT_CSV else _jsonl_rows
+        if not from_path:
+            yield from row_reader(source.splitlines())
+            return
+        with open(source, encoding="utf-8", newline="") as import_file:
+            yield from row_reader(import_file)
+        return
+    else:
+        text = Path(source).read_text(encoding="utf-8") if from_path else source
+        document = json.loads(text) if source_format == FORMAT_JSON else yaml.safe_load(text)
+
+    if isinstance(document, dict):
+        document = document.get("devices")
+    if not isinstance(document, list):
+        raise ValueError("expected a list of devices or a mapping with a devices list")
+    yield from document
+
+
+def _csv_rows(lines) -> Iterator[dict]:
+    """Yield CSV rows without their empty cells, so defaults apply to them."""
+    for row in csv.DictReader(lines):
+        yield {key: value for key, value in row.items() if key and value not in ("", None)}
+
+
+def _jsonl_rows(lines) -> Iterator[Any]:
+    """Yield the JSON value of every non-blank line."""
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _validated_rows(raw_rows: Iterator[Any], plan: _ImportPlan) -> Iterator[tuple[int, dict]]:
+    """Yield the numbered rows that pass the device form rules and record the others.
+
+    Names are required, trimmed, and unique inside the hub, compared
+    case-insensitively, and external keys are unique inside the import.
+    Blank metadata cells are left out of the row, so merges keep the stored
+    value and new devices get the form default.
+    """
+    seen_names: set[str] = set()
+    seen_external_keys: set[str] = set()
+    for row_number, raw_row in enumerate(raw_rows, 1):
+        try:
+            row = IMPORT_ROW_SCHEMA(raw_row)
+        except vol.Invalid as err:
+            plan.errors.append({"row": row_number, "error": str(err)})
+            continue
+        for key in _METADATA_KEYS:
+            if key in row and not row[key].strip():
+                del row[key]
+
+        normalized_name = normalize_name(row[CONF_NAME])
+        if normalized_name in seen_names:
+            plan.errors.append({"row": row_number, "error": "duplicate name in import"})
+            continue
+        seen_names.add(normalized_name)
+        if external_key := row.get(CONF_EXTERNAL_KEY):
+            if external_key in seen_external_keys:
+                plan.errors.append({"row": row_number, "error": "duplicate external key in import"})
+                continue
+            seen_external_keys.add(external_key)
+        yield row_number, row
+
+
+def _entity_owners(
+    entry_id: str,
+    devices: list[dict],
+    linked_entities: Mapping[str, tuple[str, str]],
+    mode: str,
+) -> dict[str, tuple[str, str]]:
+    """Return the hub and device each entity is linked to before the import.
+
+    Links of other hubs come from the dispatcher's entity index. A merge
+    keeps the links of this hub, so they are included; a sync replaces them.
+    """
+    owners = {
+        entity_id: owner for entity_id, owner in linked_entities.items() if owner[0] != entry_id
+    }
+    if mode == IMPORT_MODE_MERGE:
+        for device in devices:
+            for entity_id in device.get(CONF_ENTITY_IDS, ()):
+                owners[entity_id] = (entry_id, device["id"])
+    return owners
+
+
+def _claim_entities(
+    row_number: int,
+    row: dict,
+    owner: tuple[str, str],
+    entity_owners: dict[str, tuple[str, str]],
+    plan: _ImportPlan,
+) -> bool:
+    """Link the row's entities to a device, or reject the row if one is linked elsewhere.
+
+    Entities claimed by accepted rows are added to ``entity_owners``, so a
+    later row cannot link them to another device either.
+    """
+    for entity_id in row[CONF_ENTITY_IDS]:
+        if entity_owners.get(entity_id, owner) != owner:
+            plan.errors.append(
+                {"row": row_number, "error": f"{entity_id} is already linked to another device"}
+            )
+            return False
+    entity_owners.update(dict.fromkeys(row[CONF_ENTITY_IDS], owner))
+    return True
+
+
+def _device_key(device: dict) -> str:
+    """Return the external key of a device or of an import row.
+
+    Without an explicit ``external_key`` the key is the name, manufacturer,
+    and model, compared case-insensitively.
+    """
+    if external_key := device.get(CONF_EXTERNAL_KEY):
+        return external_key
+    return "|".join(
+        normalize_name(device.get(key, "")) for key in (CONF_NAME, CONF_MANUFACTURER, CONF_MODEL)
+    )
+
+
+def _content_hash(device: dict) -> str:
+    """Return a hash of the device fields an import can change."""
+    content = [device.get(key, "") for key in _CONTENT_KEYS]
+    content.append(sorted(device.get(CONF_ENTITY_IDS, [])))
+    return hashlib.sha256(json.dumps(content).encode()).hexdigest()
+
+
+def _with_defaults(row: dict) -> dict:
+    """Return the row with the form defaults for the metadata it leaves out."""
+    return {**_METADATA_DEFAULTS, **row}
+
+
+def _new_device(row: dict) -> dict:
+    """Return the stored payload of a device created by an import row."""
+    device = build_device_payload(_with_defaults(row))
+    if external_key := row.get(CONF_EXTERNAL_KEY):
+        device[CONF_EXTERNAL_KEY] = external_key
+    return device
+
+
+def _plan_merge(
+    rows: Iterator[tuple[int, dict]],
+    devices: list[dict],
+    plan: _ImportPlan,
+    entry_id: str,
+    entity_owners: dict[str, tuple[str, str]],
+) -> None:
+    """Create devices for new names and update the metadata of known ones.
+
+    Only the metadata a row sets is changed, and linked entities listed in a
+    row are added to the existing links. Rows linking an entity that is
+    already linked to another device are rejected.
+    """
+    devices_by_name = {normalize_name(device.get(CONF_NAME, "")): device for device in devices}
+    for row_number, row in rows:
+        device = devices_by_name.get(normalize_name(row[CONF_NAME]))
+        if device is None:
+            new_device = _new_device(row)
+            if _claim_entities(row_number, row, (entry_id, new_device["id"]), entity_owners, plan):
+                plan.created.append(new_device)
+            continue
+        if not _claim_entities(row_number, row, (entry_id, device["id"]), entity_owners, plan):
+            continue
+
+        changes = {key: row[key] for key in _METADATA_KEYS if key in row}
+        linked_entity_ids = list(device.get(CONF_ENTITY_IDS, []))
+        new_entity_ids = [
+            entity_id
+            for entity_id in dict.fromkeys(row[CONF_ENTITY_IDS])
+            if entity_id not in linked_entity_ids
+        ]
+        if new_entity_ids:
+            changes[CONF_ENTITY_IDS] = linked_entity_ids + new_entity_ids
+        if row.get(CONF_EXTERNAL_KEY):
+            changes[CONF_EXTERNAL_KEY] = row[CONF_EXTERNAL_KEY]
+        if DeviceRecord.from_dict({**device, **changes}) == device:
+            plan.unchanged += 1
+        else:
+            plan.updated.append((device["id"], changes))
+
+
+def _plan_sync(
+    rows: Iterator[tuple[int, dict]],
+    devices: list[dict],
+    plan: _ImportPlan,
+    entry_id: str,
+    entity_owners: dict[str, tuple[str, str]],
+) -> None:
+    """Make the hub match the rows exactly, matching devices by external key.
+
+    Devices whose content hash already matches their row are left alone, and
+    devices without a row are deleted. Metadata a row leaves out is reset to
+    the form default, as the rows describe the whole hub. Rows linking an
+    entity that another device keeps are rejected, and their device is kept.
+    """
+    devices_by_key = {_device_key(device): device for device in devices}
+    seen_keys: set[str] = set()
+    for row_number, row in rows:
+        row = _with_defaults(row)
+        key = _device_key(row)
+        if key in seen_keys:
+            plan.errors.append({"row": row_number, "error": "duplicate key in import"})
+            continue
+        seen_keys.add(key)
+
+        device = devices_by_key.get(key)
+        if device is None:
+            device = _new_device(row)
+            if _claim_entities(row_number, row, (entry_id, device["id"]), entity_owners, plan):
+                plan.created.append(device)
+        elif not _claim_entities(row_number, row, (entry_id, device["id"]), entity_owners, plan):
+            continue
+        elif _content_hash(device) == _content_hash(row):
+            plan.unchanged += 1
+        else:
+            changes = {field_key: row[field_key] for field_key in _CONTENT_KEYS}
+            changes[CONF_ENTITY_IDS] = list(row[CONF_ENTITY_IDS])
+            plan.updated.append((device["id"], changes))
+
+    plan.deleted.extend(
+        device["id"] for key, device in devices_by_key.items() if key not in seen_keys
+    )
+
+
+def _plan_import(
+    source: str | list | dict,
+    source_format: str,
+    from_path: bool,
+    devices: list[dict],
+    mode: str,
+    entry_id: str,
+    linked_entities: Mapping[str, tuple[str, str]],
+) -> _ImportPlan:
+    """Parse, validate, and compare the import rows with the hub devices.
+
+    Runs in the executor on a copy of the stored devices and of the
+    dispatcher's entity index.
+    """
+    plan = _ImportPlan()
+    rows = _validated_rows(_read_rows(source, source_format, from_path), plan)
+    entity_owners = _entity_owners(entry_id, devices, linked_entities, mode)
+    if mode == IMPORT_MODE_SYNC:
+        _plan_sync(rows, devices, plan, entry_id, entity_owners)
+    else:
+        _plan_merge(rows, devices, plan, entry_id, entity_owners)
+    return plan
+
+
+def _source_format(call: ServiceCall) -> str:
+    """Return the declared format, or the one implied by the file suffix."""
+    if ATTR_FORMAT in call.data:
+        return call.data[ATTR_FORMAT]
+    if ATTR_PATH in call.data:
+        suffix = Path(call.data[ATTR_PATH]).suffix.lower()
+        if suffix not in _FILE_FORMATS:
+            raise ServiceValidationError(f"Cannot tell the format of {call.data[ATTR_PATH]}")
+        return _FILE_FORMATS[suffix]
+    return FORMAT_YAML
+
+
+async def _async_import_devices(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Handle an import service call for a hub."""
+    entry = hass.config_entries.async_get_entry(call.data[ATTR_ENTRY_ID])
+    if entry is None or entry.domain != DOMAIN:
+        raise ServiceValidationError(f"Unknown hub {call.data[ATTR_ENTRY_ID]}")
+    # YAML hubs are synced from configuration.yaml, which would undo the import.
+    if is_yaml_managed(entry):
+        raise ServiceValidationError(f"Hub {entry.title} is managed in YAML")
+
+    source_format = _source_format(call)
+    from_path = ATTR_PATH in call.data
+    source = call.data[ATTR_PATH] if from_path else call.data[ATTR_PAYLOAD]
+    if from_path and not hass.config.is_allowed_path(source):
+        raise ServiceValidationError(f"Access to {source} is not allowed")
+
+    return await async_import_devices(
+        hass, entry, source, source_format, from_path, call.data[ATTR_MODE]
+    )
+
+
+async def async_import_devices(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    source: str | list | dict,
+    source_format: str,
+    from_path: bool,
+    mode: str,
+) -> dict[str, Any]:
+    """Import devices into a hub and return the change counts and row errors.
+
+    Parsing and validation run in the executor. The accepted rows are then
+    committed in chunks of ``IMPORT_CHUNK_SIZE``.
+    """
+    hub_store = await async_get_hub_store(hass, entry)
+    hub_store.write_buffer.async_flush()
+    dispatcher = hass.data.get(DOMAIN, {}).get(DATA_DISPATCHER)
+    linked_entities = dispatcher.async_linked_entities() if dispatcher else {}
+    try:
+        plan = await hass.async_add_executor_job(
+            _plan_import,
+            source,
+            source_format,
+            from_path,
+            list(hub_store.devices),
+            mode,
+            entry.entry_id,
+            linked_entities,
+        )
+    except (OSError, ValueError, yaml.YAMLError, csv.Error) as err:
+        raise HomeAssistantError(f"Could not read the import: {err}") from err
+
+    summary = await _async_apply_plan(hub_store, plan)
+    _LOGGER.info(
+        "Imported devices into %s: %s created, %s updated, %s deleted, %s unchanged, %s rejected",
+        entry.title,
+        summary["created"],
+        summary["updated"],
+        summary["deleted"],
+        summary["unchanged"],
+        summary["rejected"],
+    )
+    return {**summary, "errors": plan.errors}
+
+
+async def _async_apply_plan(hub_store: HubStore, plan: _ImportPlan) -> dict[str, int]:
+    """Apply an import plan in chunks and return the change counts.
+
+    Deletions run first so that created or renamed devices can take over
+    their names. Each chunk is one store update, so a loaded hub reconciles it
+    before the loop is yielded. A plan without changes writes nothing.
+    """
+    summary = {
+        "created": 0,
+        "updated": 0,
+        "deleted": 0,
+        "unchanged": plan.unchanged,
+        "rejected": len(plan.errors),
+    }
+    operations: list[tuple[str | None, dict | None]] = [
+        *((device_id, None) for device_id in plan.deleted),
+        *plan.updated,
+        *((None, device) for device in plan.created),
+    ]
+    for start in range(0, len(operations), IMPORT_CHUNK_SIZE):
+        devices = list(hub_store.devices)
+        positions = {device["id"]: index for index, device in enumerate(devices)}
+        deleted_ids = set()
+        for device_id, changes in operations[start : start + IMPORT_CHUNK_SIZE]:
+            if device_id is None:
+                devices.append(changes)
+                summary["created"] += 1
+            elif (position := positions.get(device_id)) is None:
+                if changes is not None:
+                    summary["rejected"] += 1
+                    plan.errors.append({"id": device_id, "error": "device removed during import"})
+            elif changes is None:
+                deleted_ids.add(device_id)
+                summary["deleted"] += 1
+            else:
+                devices[position] = DeviceRecord.from_dict({**devices[position], **changes})
+                summary["updated"] += 1
+
+        if deleted_ids:
+            devices = [device for device in devices if device["id"] not in deleted_ids]
+        hub_store.async_set_devices(devices)
+        await asyncio.sleep(0)
+    return summary
+
+
+def _export_record(entry: ConfigEntry, device: DeviceRecord) -> dict:
+    """Return the export line of a device, detached from the stored data."""
+    record = {ATTR_ENTRY_ID: entry.entry_id, ATTR_HUB: entry.title, **device}
+    record[CONF_ENTITY_IDS] = list(device.get(CONF_ENTITY_IDS, []))
+    return record
+
+
+def _write_lines(export_file: IO[str], records: list[dict]) -> None:
+    """Serialise records as JSON Lines and append them. Runs in the executor."""
+    export_file.writelines(f"{json.dumps(record, ensure_ascii=False)}\n" for record in records)
+
+
+async def _async_export_devices(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Write the devices and links of every matching hub to a JSON Lines file.
+
+    Devices are copied on the event loop ``EXPORT_CHUNK_SIZE`` at a time and
+    each chunk is serialised and written in the executor, so memory use does
+    not grow with the hub size. The file is written next to the target and
+    moved into place once complete.
+    """
+    path = call.data[ATTR_PATH]
+    if not hass.config.is_allowed_path(path):
+        raise ServiceValidationError(f"Access to {path} is not allowed")
+
+    entries = hass.config_entries.async_entries(DOMAIN)
+    if ATTR_ENTRY_ID in call.data:
+        entry_ids = set(call.data[ATTR_ENTRY_ID])
+        if unknown_entry_ids := entry_ids - {entry.entry_id for entry in entries}:
+            raise ServiceValidationError(f"Unknown hubs {', '.join(sorted(unknown_entry_ids))}")
+        entries = [entry for entry in entries if entry.entry_id in entry_ids]
+
+    filters = {
+        key: normalize_name(call.data[key])
+        for key in (CONF_MANUFACTURER, CONF_MODEL)
+        if key in call.data
+    }
+    temp_path = f"{path}.tmp"
+    exported = 0
+    try:
+        export_file = await hass.async_add_executor_job(
+            partial(open, temp_path, "w", encoding="utf-8")
+        )
+        try:
+            for entry in entries:
+                hub_store = await async_get_hub_store(hass, entry)
+                devices = hub_store.devices
+                for start in range(0, len(devices), EXPORT_CHUNK_SIZE):
+                    records = [
+                        _export_record(entry, device)
+                        for device in devices[start : start + EXPORT_CHUNK_SIZE]
+                        if all(
+                            normalize_name(device.get(key, "")) == value
+                            for key, value in filters.items()
+                        )
+                    ]
+                    if records:
+                        await hass.async_add_executor_job(_write_lines, export_file, records)
+                        exported += len(records)
+        finally:
+            await hass.async_add_executor_job(export_file.close)
+        await hass.async_add_executor_job(os.replace, temp_path, path)
+    except OSError as err:
+        raise HomeAssistantError(f"Could not write the export: {err}") from err
+
+    return {ATTR_PATH: path, "hubs": len(entries), "devices": exported}
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration services."""
+
+    async def async_handle_import_devices(call: ServiceCall) -> ServiceResponse:
+        """Handle the import devices service."""
+        return await _async_import_devices(hass, call)
+
+    async def async_handle_export_devices(call: ServiceCall) -> ServiceResponse:
+        """Handle the export devices service."""
+        return await _async_export_devices(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_DEVICES,
+        async_handle_export_devices,
+        schema=EXPORT_DEVICES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_IMPORT_DEVICES,
+        async_handle_import_devices,
+        schema=IMPORT_DEVICES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
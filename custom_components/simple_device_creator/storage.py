@@ -0,0 +1,466 @@
+"""Per-hub device storage for Simple Device Creator."""
+
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from dataclasses import dataclass, fields
+import logging
+import sys
+from typing import Any
+import uuid
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    CONF_ENTITY_IDS,
+    CONF_EXTERNAL_KEY,
+    CONF_HW_VERSION,
+    CONF_MANUFACTURER,
+    CONF_MODEL,
+    CONF_NAME,
+    CONF_STORAGE_KEY,
+    CONF_STORAGE_VERSION,
+    CONF_SW_VERSION,
+    CONF_YAML_KEY,
+    DATA_STORES,
+    DOMAIN,
+)
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+WRITE_BACK_DELAY = 1.0
+
+_LOGGER = logging.getLogger(__name__)
+
+# Sorts after every character, so prefix + _MAX_CHAR bounds all names with the prefix.
+_MAX_CHAR = chr(0x10FFFF)
+
+# Metadata values that repeat across devices and are interned when loaded.
+_INTERNED_KEYS = (CONF_MANUFACTURER, CONF_MODEL, CONF_SW_VERSION, CONF_HW_VERSION)
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class DeviceRecord(Mapping[str, Any]):
+    """One stored hub device.
+
+    Records are immutable and read like the stored dictionaries: fields that
+    are not set are left out, so ``record[CONF_NAME]`` and
+    ``record.get(CONF_MODEL, "")`` behave as before. The repeated
+    manufacturer, model and version strings are interned, so thousands of
+    devices from one vendor share a single copy of each value.
+
+    The lookups used on hot paths (``get``, ``in``, comparing two records
+    and ``as_dict``) read the fields directly instead of going through the
+    generic ``Mapping`` methods.
+    """
+
+    id: str
+    name: str | None = None
+    manufacturer: str | None = None
+    model: str | None = None
+    sw_version: str | None = None
+    hw_version: str | None = None
+    entity_ids: tuple[str, ...] | None = None
+    external_key: str | None = None
+
+    @classmethod
+    def from_dict(cls, device: Mapping[str, Any]) -> "DeviceRecord":
+        """Build a record from stored or submitted device data."""
+        values = {key: device[key] for key in _RECORD_KEYS if device.get(key) is not None}
+        for key in _INTERNED_KEYS:
+            if key in values:
+                values[key] = sys.intern(str(values[key]))
+        if CONF_ENTITY_IDS in values:
+            values[CONF_ENTITY_IDS] = tuple(values[CONF_ENTITY_IDS])
+        return cls(**values)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the record as the dictionary written to storage."""
+        device = {"id": self.id}
+        if self.name is not None:
+            device[CONF_NAME] = self.name
+        if self.manufacturer is not None:
+            device[CONF_MANUFACTURER] = self.manufacturer
+        if self.model is not None:
+            device[CONF_MODEL] = self.model
+        if self.sw_version is not None:
+            device[CONF_SW_VERSION] = self.sw_version
+        if self.hw_version is not None:
+            device[CONF_HW_VERSION] = self.hw_version
+        if self.entity_ids is not None:
+            device[CONF_ENTITY_IDS] = list(self.entity_ids)
+        if self.external_key is not None:
+            device[CONF_EXTERNAL_KEY] = self.external_key
+        return device
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a set field, or the default when it is not set."""
+        if key in _RECORD_KEY_SET and (value := getattr(self, key)) is not None:
+            return value
+        return default
+
+    def __contains__(self, key: object) -> bool:
+        """Return True when the field is set."""
+        return key in _RECORD_KEY_SET and getattr(self, key) is not None
+
+    def __eq__(self, other: object) -> bool:
+        """Compare two records field by field, or a record with a dictionary."""
+        if isinstance(other, DeviceRecord):
+            return (
+                self.id == other.id
+                and self.name == other.name
+                and self.manufacturer == other.manufacturer
+                and self.model == other.model
+                and self.sw_version == other.sw_version
+                and self.hw_version == other.hw_version
+                and self.entity_ids == other.entity_ids
+                and self.external_key == other.external_key
+            )
+        return Mapping.__eq__(self, other)
+
+    def __getitem__(self, key: str) -> Any:
+        """Return a set field like a dictionary lookup."""
+        if key not in _RECORD_KEY_SET or (value := getattr(self, key)) is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the fields that are set."""
+        return (key for key in _RECORD_KEYS if getattr(self, key) is not None)
+
+    def __len__(self) -> int:
+        """Return the number of fields that are set."""
+        return sum(1 for _key in self)
+
+
+_RECORD_KEYS = tuple(field.name for field in fields(DeviceRecord))
+_RECORD_KEY_SET = frozenset(_RECORD_KEYS)
+
+
+def as_records(devices: Iterable[Mapping[str, Any]]) -> list[DeviceRecord]:
+    """Return the devices as records, reusing the ones that already are."""
+    return [
+        device if isinstance(device, DeviceRecord) else DeviceRecord.from_dict(device)
+        for device in devices
+    ]
+
+
+def build_device_payload(user_input: Mapping[str, Any], existing_id: str | None = None) -> dict:
+    """Convert device form input or an import row into the stored device payload."""
+    return {
+        "id": existing_id or str(uuid.uuid4()),
+        CONF_NAME: user_input[CONF_NAME].strip(),
+        CONF_MANUFACTURER: user_input[CONF_MANUFACTURER],
+        CONF_MODEL: user_input[CONF_MODEL],
+        CONF_SW_VERSION: user_input[CONF_SW_VERSION],
+        CONF_HW_VERSION: user_input[CONF_HW_VERSION],
+        CONF_ENTITY_IDS: list(user_input.get(CONF_ENTITY_IDS, [])),
+    }
+
+
+DeviceMutation = Callable[[DeviceRecord], DeviceRecord]
+
+
+def replace_device(
+    devices: list[DeviceRecord], device_id: str, changes: dict
+) -> DeviceRecord | None:
+    """Swap one device in the list for an updated record.
+
+    Records are never modified in place. The changed device gets a new record
+    while every other record keeps being shared with earlier snapshots of the
+    hub. Returns the new record, or None when the device did not change.
+    """
+    for position, device in enumerate(devices):
+        if device["id"] != device_id:
+            continue
+        updated_device = DeviceRecord.from_dict({**device, **changes})
+        if updated_device == device:
+            return None
+        devices[position] = updated_device
+        return updated_device
+    return None
+
+
+def normalize_name(name: str) -> str:
+    """Return the form of a device name used to detect duplicates."""
+    return name.strip().casefold()
+
+
+def build_name_index(devices: list[DeviceRecord]) -> dict[str, str]:
+    """Map the normalized name of each device to its ID."""
+    return {normalize_name(device.get(CONF_NAME, "")): device["id"] for device in devices}
+
+
+class HubStore:
+    """Hold the devices of one hub and persist them in a dedicated store.
+
+    Writes are delayed and coalesced by the underlying Home Assistant store,
+    so a burst of edits results in a single write of this hub's file only.
+
+    A name index and a map of device positions make duplicate name checks
+    and device lookups a single dictionary lookup. The positions are rebuilt
+    whenever the devices are replaced. The name index and the sorted device
+    selector options are only rebuilt after a device was added, renamed,
+    moved or deleted. Devices replaced one by one through
+    ``async_replace_devices`` update these indexes for those devices only,
+    and ``changed_ids`` tells the listeners which devices they were.
+    """
+
+    def __init__(self, hass: HomeAssistant, key: str) -> None:
+        """Initialize the hub store."""
+        self._store: Store[dict] = Store(hass, STORAGE_VERSION, key)
+        self.key = key
+        self._devices: list[DeviceRecord] = []
+        self.name_index: dict[str, str] = {}
+        self.device_positions: dict[str, int] = {}
+        self._device_labels: dict[str, str] = {}
+        self._option_keys: list[str] | None = None
+        self._options: list[dict[str, str]] = []
+        self.changed_ids: frozenset[str] | None = None
+        self._listeners: list[Callable[[], None]] = []
+        self.write_buffer = HubWriteBuffer(hass, self)
+
+    @property
+    def devices(self) -> list[DeviceRecord]:
+        """Return the stored device records. The list must not be modified."""
+        return self._devices
+
+    @devices.setter
+    def devices(self, devices: Iterable[Mapping[str, Any]]) -> None:
+        """Replace the stored devices and their name index.
+
+        The store keeps its own list, converting plain dictionaries to
+        records, so callers may keep editing the list they passed in. The
+        name index and the selector options are only rebuilt when a device
+        was added, renamed or removed.
+        """
+        self._devices = devices = as_records(devices)
+        self.changed_ids = None
+        self.device_positions = {device["id"]: position for position, device in enumerate(devices)}
+        device_labels = {device["id"]: device.get(CONF_NAME, "") for device in devices}
+        if device_labels != self._device_labels:
+            self._device_labels = device_labels
+            self.name_index = build_name_index(devices)
+            self._option_keys = None
+
+    def device(self, device_id: str) -> DeviceRecord | None:
+        """Return the stored record of a device, or None when it is not stored."""
+        position = self.device_positions.get(device_id)
+        return None if position is None else self._devices[position]
+
+    def name_taken(self, name: str, excluded_id: str | None = None) -> bool:
+        """Return True when another device of the hub already uses the name."""
+        return self.name_index.get(normalize_name(name), excluded_id) != excluded_id
+
+    def device_options(
+        self, prefix: str = "", limit: int | None = None
+    ) -> tuple[list[dict[str, str]], int]:
+        """Return the sorted device selector options and the match count.
+
+        Only devices whose name starts with the prefix, ignoring case, are
+        returned, at most ``limit`` of them.
+        """
+        if self._option_keys is None:
+            sorted_labels = sorted(
+                self._device_labels.items(),
+                key=lambda item: (item[1].casefold(), item[0]),
+            )
+            self._option_keys = [label.casefold() for _device_id, label in sorted_labels]
+            self._options = [
+                {"value": device_id, "label": label} for device_id, label in sorted_labels
+            ]
+
+        prefix = prefix.strip().casefold()
+        start = bisect_left(self._option_keys, prefix)
+        end = (
+            bisect_left(self._option_keys, f"{prefix}{_MAX_CHAR}", start)
+            if prefix
+            else len(self._option_keys)
+        )
+        stop = end if limit is None else min(end, start + limit)
+        return self._options[start:stop], end - start
+
+    async def async_load(self) -> None:
+        """Load the stored devices."""
+        data = await self._store.async_load()
+        self.devices = data.get("devices", []) if data else []
+
+    async def async_save(self) -> None:
+        """Write the devices to disk right away."""
+        await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        """Remove the storage file."""
+        await self._store.async_remove()
+
+    @callback
+    def async_set_devices(self, devices: Iterable[Mapping[str, Any]]) -> None:
+        """Replace the devices, schedule a delayed save and notify listeners."""
+        self.devices = devices
+        self._async_devices_changed()
+
+    @callback
+    def async_replace_devices(self, records: Iterable[DeviceRecord]) -> None:
+        """Replace single stored devices by their updated records.
+
+        Each record takes the position of the stored device with its ID, and
+        the name index and selector labels are only updated for renamed
+        devices. Records of devices that are no longer stored are ignored.
+        """
+        devices = list(self._devices)
+        changed_ids = set()
+        for record in records:
+            device_id = record["id"]
+            position = self.device_positions.get(device_id)
+            if position is None or devices[position] is record:
+                continue
+            previous_name = devices[position].get(CONF_NAME, "")
+            devices[position] = record
+            changed_ids.add(device_id)
+            name = record.get(CONF_NAME, "")
+            if name == previous_name:
+                continue
+            previous_key = normalize_name(previous_name)
+            if self.name_index.get(previous_key) == device_id:
+                del self.name_index[previous_key]
+            self.name_index[normalize_name(name)] = device_id
+            self._device_labels[device_id] = name
+            self._option_keys = None
+
+        if not changed_ids:
+            return
+        self._devices = devices
+        self.changed_ids = frozenset(changed_ids)
+        self._async_devices_changed()
+
+    @callback
+    def _async_devices_changed(self) -> None:
+        """Schedule a delayed save and notify listeners."""
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        for listener in list(self._listeners):
+            listener()
+
+    @callback
+    def async_add_listener(self, listener: Callable[[], None]) -> CALLBACK_TYPE:
+        """Listen for device changes and return a callback to stop listening."""
+        self._listeners.append(listener)
+
+        @callback
+        def async_remove_listener() -> None:
+            """Stop listening for device changes."""
+            self._listeners.remove(listener)
+
+        return async_remove_listener
+
+    @callback
+    def _data_to_save(self) -> dict:
+        """Return the data to persist."""
+        return {"devices": [device.as_dict() for device in self.devices]}
+
+
+class HubWriteBuffer:
+    """Collect device changes made by event handlers and apply them together.
+
+    Handlers queue mutations of one device instead of replacing the devices
+    right away. Once the debounce window closes, the queued mutations are
+    applied in one pass, finding each device through the store's position
+    map, and only the changed records are handed to the store. A burst of
+    registry events results in one store update and one reconcile of the
+    hub, which both touch the changed devices alone.
+    """
+
+    def __init__(self, hass: HomeAssistant, hub_store: HubStore) -> None:
+        """Initialize the write buffer."""
+        self._hub_store = hub_store
+        self._mutations: dict[str, list[DeviceMutation]] = {}
+        self._pending = 0
+        self._debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=WRITE_BACK_DELAY,
+            immediate=False,
+            function=self.async_flush,
+        )
+        self.flushes = 0
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        """Return the number of queued mutations."""
+        return self._pending
+
+    @callback
+    def async_add(self, device_id: str, mutation: DeviceMutation) -> None:
+        """Queue a mutation of one device.
+
+        The mutation returns the updated record, or the record it was given
+        when there is nothing to change.
+        """
+        self._mutations.setdefault(device_id, []).append(mutation)
+        self._pending += 1
+        self._debouncer.async_schedule_call()
+
+    @callback
+    def async_flush(self) -> None:
+        """Apply the queued mutations now and save the devices once.
+
+        Mutations that no longer change anything, for example because the
+        options flow already removed the device, are counted as dropped.
+        """
+        self._debouncer.async_cancel()
+        if not self._mutations:
+            return
+
+        mutations, self._mutations, self._pending = self._mutations, {}, 0
+        updated_devices = []
+        for device_id, device_mutations in mutations.items():
+            stored_device = device = self._hub_store.device(device_id)
+            if device is None:
+                self.dropped += len(device_mutations)
+                continue
+            for mutation in device_mutations:
+                updated_device = mutation(device)
+                if updated_device is device:
+                    self.dropped += 1
+                device = updated_device
+            if device is not stored_device:
+                updated_devices.append(device)
+
+        if updated_devices:
+            self.flushes += 1
+            self._hub_store.async_replace_devices(updated_devices)
+
+
+def storage_key(entry: ConfigEntry) -> str:
+    """Return the storage key that holds the devices of an entry."""
+    return entry.data.get(CONF_STORAGE_KEY) or f"{DOMAIN}.{entry.entry_id}"
+
+
+def entry_storage_data(entry: ConfigEntry) -> dict:
+    """Return the config entry data pointing at the hub store."""
+    return {CONF_STORAGE_KEY: storage_key(entry), CONF_STORAGE_VERSION: STORAGE_VERSION}
+
+
+@callback
+def is_yaml_managed(entry: ConfigEntry) -> bool:
+    """Return True when the hub is declared in YAML."""
+    return CONF_YAML_KEY in entry.data
+
+
+async def async_get_hub_store(hass: HomeAssistant, entry: ConfigEntry) -> HubStore:
+    """Return the loaded store of a hub, loading it on first use."""
+    stores: dict[str, HubStore] = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_STORES, {})
+    if (hub_store := stores.get(entry.entry_id)) is None:
+        hub_store = HubStore(hass, storage_key(entry))
+        await hub_store.async_load()
+        hub_store = stores.setdefault(entry.entry_id, hub_store)
+    return hub_store
+
+
+async def async_remove_hub_store(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Forget the store of a removed hub and delete its file."""
+    stores: dict[str, HubStore] = hass.data.get(DOMAIN, {}).get(DATA_STORES, {})
+    hub_store = stores.pop(entry.entry_id, None) or HubStore(hass, storage_key(entry))
+    await hub_store.async_remove()
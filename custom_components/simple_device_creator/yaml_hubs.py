@@ -0,0 +1,140 @@
+"""Hubs declared in YAML for Simple Device Creator."""
+
+import logging
+
+import voluptuous as vol
+from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry
+from homeassistant.const import SERVICE_RELOAD
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.reload import async_integration_yaml_config
+from homeassistant.helpers.service import async_register_admin_service
+
+from .const import (
+    CONF_ENTRY_TITLE,
+    CONF_HUBS,
+    CONF_NAME,
+    CONF_YAML_KEY,
+    DOMAIN,
+    YAML_UNIQUE_ID_PREFIX,
+)
+from .metrics import async_update_entry
+from .services import FORMAT_YAML, IMPORT_MODE_SYNC, async_import_devices
+from .storage import is_yaml_managed, normalize_name
+
+_LOGGER = logging.getLogger(__name__)
+
+CONF_DEVICES = "devices"
+
+
+def _unique_hub_names(hubs: list[dict]) -> list[dict]:
+    """Reject two hubs whose names only differ in case or spacing."""
+    names = [normalize_name(hub[CONF_NAME]) for hub in hubs]
+    if len(set(names)) != len(names):
+        raise vol.Invalid("hub names must be unique")
+    return hubs
+
+
+HUB_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_NAME): vol.All(cv.string, vol.Length(min=1)),
+        vol.Optional(CONF_DEVICES, default=list): vol.All(cv.ensure_list, [dict]),
+    }
+)
+
+YAML_CONFIG_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_HUBS, default=list): vol.All(
+            cv.ensure_list, [HUB_SCHEMA], _unique_hub_names
+        ),
+    }
+)
+
+
+@callback
+def _released_yaml_key(entry: ConfigEntry) -> str | None:
+    """Return the YAML key of a hub created from YAML and later handed over to the UI."""
+    if entry.unique_id is None or not entry.unique_id.startswith(YAML_UNIQUE_ID_PREFIX):
+        return None
+    return entry.unique_id.removeprefix(YAML_UNIQUE_ID_PREFIX)
+
+
+async def async_apply_yaml_hubs(hass: HomeAssistant, yaml_config: dict) -> None:
+    """Bring the YAML-declared hubs in line with the configuration.
+
+    Hubs already created from YAML receive a sync import of their devices, so
+    only the devices that differ are written. New hubs are created through the
+    import step of the config flow. Hubs that were removed from YAML are kept
+    and handed over to the UI, and are taken back from the UI when they are
+    declared again.
+    """
+    hubs = {normalize_name(hub[CONF_NAME]): hub for hub in yaml_config.get(CONF_HUBS, [])}
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if is_yaml_managed(entry):
+            yaml_key = entry.data[CONF_YAML_KEY]
+        elif (yaml_key := _released_yaml_key(entry)) in hubs:
+            _LOGGER.info(
+                "Hub %s is declared in YAML again and can no longer be edited in the UI",
+                entry.title,
+            )
+            async_update_entry(hass, entry, data={**entry.data, CONF_YAML_KEY: yaml_key})
+        else:
+            continue
+        hub = hubs.pop(yaml_key, None)
+        if hub is None:
+            _LOGGER.info(
+                "Hub %s is no longer declared in YAML and can be edited in the UI", entry.title
+            )
+            async_update_entry(
+                hass,
+                entry,
+                data={key: value for key, value in entry.data.items() if key != CONF_YAML_KEY},
+            )
+            continue
+        if entry.title != hub[CONF_NAME]:
+            async_update_entry(hass, entry, title=hub[CONF_NAME])
+        await _async_sync_hub(hass, entry, hub)
+
+    for yaml_key, hub in hubs.items():
+        # Config entries cannot be set up while the integration itself is.
+        hass.async_create_task(_async_create_hub(hass, yaml_key, hub))
+
+
+async def _async_create_hub(hass: HomeAssistant, yaml_key: str, hub: dict) -> None:
+    """Create the config entry of a new YAML hub and import its devices."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN,
+        context={"source": SOURCE_IMPORT},
+        data={CONF_YAML_KEY: yaml_key, CONF_ENTRY_TITLE: hub[CONF_NAME]},
+    )
+    if result["type"] == FlowResultType.CREATE_ENTRY:
+        await _async_sync_hub(hass, result["result"], hub)
+
+
+async def _async_sync_hub(hass: HomeAssistant, entry: ConfigEntry, hub: dict) -> None:
+    """Apply the YAML devices of a hub, changing only what differs."""
+    try:
+        result = await async_import_devices(
+            hass, entry, hub[CONF_DEVICES], FORMAT_YAML, False, IMPORT_MODE_SYNC
+        )
+    except HomeAssistantError as err:
+        _LOGGER.error("Could not apply the YAML devices of hub %s: %s", entry.title, err)
+        return
+    for error in result["errors"]:
+        _LOGGER.warning("Skipped a YAML device of hub %s: %s", entry.title, error)
+
+
+@callback
+def async_setup_reload_service(hass: HomeAssistant) -> None:
+    """Register the service that re-reads the YAML hubs."""
+
+    async def async_reload(call: ServiceCall) -> None:
+        """Re-read configuration.yaml and apply the hub changes."""
+        config = await async_integration_yaml_config(hass, DOMAIN)
+        if config is None:
+            return
+        await async_apply_yaml_hubs(hass, config.get(DOMAIN, {}))
+
+    async_register_admin_service(hass, DOMAIN, SERVICE_RELOAD, async_reload)
@@ -0,0 +1,70 @@
+"""Fixtures for the benchmark suite."""
+
+from contextlib import contextmanager
+import json
+import platform
+import time
+
+from homeassistant.const import __version__ as HA_VERSION
+import pytest
+
+BENCHMARK_SCALES = (100, 1_000, 10_000)
+
+
+class BenchmarkRecorder:
+    """Collect benchmark timings for the results file."""
+
+    def __init__(self) -> None:
+        """Initialize the recorder."""
+        self.results: list[dict] = []
+
+    @contextmanager
+    def measure(self, name: str, device_count: int, operations: int = 1):
+        """Time the wrapped block and record it under the given name."""
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        self.results.append(
+            {
+                "name": name,
+                "devices": device_count,
+                "operations": operations,
+                "seconds": round(elapsed, 6),
+                "seconds_per_operation": round(elapsed / operations, 9),
+            }
+        )
+
+    def record_memory(self, name: str, device_count: int, size: int) -> None:
+        """Record the memory retained by a structure under the given name."""
+        self.results.append({"name": name, "devices": device_count, "bytes": size})
+
+    def as_dict(self) -> dict:
+        """Return the results in their machine-readable form."""
+        return {
+            "homeassistant": HA_VERSION,
+            "python": platform.python_version(),
+            "results": sorted(self.results, key=lambda result: (result["name"], result["devices"])),
+        }
+
+
+@pytest.fixture(autouse=True)
+def require_benchmark_option(request):
+    """Skip the benchmarks unless they were requested."""
+    if not request.config.getoption("--benchmark"):
+        pytest.skip("benchmarks only run with --benchmark")
+
+
+@pytest.fixture(scope="session")
+def benchmark_recorder(request):
+    """Record timings for the whole session and write them to the results file."""
+    recorder = BenchmarkRecorder()
+    yield recorder
+    if recorder.results:
+        with open(request.config.getoption("--benchmark-output"), "w", encoding="utf-8") as file:
+            json.dump(recorder.as_dict(), file, indent=2)
+
+
+@pytest.fixture
+def hass(registry_hass):
+    """Run the benchmarks against real device and entity registries."""
+    return registry_hass
@@ -0,0 +1,238 @@
+"""Benchmark the integration against real registries at several hub sizes."""
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.simple_device_creator import async_migrate_entry, async_reload_entry
+from custom_components.simple_device_creator.config_flow import (
+    CONF_CONFIRM_DELETE,
+    CONF_DEVICE_ID,
+    CONF_ENTITY_ID,
+    CONF_SEARCH,
+    CONF_TARGET_ENTRY_ID,
+    SimpleDeviceCreatorOptionsFlow,
+)
+from custom_components.simple_device_creator.const import (
+    CONF_ENTITY_IDS,
+    CONF_HW_VERSION,
+    CONF_MANUFACTURER,
+    CONF_MODEL,
+    CONF_NAME,
+    CONF_SW_VERSION,
+    DATA_STORES,
+    DOMAIN,
+)
+from custom_components.simple_device_creator.storage import DeviceRecord, entry_storage_data
+
+from .conftest import BENCHMARK_SCALES
+
+pytestmark = [pytest.mark.asyncio, pytest.mark.parametrize("device_count", BENCHMARK_SCALES)]
+
+
+def _build_devices(hass: HomeAssistant, device_count: int) -> list[dict]:
+    """Register one linked entity per device plus some orphans, and return the devices."""
+    entity_reg = er.async_get(hass)
+    devices = []
+    for index in range(device_count):
+        entity_entry = entity_reg.async_get_or_create(
+            "sensor", "benchmark", f"linked-{index}", suggested_object_id=f"linked_{index}"
+        )
+        devices.append(
+            {
+                "id": f"device-{index}",
+                CONF_NAME: f"Device {index}",
+                CONF_MANUFACTURER: f"Maker {index % 10}",
+                CONF_MODEL: f"Model {index % 25}",
+                CONF_SW_VERSION: "1.0",
+                CONF_ENTITY_IDS: [entity_entry.entity_id],
+            }
+        )
+    for index in range(max(device_count // 10, 1)):
+        entity_reg.async_get_or_create(
+            "sensor", "benchmark", f"orphan-{index}", suggested_object_id=f"orphan_{index}"
+        )
+    return devices
+
+
+def _device_input(name: str) -> dict:
+    """Return the device form input as validated by the flow schema."""
+    return {
+        CONF_NAME: name,
+        CONF_MANUFACTURER: "Maker",
+        CONF_MODEL: "Model",
+        CONF_SW_VERSION: "1.0",
+        CONF_HW_VERSION: "1.0",
+    }
+
+
+async def _async_setup_hub(hass: HomeAssistant, hub_storage: dict, devices: list[dict], title="General"):
+    """Add a hub whose devices are already in its store and set it up."""
+    entry = MockConfigEntry(domain=DOMAIN, title=title, version=3)
+    entry.add_to_hass(hass)
+    hass.config_entries.async_update_entry(entry, data=entry_storage_data(entry))
+    hub_storage[f"{DOMAIN}.{entry.entry_id}"] = {"devices": devices}
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
+
+
+async def _async_options_flow(hass: HomeAssistant, entry) -> SimpleDeviceCreatorOptionsFlow:
+    """Return an options flow that has loaded the hub devices."""
+    flow = SimpleDeviceCreatorOptionsFlow(entry)
+    flow.hass = hass
+    await flow.async_step_init()
+    return flow
+
+
+async def test_benchmark_setup_and_reload(hass, hub_storage, benchmark_recorder, device_count):
+    """Time the first setup, a full reload and the update listener paths."""
+    devices = _build_devices(hass, device_count)
+    entry = MockConfigEntry(domain=DOMAIN, version=3)
+    entry.add_to_hass(hass)
+    hass.config_entries.async_update_entry(entry, data=entry_storage_data(entry))
+    hub_storage[f"{DOMAIN}.{entry.entry_id}"] = {"devices": devices}
+
+    with benchmark_recorder.measure("setup_entry_cold", device_count):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    with benchmark_recorder.measure("setup_entry_reload", device_count):
+        assert await hass.config_entries.async_reload(entry.entry_id)
+        await hass.async_block_till_done()
+    assert entry.state is ConfigEntryState.LOADED
+
+    hass.config_entries.async_update_entry(entry, title="Renamed")
+    with benchmark_recorder.measure("reload_entry_title_only", device_count):
+        await async_reload_entry(hass, entry)
+
+    hub_store = hass.data[DOMAIN][DATA_STORES][entry.entry_id]
+    updated_devices = list(hub_store.devices)
+    updated_devices[0] = {**updated_devices[0], CONF_SW_VERSION: "2.0"}
+    with benchmark_recorder.measure("reconcile_one_changed_device", device_count):
+        hub_store.async_set_devices(updated_devices)
+        await hass.async_block_till_done()
+
+    replaced_device = DeviceRecord.from_dict({**hub_store.devices[1], CONF_SW_VERSION: "2.0"})
+    with benchmark_recorder.measure("reconcile_one_replaced_device", device_count):
+        hub_store.async_replace_devices([replaced_device])
+        await hass.async_block_till_done()
+
+
+async def test_benchmark_migrate_entry(hass, hub_storage, benchmark_recorder, device_count):
+    """Time moving the devices of a version 2 hub into its store."""
+    devices = _build_devices(hass, device_count)
+    entry = MockConfigEntry(domain=DOMAIN, version=2, data={"devices": devices})
+    entry.add_to_hass(hass)
+
+    with benchmark_recorder.measure("migrate_entry", device_count):
+        assert await async_migrate_entry(hass, entry)
+
+    assert len(hub_storage[f"{DOMAIN}.{entry.entry_id}"]["devices"]) == device_count
+
+
+async def test_benchmark_event_handlers(hass, hub_storage, benchmark_recorder, device_count):
+    """Time the registry event handlers and the write-back they queue."""
+    devices = _build_devices(hass, device_count)
+    entry = await _async_setup_hub(hass, hub_storage, devices)
+    device_reg = dr.async_get(hass)
+    entity_reg = er.async_get(hass)
+    registry_device = device_reg.async_get_device(identifiers={(DOMAIN, "device-0")})
+    hub_store = hass.data[DOMAIN][DATA_STORES][entry.entry_id]
+
+    with benchmark_recorder.measure("device_rename_event", device_count):
+        device_reg.async_update_device(registry_device.id, name_by_user="Renamed Device")
+        await hass.async_block_till_done()
+
+    removed_entity_ids = [device[CONF_ENTITY_IDS][0] for device in devices[1 : device_count // 10 + 1]]
+    with benchmark_recorder.measure(
+        "entity_remove_events", device_count, operations=len(removed_entity_ids)
+    ):
+        for entity_id in removed_entity_ids:
+            entity_reg.async_remove(entity_id)
+        await hass.async_block_till_done()
+
+    relinked_entity_id = devices[-1][CONF_ENTITY_IDS][0]
+    with benchmark_recorder.measure("entity_relink_event", device_count):
+        entity_reg.async_update_entity(relinked_entity_id, device_id=None)
+        await hass.async_block_till_done()
+
+    with benchmark_recorder.measure("write_back_flush", device_count):
+        hub_store.write_buffer.async_flush()
+        await hass.async_block_till_done()
+
+    assert hub_store.devices[0][CONF_NAME] == "Renamed Device"
+    renamed_device = device_reg.async_get(registry_device.id)
+    assert (renamed_device.name, renamed_device.name_by_user) == ("Renamed Device", None)
+    assert entity_reg.async_get(relinked_entity_id).device_id is not None
+
+
+async def test_benchmark_options_flow_steps(hass, hub_storage, benchmark_recorder, device_count):
+    """Time each options-flow step on a loaded hub."""
+    devices = _build_devices(hass, device_count)
+    entry = await _async_setup_hub(hass, hub_storage, devices)
+    await _async_setup_hub(hass, hub_storage, [], title="Target")
+
+    flow = SimpleDeviceCreatorOptionsFlow(entry)
+    flow.hass = hass
+    with benchmark_recorder.measure("flow_init", device_count):
+        result = await flow.async_step_init()
+    assert result["type"] == "menu"
+
+    with benchmark_recorder.measure("flow_add_device", device_count):
+        result = await flow.async_step_add_device(_device_input("Benchmark Device"))
+        await hass.async_block_till_done()
+    assert result["type"] == "create_entry"
+
+    flow = await _async_options_flow(hass, entry)
+    with benchmark_recorder.measure("flow_select_device_form", device_count):
+        result = await flow.async_step_edit_device()
+    assert result["step_id"] == "select_device"
+
+    with benchmark_recorder.measure("flow_edit_device", device_count):
+        await flow.async_step_select_device({CONF_DEVICE_ID: "device-1"})
+        result = await flow.async_step_edit_device(_device_input("Edited Device"))
+        await hass.async_block_till_done()
+    assert result["type"] == "create_entry"
+
+    flow = await _async_options_flow(hass, entry)
+    flow._pending_action = "add_orphan_entity"
+    with benchmark_recorder.measure("flow_add_orphan_entity_form", device_count):
+        result = await flow.async_step_select_device({CONF_DEVICE_ID: "device-2"})
+        if result["step_id"] == "search_orphan_entity":
+            result = await flow.async_step_search_orphan_entity({CONF_SEARCH: "orphan"})
+    assert result["step_id"] == "add_orphan_entity"
+    orphan_page = result["data_schema"].schema[CONF_ENTITY_ID].config["include_entities"]
+
+    with benchmark_recorder.measure("flow_add_orphan_entity", device_count, len(orphan_page)):
+        result = await flow.async_step_add_orphan_entity({CONF_ENTITY_ID: orphan_page})
+        await hass.async_block_till_done()
+    assert result["type"] == "create_entry"
+
+    flow = await _async_options_flow(hass, entry)
+    flow._pending_action = "remove_linked_entity"
+    with benchmark_recorder.measure("flow_remove_linked_entity", device_count):
+        await flow.async_step_select_device({CONF_DEVICE_ID: "device-2"})
+        result = await flow.async_step_remove_linked_entity({CONF_ENTITY_ID: ["sensor.orphan_0"]})
+        await hass.async_block_till_done()
+    assert result["type"] == "create_entry"
+
+    flow = await _async_options_flow(hass, entry)
+    flow._pending_action = "move_device"
+    target_entry_id = flow._available_target_entries()[0].entry_id
+    with benchmark_recorder.measure("flow_move_device", device_count):
+        await flow.async_step_select_device({CONF_DEVICE_ID: "device-3"})
+        result = await flow.async_step_select_target_entry({CONF_TARGET_ENTRY_ID: target_entry_id})
+        await hass.async_block_till_done()
+    assert result["type"] == "create_entry"
+
+    flow = await _async_options_flow(hass, entry)
+    flow._pending_action = "delete_device"
+    with benchmark_recorder.measure("flow_delete_device", device_count):
+        await flow.async_step_select_device({CONF_DEVICE_ID: "device-4"})
+        result = await flow.async_step_delete_device({CONF_CONFIRM_DELETE: True})
+        await hass.async_block_till_done()
+    assert result["type"] == "create_entry"
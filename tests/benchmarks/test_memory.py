@@ -0,0 +1,63 @@
+"""Benchmark the memory held by the stored devices of a large hub."""
+
+import json
+import tracemalloc
+
+import pytest
+
+from custom_components.simple_device_creator.const import (
+    CONF_ENTITY_IDS,
+    CONF_HW_VERSION,
+    CONF_MANUFACTURER,
+    CONF_MODEL,
+    CONF_NAME,
+    CONF_SW_VERSION,
+)
+from custom_components.simple_device_creator.storage import as_records
+
+DEVICE_COUNT = 10_000
+
+
+def _stored_json(device_count: int) -> str:
+    """Return the store file content of a hub with repeated vendor metadata."""
+    return json.dumps(
+        {
+            "devices": [
+                {
+                    "id": f"device-{index:05d}",
+                    CONF_NAME: f"Device {index}",
+                    CONF_MANUFACTURER: f"Maker {index % 10}",
+                    CONF_MODEL: f"Model {index % 25}",
+                    CONF_SW_VERSION: "1.0.4",
+                    CONF_HW_VERSION: "rev-a",
+                    CONF_ENTITY_IDS: [f"sensor.device_{index}"],
+                }
+                for index in range(device_count)
+            ]
+        }
+    )
+
+
+def _retained_size(build) -> tuple[object, int]:
+    """Return the built structure and the memory it still holds once built."""
+    tracemalloc.start()
+    try:
+        structure = build()
+        size, _peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return structure, size
+
+
+@pytest.mark.parametrize("device_count", [DEVICE_COUNT])
+def test_benchmark_device_record_memory(benchmark_recorder, device_count):
+    """Compare loaded device dictionaries with interned device records."""
+    stored_json = _stored_json(device_count)
+
+    devices, dict_size = _retained_size(lambda: json.loads(stored_json)["devices"])
+    records, record_size = _retained_size(lambda: as_records(json.loads(stored_json)["devices"]))
+
+    benchmark_recorder.record_memory("memory_device_dicts", device_count, dict_size)
+    benchmark_recorder.record_memory("memory_device_records", device_count, record_size)
+    assert [record.as_dict() for record in records] == devices
+    assert record_size < dict_size
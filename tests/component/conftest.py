@@ -0,0 +1,9 @@
+"""Fixtures for the component tests."""
+
+import pytest
+
+
+@pytest.fixture
+def hass(registry_hass):
+    """Run the component tests against real device and entity registries."""
+    return registry_hass
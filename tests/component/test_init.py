@@ -1,19 +1,152 @@
 """Test component integration."""
+import dataclasses
+
 import pytest
-from unittest.mock import AsyncMock, MagicMock
+from homeassistant.config_entries import ConfigEntryState
 from homeassistant.core import HomeAssistant
-from custom_components.simple_device_creator import async_setup_entry
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.simple_device_creator.const import (
+    CONF_ENTITY_IDS,
+    CONF_MANUFACTURER,
+    CONF_MODEL,
+    CONF_NAME,
+    DATA_DEVICE_INDEX,
+    DATA_DISPATCHER,
+    DATA_STORES,
+    DOMAIN,
+)
+from custom_components.simple_device_creator.runtime import async_get_hub_runtime
+from custom_components.simple_device_creator.services import (
+    FORMAT_YAML,
+    IMPORT_MODE_SYNC,
+    async_import_devices,
+)
+from custom_components.simple_device_creator.storage import entry_storage_data
 
 
 @pytest.mark.asyncio
-async def test_async_setup_entry(hass: HomeAssistant, enable_custom_integrations):
-    """Test setting up the integration."""
-    # Create a mock config entry
-    config_entry = MagicMock()
-    config_entry.data = {"devices": []}
-    config_entry.entry_id = "test_entry"
-    
-    # Mock the async_forward_entry_setups since we have no platforms
-    hass.config_entries.async_forward_entry_setups = AsyncMock(return_value=None)
-    
-    assert await async_setup_entry(hass, config_entry)
\ No newline at end of file
+async def test_async_setup_entry(hass: HomeAssistant, hub_storage):
+    """Test setting up a hub creates its devices and links its entities in the registries."""
+    entity_reg = er.async_get(hass)
+    entity_entry = entity_reg.async_get_or_create(
+        "switch", "test", "kitchen-plug", suggested_object_id="kitchen_plug"
+    )
+    entry = MockConfigEntry(domain=DOMAIN, title="Kitchen", version=3)
+    entry.add_to_hass(hass)
+    hass.config_entries.async_update_entry(entry, data=entry_storage_data(entry))
+    hub_storage[f"{DOMAIN}.{entry.entry_id}"] = {
+        "devices": [
+            {
+                "id": "device-1",
+                CONF_NAME: "Kitchen Plug",
+                CONF_MANUFACTURER: "Acme",
+                CONF_MODEL: "P1",
+                CONF_ENTITY_IDS: [entity_entry.entity_id],
+            }
+        ]
+    }
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry.state is ConfigEntryState.LOADED
+    device_entry = dr.async_get(hass).async_get_device(identifiers={(DOMAIN, "device-1")})
+    assert device_entry is not None
+    assert device_entry.name == "Kitchen Plug"
+    assert device_entry.manufacturer == "Acme"
+    assert device_entry.model == "P1"
+    assert entry.entry_id in device_entry.config_entries
+    assert entity_reg.async_get(entity_entry.entity_id).device_id == device_entry.id
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert entry.state is ConfigEntryState.NOT_LOADED
+    assert DATA_DEVICE_INDEX not in hass.data[DOMAIN]
+    assert DATA_DISPATCHER not in hass.data[DOMAIN]
+
+
+@pytest.mark.asyncio
+async def test_sync_detaches_entities_dropped_from_the_manifest(hass: HomeAssistant, hub_storage):
+    """Test syncing a manifest without one of a device's links detaches that entity."""
+    entity_reg = er.async_get(hass)
+    kept_entry = entity_reg.async_get_or_create("switch", "test", "plug", suggested_object_id="plug")
+    dropped_entry = entity_reg.async_get_or_create("sensor", "test", "power", suggested_object_id="power")
+    entry = MockConfigEntry(domain=DOMAIN, title="Kitchen", version=3)
+    entry.add_to_hass(hass)
+    hass.config_entries.async_update_entry(entry, data=entry_storage_data(entry))
+    device = {
+        "id": "device-1",
+        CONF_NAME: "Kitchen Plug",
+        CONF_MANUFACTURER: "Acme",
+        CONF_MODEL: "P1",
+        CONF_ENTITY_IDS: [kept_entry.entity_id, dropped_entry.entity_id],
+    }
+    hub_storage[f"{DOMAIN}.{entry.entry_id}"] = {"devices": [device]}
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    device_entry = dr.async_get(hass).async_get_device(identifiers={(DOMAIN, "device-1")})
+    assert entity_reg.async_get(dropped_entry.entity_id).device_id == device_entry.id
+
+    response = await async_import_devices(
+        hass,
+        entry,
+        [
+            {
+                CONF_NAME: "Kitchen Plug",
+                CONF_MANUFACTURER: "Acme",
+                CONF_MODEL: "P1",
+                CONF_ENTITY_IDS: [kept_entry.entity_id],
+            }
+        ],
+        FORMAT_YAML,
+        False,
+        IMPORT_MODE_SYNC,
+    )
+    await hass.async_block_till_done()
+
+    assert response["updated"] == 1
+    assert entity_reg.async_get(kept_entry.entity_id).device_id == device_entry.id
+    assert entity_reg.async_get(dropped_entry.entity_id).device_id is None
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+async def test_replaced_device_reconciles_only_that_device(hass: HomeAssistant, hub_storage):
+    """Test replacing one stored device applies its rename and links without touching the others."""
+    entity_reg = er.async_get(hass)
+    plug_entry = entity_reg.async_get_or_create("switch", "test", "plug", suggested_object_id="plug")
+    lamp_entry = entity_reg.async_get_or_create("light", "test", "lamp", suggested_object_id="lamp")
+    entry = MockConfigEntry(domain=DOMAIN, title="Kitchen", version=3)
+    entry.add_to_hass(hass)
+    hass.config_entries.async_update_entry(entry, data=entry_storage_data(entry))
+    hub_storage[f"{DOMAIN}.{entry.entry_id}"] = {
+        "devices": [
+            {"id": "device-1", CONF_NAME: "Plug", CONF_ENTITY_IDS: [plug_entry.entity_id]},
+            {"id": "device-2", CONF_NAME: "Lamp", CONF_ENTITY_IDS: [lamp_entry.entity_id]},
+        ]
+    }
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    hub_store = hass.data[DOMAIN][DATA_STORES][entry.entry_id]
+    runtime = async_get_hub_runtime(hass, entry.entry_id)
+    lamp_record = hub_store.device("device-2")
+
+    hub_store.async_replace_devices(
+        [dataclasses.replace(hub_store.device("device-1"), name="Socket", entity_ids=())]
+    )
+    await hass.async_block_till_done()
+
+    device_reg = dr.async_get(hass)
+    assert device_reg.async_get_device(identifiers={(DOMAIN, "device-1")}).name == "Socket"
+    assert entity_reg.async_get(plug_entry.entity_id).device_id is None
+    assert runtime.devices[1] is lamp_record
+    assert runtime.linked_entities == {lamp_entry.entity_id: "device-2"}
+    assert hub_store.name_taken("socket")
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
@@ -1,6 +1,29 @@
 """Test configuration and fixtures."""
+import asyncio
+from functools import partial
+
 import pytest
-from unittest.mock import MagicMock
+import pytest_asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+from pytest_homeassistant_custom_component.common import async_test_home_assistant
+
+from custom_components.simple_device_creator.device_index import async_get_device_index
+from custom_components.simple_device_creator.orphans import async_get_orphan_index
+
+
+def pytest_addoption(parser):
+    """Add the options of the benchmark suite."""
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        default=False,
+        help="run the benchmark suite in tests/benchmarks",
+    )
+    parser.addoption(
+        "--benchmark-output",
+        default="benchmark-results.json",
+        help="file the benchmark results are written to",
+    )
 
 
 @pytest.fixture(autouse=True)
@@ -10,7 +33,85 @@ def auto_enable_custom_integrations(enable_custom_integrations, request):
         enable_custom_integrations
 
 
+@pytest.fixture(autouse=True)
+def hub_storage():
+    """Keep hub stores in memory and expose the saved data by storage key."""
+    saved_data = {}
+
+    def _create_store(hass, version, key, **kwargs):
+        store = MagicMock()
+        store.key = key
+
+        async def _async_save(data):
+            saved_data[key] = data
+
+        async def _async_remove():
+            saved_data.pop(key, None)
+
+        store.async_load = AsyncMock(side_effect=lambda: saved_data.get(key))
+        store.async_save = AsyncMock(side_effect=_async_save)
+        store.async_delay_save = MagicMock(
+            side_effect=lambda data_func, delay=0: saved_data.__setitem__(key, data_func())
+        )
+        store.async_remove = AsyncMock(side_effect=_async_remove)
+        return store
+
+    with patch("custom_components.simple_device_creator.storage.Store", side_effect=_create_store):
+        yield saved_data
+
+
+def _build_registry_index(registry_getter, collection, key, async_get_index, entries):
+    """Build a domain-wide index over mock registry entries.
+
+    The registry getter at ``registry_getter`` is patched with a mock registry
+    whose ``collection`` and ``async_get`` expose the entries by their ``key``
+    attribute. Returns the mock Home Assistant instance, the entries by key,
+    and the index.
+    """
+    hass = MagicMock()
+    hass.data = {}
+    registry = MagicMock()
+    entries_by_key = {getattr(entry, key): entry for entry in entries}
+    getattr(registry, collection).values.return_value = list(entries_by_key.values())
+    registry.async_get.side_effect = entries_by_key.get
+    with patch(registry_getter, return_value=registry):
+        index = async_get_index(hass)
+    return hass, entries_by_key, index
+
+
+@pytest.fixture
+def build_device_index():
+    """Return a builder of device ID indexes over mock device registry entries."""
+    return partial(
+        _build_registry_index,
+        "custom_components.simple_device_creator.device_index.dr.async_get",
+        "devices",
+        "id",
+        async_get_device_index,
+    )
+
+
+@pytest.fixture
+def build_orphan_index():
+    """Return a builder of orphan indexes over mock entity registry entries."""
+    return partial(
+        _build_registry_index,
+        "custom_components.simple_device_creator.orphans.er.async_get",
+        "entities",
+        "entity_id",
+        async_get_orphan_index,
+    )
+
+
 @pytest.fixture
 def hass():
     """Mock Home Assistant instance for unit tests."""
-    return MagicMock()
\ No newline at end of file
+    return MagicMock()
+
+
+@pytest_asyncio.fixture
+async def registry_hass():
+    """Return a Home Assistant instance with real device and entity registries."""
+    async with async_test_home_assistant(asyncio.get_running_loop()) as hass:
+        yield hass
+        await hass.async_stop(force=True)
@@ -1,18 +1,28 @@
 """Test config and options flows."""
 
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, call, patch
 
 import pytest
+from homeassistant.data_entry_flow import AbortFlow
 from homeassistant.helpers import selector
 
 from custom_components.simple_device_creator.config_flow import (
     CONF_CONFIRM_DELETE,
+    CONF_DETACH_ALL,
     CONF_DEVICE_ID,
     CONF_ENTITY_ID,
+    CONF_NEXT_PAGE,
+    CONF_SEARCH,
+    CONF_SEARCH_DOMAIN,
     CONF_TARGET_ENTRY_ID,
+    DEVICE_OPTION_LIMIT,
     SimpleDeviceCreatorConfigFlow,
     SimpleDeviceCreatorOptionsFlow,
 )
+from custom_components.simple_device_creator.metrics import async_get_hub_metrics
+from custom_components.simple_device_creator.orphans import ORPHAN_PAGE_SIZE
+from custom_components.simple_device_creator.runtime import HubRuntime
+from custom_components.simple_device_creator.storage import DeviceRecord, HubStore
 from custom_components.simple_device_creator.const import (
     CONF_ENTITY_IDS,
     CONF_ENTRY_TITLE,
@@ -21,13 +31,22 @@ from custom_components.simple_device_creator.const import (
     CONF_MODEL,
     CONF_NAME,
     CONF_SW_VERSION,
+    CONF_YAML_KEY,
     DEFAULT_ENTRY_TITLE,
+    DATA_STORES,
     DOMAIN,
     MENU_ADD_ORPHAN_ENTITY,
     MENU_REMOVE_LINKED_ENTITY,
 )
 
 
+def _index_registry_device(registry, registry_device, device_id):
+    """Make a mock device registry hold the registry device of a hub device."""
+    registry_device.identifiers = {(DOMAIN, device_id)}
+    registry.devices.values.return_value = [registry_device]
+    registry.async_get.side_effect = {registry_device.id: registry_device}.get
+
+
 class TestSimpleDeviceCreatorConfigFlow:
     """Test the config flow."""
 
@@ -116,6 +135,27 @@ class TestSimpleDeviceCreatorConfigFlow:
         assert result["title"] == "Kitchen"
         assert result["data"]["devices"] == []
 
+    @pytest.mark.asyncio
+    async def test_step_import_creates_yaml_hub_once(self):
+        """Test the import step creates a marked hub without devices and aborts on repeats."""
+        flow = SimpleDeviceCreatorConfigFlow()
+        flow.hass = MagicMock()
+        flow.context = {"source": "import"}
+        flow.hass.config_entries.async_entry_for_domain_unique_id.return_value = None
+        import_data = {CONF_YAML_KEY: "kitchen", CONF_ENTRY_TITLE: "Kitchen"}
+
+        result = await flow.async_step_import(import_data)
+
+        assert result["type"] == "create_entry"
+        assert result["title"] == "Kitchen"
+        assert result["data"] == {CONF_YAML_KEY: "kitchen"}
+        assert flow.unique_id == "yaml_kitchen"
+
+        flow.hass.config_entries.async_entry_for_domain_unique_id.return_value = MagicMock()
+
+        with pytest.raises(AbortFlow, match="already_configured"):
+            await flow.async_step_import(import_data)
+
     def test_async_get_options_flow(self):
         """Test get options flow."""
         config_entry = MagicMock()
@@ -130,13 +170,28 @@ class TestSimpleDeviceCreatorOptionsFlow:
         config_entry = MagicMock()
         config_entry.entry_id = f"entry-{title}"
         config_entry.title = title
-        config_entry.data = {"devices": devices or []}
+        config_entry.data = {}
         flow = SimpleDeviceCreatorOptionsFlow(config_entry)
         flow.hass = MagicMock()
+        flow.hass.data = {}
         flow.hass.config_entries.async_entries.return_value = [config_entry]
         flow.hass.states.get.return_value = None
+        flow._hub_store = self._add_hub_store(flow, config_entry, devices or [])
+        flow.devices = list(flow._hub_store.devices)
         return flow, config_entry
 
+    def _add_hub_store(self, flow, config_entry, devices):
+        """Preload the store of a hub with the given devices."""
+        hub_store = HubStore(flow.hass, f"{DOMAIN}.{config_entry.entry_id}")
+        hub_store.devices = devices
+        stores = flow.hass.data.setdefault(DOMAIN, {}).setdefault(DATA_STORES, {})
+        stores[config_entry.entry_id] = hub_store
+        return hub_store
+
+    def _stored_devices(self, flow, config_entry):
+        """Return the devices saved in the store of a hub."""
+        return flow.hass.data[DOMAIN][DATA_STORES][config_entry.entry_id].devices
+
     @pytest.mark.asyncio
     async def test_step_init_shows_menu(self):
         """Test init step shows the options menu."""
@@ -163,6 +218,38 @@ class TestSimpleDeviceCreatorOptionsFlow:
             "finish",
         ]
 
+    @pytest.mark.asyncio
+    async def test_step_init_aborts_for_yaml_hubs(self):
+        """Test hubs declared in YAML cannot be edited in the options flow."""
+        flow, config_entry = self._build_flow(devices=[{"id": "dev-1", CONF_NAME: "Device 1"}])
+        config_entry.data = {CONF_YAML_KEY: "general"}
+
+        result = await flow.async_step_init()
+
+        assert result["type"] == "abort"
+        assert result["reason"] == "yaml_managed"
+
+    @pytest.mark.asyncio
+    async def test_step_init_loads_devices_from_hub_store(self):
+        """Test the options flow edits its own device list that shares the stored records."""
+        config_entry = MagicMock()
+        config_entry.entry_id = "entry-General"
+        config_entry.data = {}
+        flow = SimpleDeviceCreatorOptionsFlow(config_entry)
+        flow.hass = MagicMock()
+        flow.hass.data = {}
+        flow.hass.config_entries.async_entries.return_value = [config_entry]
+        hub_store = self._add_hub_store(flow, config_entry, [{"id": "dev-1", CONF_NAME: "Device 1"}])
+
+        with patch("custom_components.simple_device_creator.config_flow.er.async_get") as mock_er_get:
+            mock_er_get.return_value.entities.values.return_value = []
+            result = await flow.async_step_init()
+
+        assert "edit_device" in result["menu_options"]
+        assert [device[CONF_NAME] for device in flow.devices] == ["Device 1"]
+        assert flow.devices is not hub_store.devices
+        assert flow.devices[0] is hub_store.devices[0]
+
     @pytest.mark.asyncio
     async def test_step_init_includes_move_when_other_hub_exists(self):
         """Test init step includes move when another hub exists."""
@@ -170,7 +257,8 @@ class TestSimpleDeviceCreatorOptionsFlow:
         other_entry = MagicMock()
         other_entry.entry_id = "entry-other"
         other_entry.title = "Other"
-        other_entry.data = {"devices": []}
+        other_entry.data = {}
+        self._add_hub_store(flow, other_entry, [])
         flow.hass.config_entries.async_entries.return_value = [config_entry, other_entry]
 
         with patch("custom_components.simple_device_creator.config_flow.er.async_get") as mock_er_get:
@@ -223,8 +311,8 @@ class TestSimpleDeviceCreatorOptionsFlow:
         assert result["step_id"] == "rename_entry"
 
     @pytest.mark.asyncio
-    async def test_add_device_updates_entry_data(self):
-        """Test adding a device updates config entry data."""
+    async def test_add_device_updates_hub_store(self):
+        """Test adding a device saves it to the hub store."""
         flow, config_entry = self._build_flow(title="Kitchen")
 
         result = await flow.async_step_add_device(
@@ -238,9 +326,8 @@ class TestSimpleDeviceCreatorOptionsFlow:
         )
 
         assert result["type"] == "create_entry"
-        call_kwargs = flow.hass.config_entries.async_update_entry.call_args.kwargs
-        assert call_kwargs["data"]["devices"][0][CONF_NAME] == "Sensor"
-        assert config_entry.data == {"devices": []}
+        assert self._stored_devices(flow, config_entry)[0][CONF_NAME] == "Sensor"
+        flow.hass.config_entries.async_update_entry.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_add_device_shows_form_and_rejects_duplicate(self):
@@ -338,6 +425,32 @@ class TestSimpleDeviceCreatorOptionsFlow:
             {"value": "dev-3", "label": "zeta"},
         ]
 
+    @pytest.mark.asyncio
+    async def test_select_device_filters_large_hubs_by_name_prefix(self):
+        """Test large hubs get a bounded option list and a name-prefix search."""
+        flow, _config_entry = self._build_flow(
+            devices=[
+                {"id": f"dev-{index:04d}", CONF_NAME: f"Device {index:04d}"}
+                for index in range(DEVICE_OPTION_LIMIT * 2)
+            ]
+            + [{"id": "dev-plug", CONF_NAME: "Kitchen Plug"}]
+        )
+
+        result = await flow.async_step_select_device()
+
+        assert len(result["data_schema"].schema[CONF_DEVICE_ID].config["options"]) == DEVICE_OPTION_LIMIT
+        assert result["description_placeholders"]["total"] == str(DEVICE_OPTION_LIMIT * 2 + 1)
+
+        result = await flow.async_step_select_device({CONF_SEARCH: " kitch"})
+
+        assert result["data_schema"].schema[CONF_DEVICE_ID].config["options"] == [
+            {"value": "dev-plug", "label": "Kitchen Plug"}
+        ]
+
+        result = await flow.async_step_select_device({CONF_SEARCH: "attic"})
+
+        assert result["errors"] == {"base": "no_matching_devices"}
+
     @pytest.mark.asyncio
     async def test_select_device_routes_to_edit_and_delete(self):
         """Test select device routes to the pending action."""
@@ -351,8 +464,14 @@ class TestSimpleDeviceCreatorOptionsFlow:
         flow._pending_action = "edit_device"
         with patch("custom_components.simple_device_creator.config_flow.dr.async_get") as mock_dr_get:
             mock_registry = MagicMock()
+            registry_device = MagicMock()
+            registry_device.id = "registry-id"
+            registry_device.name_by_user = None
+            registry_device.name = "Device 1"
+            registry_device.manufacturer = "A"
+            registry_device.model = "M1"
+            _index_registry_device(mock_registry, registry_device, "dev-1")
             mock_dr_get.return_value = mock_registry
-            mock_registry.async_get_device.return_value = None
             edit_result = await flow.async_step_select_device({CONF_DEVICE_ID: "dev-1"})
 
         assert edit_result["type"] == "form"
@@ -376,7 +495,7 @@ class TestSimpleDeviceCreatorOptionsFlow:
             mock_device_registry = MagicMock()
             registry_device = MagicMock()
             registry_device.id = "registry-id"
-            mock_device_registry.async_get_device.return_value = registry_device
+            _index_registry_device(mock_device_registry, registry_device, "dev-1")
             mock_dr_get.return_value = mock_device_registry
             mock_entity_registry = MagicMock()
             mock_entity_registry.entities.values.return_value = [orphan_entity]
@@ -390,7 +509,7 @@ class TestSimpleDeviceCreatorOptionsFlow:
         linked_entity.entity_id = "sensor.linked"
         linked_entity.name = "Linked Sensor"
         linked_entity.original_name = "Linked Sensor"
-        flow.devices[0][CONF_ENTITY_IDS] = ["sensor.linked"]
+        flow.devices[0] = DeviceRecord.from_dict({**flow.devices[0], CONF_ENTITY_IDS: ["sensor.linked"]})
         flow._pending_action = MENU_REMOVE_LINKED_ENTITY
         flow._selected_device_id = None
         with patch("custom_components.simple_device_creator.config_flow.er.async_get") as mock_er_get:
@@ -405,7 +524,8 @@ class TestSimpleDeviceCreatorOptionsFlow:
         other_entry = MagicMock()
         other_entry.entry_id = "entry-other"
         other_entry.title = "Other"
-        other_entry.data = {"devices": []}
+        other_entry.data = {}
+        self._add_hub_store(flow, other_entry, [])
         flow.hass.config_entries.async_entries.return_value = [_config_entry, other_entry]
         flow._pending_action = "move_device"
         flow._selected_device_id = None
@@ -413,6 +533,23 @@ class TestSimpleDeviceCreatorOptionsFlow:
         assert move_result["type"] == "form"
         assert move_result["step_id"] == "select_target_entry"
 
+    def test_loaded_hub_resolves_registry_devices_from_runtime(self):
+        """Test a loaded hub resolves registry devices without searching by identifier."""
+        flow, config_entry = self._build_flow(devices=[{"id": "dev-1", CONF_NAME: "Device 1"}])
+        flow.hass.data[DOMAIN][config_entry.entry_id] = HubRuntime(
+            flow._hub_store, "fingerprint", registry_device_ids={"dev-1": "registry-id"}
+        )
+        flow._selected_device_id = "dev-1"
+
+        with patch("custom_components.simple_device_creator.config_flow.dr.async_get") as mock_dr_get:
+            mock_device_registry = mock_dr_get.return_value
+            assert flow._selected_registry_device_id() == "registry-id"
+            assert flow._registry_device("dev-1") is mock_device_registry.async_get.return_value
+            assert flow._registry_device("dev-2") is None
+
+        mock_device_registry.async_get.assert_called_once_with("registry-id")
+        mock_device_registry.async_get_device.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_add_orphan_entity_aborts_without_orphans(self):
         """Test add orphan entity aborts when no orphan entities exist."""
@@ -424,7 +561,7 @@ class TestSimpleDeviceCreatorOptionsFlow:
             mock_device_registry = MagicMock()
             registry_device = MagicMock()
             registry_device.id = "registry-id"
-            mock_device_registry.async_get_device.return_value = registry_device
+            _index_registry_device(mock_device_registry, registry_device, "dev-1")
             mock_dr_get.return_value = mock_device_registry
             mock_entity_registry = MagicMock()
             mock_entity_registry.entities.values.return_value = []
@@ -437,34 +574,103 @@ class TestSimpleDeviceCreatorOptionsFlow:
 
     @pytest.mark.asyncio
     async def test_add_orphan_entity_updates_entity_registry(self):
-        """Test add orphan entity links the selected orphan entity to the hub device."""
+        """Test add orphan entity links every selected orphan and saves the hub once."""
         flow, _config_entry = self._build_flow(devices=[{"id": "dev-1", CONF_NAME: "Device 1"}])
         flow._selected_device_id = "dev-1"
-        orphan_entity = MagicMock()
-        orphan_entity.device_id = None
-        orphan_entity.entity_id = "sensor.orphan"
-        orphan_entity.name = "Orphan Sensor"
-        orphan_entity.original_name = "Orphan Sensor"
+        orphan_entities = []
+        for entity_id in ("sensor.orphan", "sensor.other_orphan"):
+            orphan_entity = MagicMock()
+            orphan_entity.device_id = None
+            orphan_entity.entity_id = entity_id
+            orphan_entities.append(orphan_entity)
 
         with patch("custom_components.simple_device_creator.config_flow.dr.async_get") as mock_dr_get, \
-             patch("custom_components.simple_device_creator.config_flow.er.async_get") as mock_er_get:
+             patch("custom_components.simple_device_creator.config_flow.er.async_get") as mock_er_get, \
+             patch.object(flow._hub_store, "async_replace_devices", wraps=flow._hub_store.async_replace_devices) as mock_replace_devices:
             mock_device_registry = MagicMock()
             registry_device = MagicMock()
             registry_device.id = "registry-id"
-            mock_device_registry.async_get_device.return_value = registry_device
+            _index_registry_device(mock_device_registry, registry_device, "dev-1")
             mock_dr_get.return_value = mock_device_registry
             mock_entity_registry = MagicMock()
-            mock_entity_registry.entities.values.return_value = [orphan_entity]
+            mock_entity_registry.entities.values.return_value = orphan_entities
             mock_er_get.return_value = mock_entity_registry
 
-            result = await flow.async_step_add_orphan_entity({CONF_ENTITY_ID: "sensor.orphan"})
+            result = await flow.async_step_add_orphan_entity(
+                {CONF_ENTITY_ID: ["sensor.orphan", "sensor.other_orphan", "sensor.linked_elsewhere"]}
+            )
 
         assert result["type"] == "create_entry"
-        mock_entity_registry.async_update_entity.assert_called_once_with(
-            "sensor.orphan", device_id="registry-id"
+        assert result["description_placeholders"]["applied"] == "2"
+        assert result["description_placeholders"]["skipped"] == "1"
+        assert mock_entity_registry.async_update_entity.call_args_list == [
+            call("sensor.orphan", device_id="registry-id"),
+            call("sensor.other_orphan", device_id="registry-id"),
+        ]
+        mock_replace_devices.assert_called_once()
+        assert self._stored_devices(flow, _config_entry)[0][CONF_ENTITY_IDS] == (
+            "sensor.orphan",
+            "sensor.other_orphan",
         )
-        call_kwargs = flow.hass.config_entries.async_update_entry.call_args.kwargs
-        assert call_kwargs["data"]["devices"][0][CONF_ENTITY_IDS] == ["sensor.orphan"]
+        assert async_get_hub_metrics(flow.hass, _config_entry.entry_id).entity_registry_writes == 2
+
+    @pytest.mark.asyncio
+    async def test_add_orphan_entity_searches_first_and_pages_large_registries(self):
+        """Test large registries get a search step and a bounded page with a next-page option."""
+        flow, _config_entry = self._build_flow(devices=[{"id": "dev-1", CONF_NAME: "Device 1"}])
+        flow._selected_device_id = "dev-1"
+        orphan_entities = []
+        for index in range(ORPHAN_PAGE_SIZE + 5):
+            orphan_entity = MagicMock()
+            orphan_entity.device_id = None
+            orphan_entity.entity_id = f"sensor.room_{index:03d}_temperature"
+            orphan_entities.append(orphan_entity)
+        light_entity = MagicMock()
+        light_entity.device_id = None
+        light_entity.entity_id = "light.room_lamp"
+        orphan_entities.append(light_entity)
+
+        with patch("custom_components.simple_device_creator.config_flow.dr.async_get") as mock_dr_get, \
+             patch("custom_components.simple_device_creator.config_flow.er.async_get") as mock_er_get:
+            mock_device_registry = MagicMock()
+            registry_device = MagicMock()
+            registry_device.id = "registry-id"
+            _index_registry_device(mock_device_registry, registry_device, "dev-1")
+            mock_dr_get.return_value = mock_device_registry
+            mock_entity_registry = MagicMock()
+            mock_entity_registry.entities.values.return_value = orphan_entities
+            mock_er_get.return_value = mock_entity_registry
+
+            search_result = await flow.async_step_add_orphan_entity()
+            no_match_result = await flow.async_step_search_orphan_entity({CONF_SEARCH: "garage"})
+            first_page = await flow.async_step_search_orphan_entity(
+                {CONF_SEARCH: "room temp", CONF_SEARCH_DOMAIN: "sensor"}
+            )
+            second_page = await flow.async_step_add_orphan_entity(
+                {CONF_ENTITY_ID: ["sensor.room_000_temperature"], CONF_NEXT_PAGE: True}
+            )
+
+        assert search_result["type"] == "form"
+        assert search_result["step_id"] == "search_orphan_entity"
+        assert no_match_result["errors"] == {"base": "no_matching_entities"}
+        assert first_page["step_id"] == "add_orphan_entity"
+        first_page_entities = self._include_entities(first_page)
+        assert len(first_page_entities) == ORPHAN_PAGE_SIZE
+        assert first_page_entities[0] == "sensor.room_000_temperature"
+        assert CONF_NEXT_PAGE in first_page["data_schema"].schema
+        assert first_page["description_placeholders"]["total"] == str(ORPHAN_PAGE_SIZE + 5)
+        assert self._include_entities(second_page) == [
+            f"sensor.room_{index:03d}_temperature"
+            for index in range(ORPHAN_PAGE_SIZE, ORPHAN_PAGE_SIZE + 5)
+        ]
+        assert CONF_NEXT_PAGE not in second_page["data_schema"].schema
+        assert second_page["description_placeholders"]["selected"] == "1"
+
+    @staticmethod
+    def _include_entities(result):
+        """Return the entity IDs offered by an orphan picker form."""
+        entity_selector = result["data_schema"].schema[CONF_ENTITY_ID]
+        return entity_selector.config["include_entities"]
 
     @pytest.mark.asyncio
     async def test_add_orphan_entity_aborts_when_registry_device_missing(self):
@@ -474,7 +680,6 @@ class TestSimpleDeviceCreatorOptionsFlow:
 
         with patch("custom_components.simple_device_creator.config_flow.dr.async_get") as mock_dr_get:
             mock_device_registry = MagicMock()
-            mock_device_registry.async_get_device.return_value = None
             mock_dr_get.return_value = mock_device_registry
 
             result = await flow.async_step_add_orphan_entity()
@@ -499,31 +704,72 @@ class TestSimpleDeviceCreatorOptionsFlow:
 
     @pytest.mark.asyncio
     async def test_remove_linked_entity_updates_entity_registry_and_storage(self):
-        """Test removing a linked entity detaches it and removes it from stored device data."""
+        """Test removing selected linked entities detaches them and saves the hub once."""
         flow, _config_entry = self._build_flow(
             devices=[
-                {"id": "dev-1", CONF_NAME: "Device 1", CONF_ENTITY_IDS: ["sensor.linked"]}
+                {
+                    "id": "dev-1",
+                    CONF_NAME: "Device 1",
+                    CONF_ENTITY_IDS: ["sensor.linked", "sensor.kept", "sensor.deleted"],
+                }
             ]
         )
         flow._selected_device_id = "dev-1"
         linked_entity = MagicMock()
         linked_entity.entity_id = "sensor.linked"
-        linked_entity.name = "Linked Sensor"
-        linked_entity.original_name = "Linked Sensor"
 
-        with patch("custom_components.simple_device_creator.config_flow.er.async_get") as mock_er_get:
+        with patch("custom_components.simple_device_creator.config_flow.er.async_get") as mock_er_get, \
+             patch.object(flow._hub_store, "async_replace_devices", wraps=flow._hub_store.async_replace_devices) as mock_replace_devices:
             mock_entity_registry = MagicMock()
-            mock_entity_registry.async_get.return_value = linked_entity
+            mock_entity_registry.async_get.side_effect = {"sensor.linked": linked_entity}.get
             mock_er_get.return_value = mock_entity_registry
 
-            result = await flow.async_step_remove_linked_entity({CONF_ENTITY_ID: "sensor.linked"})
+            form_result = await flow.async_step_remove_linked_entity()
+            result = await flow.async_step_remove_linked_entity(
+                {CONF_ENTITY_ID: ["sensor.linked", "sensor.deleted"]}
+            )
 
+        entity_selector = form_result["data_schema"].schema[CONF_ENTITY_ID]
+        assert entity_selector.config["include_entities"] == [
+            "sensor.deleted",
+            "sensor.kept",
+            "sensor.linked",
+        ]
+        assert mock_entity_registry.async_get.call_args_list == [call("sensor.linked"), call("sensor.deleted")]
         assert result["type"] == "create_entry"
+        assert result["description_placeholders"]["applied"] == "1"
+        assert result["description_placeholders"]["skipped"] == "1"
         mock_entity_registry.async_update_entity.assert_called_once_with(
             "sensor.linked", device_id=None
         )
-        call_kwargs = flow.hass.config_entries.async_update_entry.call_args.kwargs
-        assert call_kwargs["data"]["devices"][0][CONF_ENTITY_IDS] == []
+        mock_replace_devices.assert_called_once()
+        assert self._stored_devices(flow, _config_entry)[0][CONF_ENTITY_IDS] == ("sensor.kept",)
+        assert async_get_hub_metrics(flow.hass, _config_entry.entry_id).entity_registry_writes == 1
+
+    @pytest.mark.asyncio
+    async def test_remove_linked_entity_detach_all(self):
+        """Test detach all unlinks every entity of the device and requires a choice otherwise."""
+        flow, _config_entry = self._build_flow(
+            devices=[
+                {"id": "dev-1", CONF_NAME: "Device 1", CONF_ENTITY_IDS: ["sensor.one", "sensor.two"]}
+            ]
+        )
+        flow._selected_device_id = "dev-1"
+
+        with patch("custom_components.simple_device_creator.config_flow.er.async_get") as mock_er_get:
+            mock_entity_registry = MagicMock()
+            mock_er_get.return_value = mock_entity_registry
+
+            empty_result = await flow.async_step_remove_linked_entity({})
+            result = await flow.async_step_remove_linked_entity({CONF_DETACH_ALL: True})
+
+        assert empty_result["errors"] == {"base": "no_entities_selected"}
+        assert result["type"] == "create_entry"
+        assert mock_entity_registry.async_update_entity.call_args_list == [
+            call("sensor.one", device_id=None),
+            call("sensor.two", device_id=None),
+        ]
+        assert self._stored_devices(flow, _config_entry)[0][CONF_ENTITY_IDS] == ()
 
     @pytest.mark.asyncio
     async def test_remove_linked_entity_persists_before_registry_update(self):
@@ -539,21 +785,20 @@ class TestSimpleDeviceCreatorOptionsFlow:
 
         call_order = []
 
-        def _record_update_entry(*args, **kwargs):
+        def _record_replace_devices(*args, **kwargs):
             call_order.append("save")
 
         def _record_update_entity(*args, **kwargs):
             call_order.append("unlink")
 
-        flow.hass.config_entries.async_update_entry.side_effect = _record_update_entry
-
-        with patch("custom_components.simple_device_creator.config_flow.er.async_get") as mock_er_get:
+        with patch("custom_components.simple_device_creator.config_flow.er.async_get") as mock_er_get, \
+             patch.object(flow._hub_store, "async_replace_devices", side_effect=_record_replace_devices):
             mock_entity_registry = MagicMock()
             mock_entity_registry.async_get.return_value = linked_entity
             mock_entity_registry.async_update_entity.side_effect = _record_update_entity
             mock_er_get.return_value = mock_entity_registry
 
-            result = await flow.async_step_remove_linked_entity({CONF_ENTITY_ID: "sensor.linked"})
+            result = await flow.async_step_remove_linked_entity({CONF_ENTITY_ID: ["sensor.linked"]})
 
         assert result["type"] == "create_entry"
         assert call_order == ["save", "unlink"]
@@ -593,7 +838,6 @@ class TestSimpleDeviceCreatorOptionsFlow:
         with patch("custom_components.simple_device_creator.config_flow.dr.async_get") as mock_dr_get:
             mock_registry = MagicMock()
             mock_dr_get.return_value = mock_registry
-            mock_registry.async_get_device.return_value = None
 
             result = await flow.async_step_edit_device(
                 {
@@ -626,7 +870,7 @@ class TestSimpleDeviceCreatorOptionsFlow:
             registry_device.model = "Registry Model"
             registry_device.sw_version = "9"
             registry_device.hw_version = "8"
-            mock_registry.async_get_device.return_value = registry_device
+            _index_registry_device(mock_registry, registry_device, "dev-1")
 
             result = await flow.async_step_edit_device()
 
@@ -673,7 +917,7 @@ class TestSimpleDeviceCreatorOptionsFlow:
 
     @pytest.mark.asyncio
     async def test_edit_device_updates_matching_device(self):
-        """Test editing a selected device updates only that device."""
+        """Test editing a selected device updates only that device, clearing the user name first."""
         flow, config_entry = self._build_flow(
             devices=[
                 {"id": "dev-1", CONF_NAME: "Device 1", CONF_MANUFACTURER: "A", CONF_MODEL: "M1", CONF_SW_VERSION: "1", CONF_HW_VERSION: "1"},
@@ -686,7 +930,12 @@ class TestSimpleDeviceCreatorOptionsFlow:
             mock_dr_get.return_value = mock_registry
             mock_device = MagicMock()
             mock_device.id = "registry-id"
-            mock_registry.async_get_device.return_value = mock_device
+            mock_device.name_by_user = "Registry Name"
+            _index_registry_device(mock_registry, mock_device, "dev-2")
+            names_when_cleared = []
+            mock_registry.async_update_device.side_effect = lambda *args, **kwargs: names_when_cleared.append(
+                self._stored_devices(flow, config_entry)[1][CONF_NAME]
+            )
 
             select_result = await flow.async_step_select_device({CONF_DEVICE_ID: "dev-2"})
             assert select_result["type"] == "menu"
@@ -705,12 +954,12 @@ class TestSimpleDeviceCreatorOptionsFlow:
             )
 
         assert result["type"] == "create_entry"
-        call_kwargs = flow.hass.config_entries.async_update_entry.call_args.kwargs
-        devices = call_kwargs["data"]["devices"]
+        devices = self._stored_devices(flow, config_entry)
         assert devices[1][CONF_NAME] == "Updated Device"
         assert devices[0][CONF_NAME] == "Device 1"
         mock_registry.async_update_device.assert_called_once_with("registry-id", name_by_user=None)
-        assert config_entry.data["devices"][1][CONF_NAME] == "Device 2"
+        assert names_when_cleared == ["Device 2"]
+        assert async_get_hub_metrics(flow.hass, config_entry.entry_id).device_registry_writes == 1
 
     @pytest.mark.asyncio
     async def test_delete_device_removes_selected_device(self):
@@ -727,9 +976,9 @@ class TestSimpleDeviceCreatorOptionsFlow:
         result = await flow.async_step_delete_device({CONF_CONFIRM_DELETE: True})
 
         assert result["type"] == "create_entry"
-        call_kwargs = flow.hass.config_entries.async_update_entry.call_args.kwargs
-        assert len(call_kwargs["data"]["devices"]) == 1
-        assert call_kwargs["data"]["devices"][0]["id"] == "dev-1"
+        devices = self._stored_devices(flow, _config_entry)
+        assert len(devices) == 1
+        assert devices[0]["id"] == "dev-1"
 
     @pytest.mark.asyncio
     async def test_delete_last_device_removes_it(self):
@@ -741,8 +990,7 @@ class TestSimpleDeviceCreatorOptionsFlow:
         result = await flow.async_step_delete_device({CONF_CONFIRM_DELETE: True})
 
         assert result["type"] == "create_entry"
-        call_kwargs = flow.hass.config_entries.async_update_entry.call_args.kwargs
-        assert call_kwargs["data"]["devices"] == []
+        assert self._stored_devices(flow, _config_entry) == []
 
     @pytest.mark.asyncio
     async def test_move_device_aborts_without_other_hubs(self):
@@ -762,7 +1010,8 @@ class TestSimpleDeviceCreatorOptionsFlow:
         other_entry = MagicMock()
         other_entry.entry_id = "entry-other"
         other_entry.title = "Other"
-        other_entry.data = {"devices": []}
+        other_entry.data = {}
+        self._add_hub_store(flow, other_entry, [])
         flow.hass.config_entries.async_entries.return_value = [config_entry, other_entry]
         flow._selected_device_id = "dev-1"
 
@@ -778,11 +1027,13 @@ class TestSimpleDeviceCreatorOptionsFlow:
         zeta_entry = MagicMock()
         zeta_entry.entry_id = "entry-zeta"
         zeta_entry.title = "Zeta"
-        zeta_entry.data = {"devices": []}
+        zeta_entry.data = {}
+        self._add_hub_store(flow, zeta_entry, [])
         alpha_entry = MagicMock()
         alpha_entry.entry_id = "entry-alpha"
         alpha_entry.title = "Alpha"
-        alpha_entry.data = {"devices": []}
+        alpha_entry.data = {}
+        self._add_hub_store(flow, alpha_entry, [])
         flow.hass.config_entries.async_entries.return_value = [config_entry, zeta_entry, alpha_entry]
         flow._selected_device_id = "dev-1"
 
@@ -802,7 +1053,8 @@ class TestSimpleDeviceCreatorOptionsFlow:
         other_entry = MagicMock()
         other_entry.entry_id = "entry-other"
         other_entry.title = "Other"
-        other_entry.data = {"devices": [{"id": "dev-2", CONF_NAME: "Sensor"}]}
+        other_entry.data = {}
+        self._add_hub_store(flow, other_entry, [{"id": "dev-2", CONF_NAME: "Sensor"}])
         flow.hass.config_entries.async_entries.return_value = [config_entry, other_entry]
         flow._selected_device_id = "dev-1"
 
@@ -824,25 +1076,25 @@ class TestSimpleDeviceCreatorOptionsFlow:
         other_entry = MagicMock()
         other_entry.entry_id = "entry-target"
         other_entry.title = "Target"
-        other_entry.data = {"devices": [{"id": "dev-3", CONF_NAME: "Existing"}]}
+        other_entry.data = {}
+        self._add_hub_store(flow, other_entry, [{"id": "dev-3", CONF_NAME: "Existing"}])
         flow.hass.config_entries.async_entries.return_value = [config_entry, other_entry]
         registry = MagicMock()
         registry_device = MagicMock()
         registry_device.id = "registry-id"
-        registry.async_get_device.return_value = registry_device
+        _index_registry_device(registry, registry_device, "dev-2")
 
         with patch("custom_components.simple_device_creator.config_flow.dr.async_get", return_value=registry):
             flow._selected_device_id = "dev-2"
             result = await flow.async_step_select_target_entry({CONF_TARGET_ENTRY_ID: "entry-target"})
 
         assert result["type"] == "create_entry"
-        update_calls = flow.hass.config_entries.async_update_entry.call_args_list
-        assert len(update_calls) == 2
-        target_call = update_calls[0].kwargs
-        source_call = update_calls[1].kwargs
-        assert target_call["data"]["devices"][1]["id"] == "dev-2"
-        assert [device["id"] for device in source_call["data"]["devices"]] == ["dev-1"]
+        assert self._stored_devices(flow, other_entry)[1]["id"] == "dev-2"
+        assert [device["id"] for device in self._stored_devices(flow, config_entry)] == ["dev-1"]
+        flow.hass.config_entries.async_update_entry.assert_not_called()
         registry.async_get_or_create.assert_called_once()
         registry.async_update_device.assert_called_once_with(
             "registry-id", remove_config_entry_id=config_entry.entry_id
-        )
\ No newline at end of file
+        )
+        assert async_get_hub_metrics(flow.hass, config_entry.entry_id).device_registry_writes == 1
+        assert async_get_hub_metrics(flow.hass, other_entry.entry_id).device_registry_writes == 1
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""Test the device ID index."""
+
+from unittest.mock import MagicMock
+
+from homeassistant.core import Event
+from homeassistant.helpers import device_registry as dr
+
+from custom_components.simple_device_creator.const import DATA_DEVICE_INDEX, DOMAIN
+from custom_components.simple_device_creator.device_index import async_get_device_index
+
+
+def test_index_maps_hub_devices_both_ways(build_device_index):
+    """Test only devices with the integration identifier are indexed, in both directions."""
+    hass, _devices, device_index = build_device_index(
+        [
+            MagicMock(id="registry-1", identifiers={("other_domain", "x"), (DOMAIN, "device-1")}),
+            MagicMock(id="registry-2", identifiers={("other_domain", "device-2")}),
+        ]
+    )
+
+    assert device_index.registry_device_id("device-1") == "registry-1"
+    assert device_index.internal_device_id("registry-1") == "device-1"
+    assert device_index.internal_device_id("registry-2") is None
+    assert len(device_index) == 1
+    assert async_get_device_index(hass) is device_index
+
+
+def test_identifier_changes_and_removals_update_the_mapping(build_device_index):
+    """Test re-identified devices are re-indexed, and dropped without our identifier or when removed."""
+    _hass, devices, device_index = build_device_index(
+        [
+            MagicMock(id="registry-1", identifiers={(DOMAIN, "device-1")}),
+            MagicMock(id="registry-2", identifiers={(DOMAIN, "device-2")}),
+        ]
+    )
+
+    devices["registry-1"].identifiers = {(DOMAIN, "device-3")}
+    devices["registry-2"].identifiers = {("other_domain", "device-2")}
+    for registry_device_id in devices:
+        device_index.async_device_registry_updated(
+            Event(
+                dr.EVENT_DEVICE_REGISTRY_UPDATED,
+                {"action": "update", "device_id": registry_device_id, "changes": {"identifiers": set()}},
+            )
+        )
+
+    assert device_index.registry_device_id("device-1") is None
+    assert device_index.registry_device_id("device-3") == "registry-1"
+    assert device_index.internal_device_id("registry-1") == "device-3"
+    assert device_index.internal_device_id("registry-2") is None
+    assert len(device_index) == 1
+
+    device_index.async_device_registry_updated(
+        Event(dr.EVENT_DEVICE_REGISTRY_UPDATED, {"action": "remove", "device_id": "registry-1"})
+    )
+
+    assert device_index.registry_device_id("device-3") is None
+    assert len(device_index) == 0
+
+
+def test_event_filter_skips_non_domain_removals_and_kept_identifiers(build_device_index):
+    """Test only creates, identifier changes and removals of indexed devices pass."""
+    _hass, _devices, device_index = build_device_index(
+        [
+            MagicMock(id="registry-1", identifiers={(DOMAIN, "device-1")}),
+            MagicMock(id="registry-2", identifiers={("other_domain", "device-2")}),
+        ]
+    )
+
+    assert device_index._async_event_filter({"action": "create", "device_id": "registry-9"})
+    assert device_index._async_event_filter({"action": "remove", "device_id": "registry-1"})
+    assert not device_index._async_event_filter({"action": "remove", "device_id": "registry-2"})
+    assert device_index._async_event_filter(
+        {"action": "update", "device_id": "registry-1", "changes": {"identifiers": set()}}
+    )
+    assert not device_index._async_event_filter(
+        {"action": "update", "device_id": "registry-1", "changes": {"name_by_user": None}}
+    )
+
+
+def test_unregistering_last_hub_tears_down_the_index(build_device_index):
+    """Test the index keeps listening while a hub is registered and is forgotten after the last one."""
+    hass, _devices, device_index = build_device_index([])
+    unsub_listener = hass.bus.async_listen.return_value
+    unregister_first = device_index.async_register_hub("entry-1")
+    unregister_second = device_index.async_register_hub("entry-2")
+
+    unregister_first()
+
+    unsub_listener.assert_not_called()
+    assert hass.data[DOMAIN][DATA_DEVICE_INDEX] is device_index
+
+    unregister_second()
+
+    unsub_listener.assert_called_once_with()
+    assert DATA_DEVICE_INDEX not in hass.data[DOMAIN]
@@ -0,0 +1,70 @@
+"""Test the diagnostics download."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from custom_components.simple_device_creator.const import CONF_NAME, DOMAIN
+from custom_components.simple_device_creator.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from custom_components.simple_device_creator.dispatcher import async_get_dispatcher
+from custom_components.simple_device_creator.metrics import METRIC_SETUP, async_get_hub_metrics
+from custom_components.simple_device_creator.runtime import HubRuntime
+from custom_components.simple_device_creator.storage import HubStore
+
+
+@pytest.mark.asyncio
+async def test_diagnostics_report_metrics_and_index_sizes():
+    """Test a loaded hub reports its metrics, hub indexes and the built domain indexes."""
+    hass = MagicMock()
+    hass.data = {}
+    entry = MagicMock()
+    entry.entry_id = "entry-1"
+    hub_store = HubStore(hass, f"{DOMAIN}.entry-1")
+    hub_store.devices = [
+        {"id": "device-1", CONF_NAME: "Plug", "entity_ids": ["switch.plug"]},
+        {"id": "device-2", CONF_NAME: "Lamp"},
+    ]
+    runtime = HubRuntime(hub_store, "fingerprint", registry_device_ids={"device-1": "registry-1"})
+    runtime.async_set_devices(list(hub_store.devices))
+    hass.data[DOMAIN] = {entry.entry_id: runtime}
+    with patch("custom_components.simple_device_creator.dispatcher.dr.async_get"):
+        dispatcher = async_get_dispatcher(hass)
+    dispatcher.async_set_links(entry.entry_id, runtime.linked_entities)
+    async_get_hub_metrics(hass, entry.entry_id).durations[METRIC_SETUP].record(0.002)
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert diagnostics["loaded"] is True
+    assert diagnostics["metrics"]["durations"][METRIC_SETUP]["count"] == 1
+    assert diagnostics["hub"] == {
+        "devices": 2,
+        "registry_devices": 1,
+        "linked_entities": 1,
+        "name_index": 2,
+        "selector_options": 2,
+        "write_buffer": {"pending": 0, "flushes": 0, "dropped": 0},
+        "suppressed_echoes": 0,
+    }
+    assert diagnostics["domain"] == {
+        "linked_entities": 1,
+        "watched_devices": 0,
+        "orphan_index": None,
+        "device_index": None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_diagnostics_of_unloaded_hub_report_metrics_only():
+    """Test a hub that is not loaded only reports the metrics it kept."""
+    hass = MagicMock()
+    hass.data = {}
+    entry = MagicMock()
+    entry.entry_id = "entry-1"
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert diagnostics["loaded"] is False
+    assert "hub" not in diagnostics
+    assert diagnostics["metrics"]["entry_writes"] == 0
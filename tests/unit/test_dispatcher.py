@@ -0,0 +1,187 @@
+"""Test the domain-wide registry event dispatcher."""
+
+from unittest.mock import MagicMock, patch
+
+from homeassistant.core import Event
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.simple_device_creator.const import DATA_DISPATCHER, DOMAIN
+from custom_components.simple_device_creator.dispatcher import (
+    async_get_dispatcher,
+    event_filter_data,
+)
+
+
+def _build_dispatcher():
+    """Return a dispatcher bound to a mock Home Assistant instance."""
+    hass = MagicMock()
+    hass.data = {}
+    with patch("custom_components.simple_device_creator.dispatcher.dr.async_get") as mock_dr_get:
+        device_reg = MagicMock()
+        mock_dr_get.return_value = device_reg
+        dispatcher = async_get_dispatcher(hass)
+    return hass, device_reg, dispatcher
+
+
+def test_dispatcher_is_shared_by_all_hubs():
+    """Test one dispatcher and one pair of bus listeners serve every hub."""
+    hass, _device_reg, dispatcher = _build_dispatcher()
+
+    dispatcher.async_register_hub("entry-1", MagicMock(), MagicMock())
+    dispatcher.async_register_hub("entry-2", MagicMock(), MagicMock())
+
+    assert async_get_dispatcher(hass) is dispatcher
+    assert hass.data[DOMAIN][DATA_DISPATCHER] is dispatcher
+    assert hass.bus.async_listen.call_count == 2
+
+
+def test_entity_events_route_only_to_the_linking_hub():
+    """Test entity events reach only the hub that links the entity."""
+    _hass, _device_reg, dispatcher = _build_dispatcher()
+    first_handler = MagicMock()
+    second_handler = MagicMock()
+    dispatcher.async_register_hub("entry-1", first_handler, MagicMock())
+    dispatcher.async_register_hub("entry-2", second_handler, MagicMock())
+    dispatcher.async_set_links("entry-1", {"sensor.one": "device-1"})
+    dispatcher.async_set_links("entry-2", {"sensor.two": "device-2"})
+
+    event = Event(er.EVENT_ENTITY_REGISTRY_UPDATED, {"action": "update", "entity_id": "sensor.two"})
+    dispatcher.async_entity_registry_updated(event)
+    dispatcher.async_entity_registry_updated(
+        Event(er.EVENT_ENTITY_REGISTRY_UPDATED, {"action": "update", "entity_id": "sensor.other"})
+    )
+
+    first_handler.assert_not_called()
+    second_handler.assert_called_once_with(event, "device-2")
+
+
+def test_set_links_and_unlink_keep_index_current():
+    """Test link updates replace stale entries and unlink drops single entities."""
+    _hass, _device_reg, dispatcher = _build_dispatcher()
+    handler = MagicMock()
+    dispatcher.async_register_hub("entry-1", handler, MagicMock())
+    dispatcher.async_set_links("entry-1", {"sensor.one": "device-1", "sensor.two": "device-1"})
+    dispatcher.async_set_links("entry-1", {"sensor.two": "device-2"})
+    dispatcher.async_unlink("sensor.two")
+
+    for entity_id in ("sensor.one", "sensor.two"):
+        dispatcher.async_entity_registry_updated(
+            Event(er.EVENT_ENTITY_REGISTRY_UPDATED, {"action": "update", "entity_id": entity_id})
+        )
+
+    handler.assert_not_called()
+
+
+def test_update_links_applies_in_place_edits_of_the_hub_mapping():
+    """Test in-place link edits reach the index for the reported entities only."""
+    _hass, _device_reg, dispatcher = _build_dispatcher()
+    links = {"sensor.one": "device-1", "sensor.two": "device-1"}
+    dispatcher.async_set_links("entry-1", links)
+    dispatcher.async_set_links("entry-2", {"sensor.other": "device-9"})
+
+    del links["sensor.one"]
+    links["sensor.two"] = "device-2"
+    links["sensor.three"] = "device-2"
+    dispatcher.async_update_links("entry-1", {"sensor.one", "sensor.two", "sensor.three", "sensor.other"})
+
+    assert dispatcher.async_linked_entities() == {
+        "sensor.two": ("entry-1", "device-2"),
+        "sensor.three": ("entry-1", "device-2"),
+        "sensor.other": ("entry-2", "device-9"),
+    }
+
+
+def test_device_events_route_to_attached_hubs():
+    """Test device updates reach only hubs attached to the registry device."""
+    _hass, device_reg, dispatcher = _build_dispatcher()
+    first_handler = MagicMock()
+    second_handler = MagicMock()
+    dispatcher.async_register_hub("entry-1", MagicMock(), first_handler)
+    dispatcher.async_register_hub("entry-2", MagicMock(), second_handler)
+    registry_device = MagicMock()
+    registry_device.config_entries = {"entry-2", "other-entry"}
+    device_reg.async_get.return_value = registry_device
+
+    event = Event(dr.EVENT_DEVICE_REGISTRY_UPDATED, {"action": "update", "device_id": "reg-id"})
+    dispatcher.async_device_registry_updated(event)
+    dispatcher.async_device_registry_updated(
+        Event(dr.EVENT_DEVICE_REGISTRY_UPDATED, {"action": "remove", "device_id": "reg-id"})
+    )
+
+    first_handler.assert_not_called()
+    second_handler.assert_called_once_with(event, registry_device)
+
+
+def test_unregistering_last_hub_removes_bus_listeners():
+    """Test the bus listeners are released once no hub is registered."""
+    hass, _device_reg, dispatcher = _build_dispatcher()
+    unsub_listener = MagicMock()
+    hass.bus.async_listen.return_value = unsub_listener
+    unregister_first = dispatcher.async_register_hub("entry-1", MagicMock(), MagicMock())
+    unregister_second = dispatcher.async_register_hub("entry-2", MagicMock(), MagicMock())
+
+    unregister_first()
+    unsub_listener.assert_not_called()
+
+    unregister_second()
+    assert unsub_listener.call_count == 2
+    assert DATA_DISPATCHER not in hass.data[DOMAIN]
+
+
+def test_event_filters_drop_unwatched_entities_and_devices():
+    """Test the bus filters only pass events for watched entities and devices."""
+    _hass, _device_reg, dispatcher = _build_dispatcher()
+    dispatcher.async_register_hub("entry-1", MagicMock(), MagicMock())
+    dispatcher.async_set_links("entry-1", {"sensor.linked": "device-1"})
+    dispatcher.async_set_devices("entry-1", {"reg-1", "reg-2"})
+    dispatcher.async_unwatch_device("entry-1", "reg-2")
+
+    assert dispatcher._async_entity_event_filter(
+        Event(er.EVENT_ENTITY_REGISTRY_UPDATED, {"action": "update", "entity_id": "sensor.linked"})
+    )
+    assert not dispatcher._async_entity_event_filter(
+        {"action": "update", "entity_id": "sensor.unrelated"}
+    )
+    assert dispatcher._async_device_event_filter({"action": "update", "device_id": "reg-1"})
+    assert not dispatcher._async_device_event_filter({"action": "remove", "device_id": "reg-1"})
+    assert not dispatcher._async_device_event_filter({"action": "update", "device_id": "reg-2"})
+
+
+def test_event_filters_follow_devices_moved_between_hubs():
+    """Test a device watched by a new hub stays watched when the old hub lets go."""
+    _hass, _device_reg, dispatcher = _build_dispatcher()
+    dispatcher.async_register_hub("source", MagicMock(), MagicMock())
+    dispatcher.async_register_hub("target", MagicMock(), MagicMock())
+    dispatcher.async_set_devices("source", {"reg-1"})
+
+    dispatcher.async_watch_device("target", "reg-1")
+    dispatcher.async_set_devices("source", set())
+
+    assert dispatcher._async_device_event_filter({"action": "update", "device_id": "reg-1"})
+
+
+def test_event_filters_skip_echoes_of_the_hub_own_updates():
+    """Test events caused by a hub's own registry updates are skipped and counted."""
+    _hass, _device_reg, dispatcher = _build_dispatcher()
+    dispatcher.async_register_hub("entry-1", MagicMock(), MagicMock())
+    dispatcher.async_register_hub("entry-2", MagicMock(), MagicMock())
+    dispatcher.async_set_links("entry-1", {"sensor.one": "device-1"})
+    dispatcher.async_set_links("entry-2", {"sensor.two": "device-2"})
+    dispatcher.async_set_devices("entry-1", {"reg-1"})
+
+    with dispatcher.async_suppress_echoes("entry-1"):
+        assert not dispatcher._async_entity_event_filter({"action": "update", "entity_id": "sensor.one"})
+        assert not dispatcher._async_device_event_filter({"action": "update", "device_id": "reg-1"})
+        assert dispatcher._async_entity_event_filter({"action": "update", "entity_id": "sensor.two"})
+
+    assert dispatcher._async_entity_event_filter({"action": "update", "entity_id": "sensor.one"})
+    assert dispatcher.suppressed_echoes == {"entry-1": 2}
+
+
+def test_event_filter_data_accepts_events_and_event_data():
+    """Test filters read the same data from an event and from bare event data."""
+    event_data = {"action": "remove", "entity_id": "sensor.one"}
+
+    assert event_filter_data(Event(er.EVENT_ENTITY_REGISTRY_UPDATED, event_data)) == event_data
+    assert event_filter_data(event_data) is event_data
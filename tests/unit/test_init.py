@@ -1,20 +1,35 @@
 """Test init functions."""
 
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, call, patch
 
 import pytest
 from homeassistant.core import Event
 from homeassistant.helpers import entity_registry as er
 
 from custom_components.simple_device_creator import (
-    _linked_entity_targets,
-    _remove_entity_link,
+    _entry_fingerprint,
+    _rename_device,
+    _unlink_entity,
     async_migrate_entry,
     async_reload_entry,
     async_setup_entry,
     async_unload_entry,
 )
-from custom_components.simple_device_creator.const import DOMAIN
+from custom_components.simple_device_creator.const import (
+    CONF_STORAGE_KEY,
+    CONF_STORAGE_VERSION,
+    DATA_DISPATCHER,
+    DATA_METRICS,
+    DATA_STORES,
+    DOMAIN,
+)
+from custom_components.simple_device_creator.metrics import METRIC_SETUP
+from custom_components.simple_device_creator.runtime import HubRuntime
+from custom_components.simple_device_creator.storage import (
+    DeviceRecord,
+    as_records,
+    async_get_hub_store,
+)
 
 
 @pytest.mark.asyncio
@@ -74,6 +89,104 @@ async def test_async_setup_entry_with_multiple_devices():
     assert device_reg.async_get_or_create.call_count == 2
 
 
+@pytest.mark.asyncio
+async def test_async_setup_entry_skips_registry_write_for_unchanged_devices(caplog):
+    """Test setup only writes registry devices whose stored metadata differs."""
+    hass = MagicMock()
+    hass.data = {}
+    entry = MagicMock()
+    entry.entry_id = "test_entry"
+    entry.data = {
+        "devices": [
+            {
+                "id": "device-1",
+                "name": "Device 1",
+                "manufacturer": "A",
+                "model": "M",
+                "sw_version": "1.0",
+                "hw_version": "1",
+                "entity_ids": ["sensor.linked"],
+            },
+            {"id": "device-2", "name": "Device 2", "manufacturer": "B"},
+        ]
+    }
+    entry.version = 2
+    hass.config_entries.async_forward_entry_setups = AsyncMock(return_value=None)
+
+    unchanged_device = MagicMock()
+    unchanged_device.id = "registry-device-1"
+    unchanged_device.name_by_user = None
+    unchanged_device.config_entries = {"test_entry"}
+    unchanged_device.name = "Device 1"
+    unchanged_device.manufacturer = "A"
+    unchanged_device.model = "M"
+    unchanged_device.sw_version = "1.0"
+    unchanged_device.hw_version = "1"
+    unchanged_device.identifiers = {(DOMAIN, "device-1")}
+
+    with patch("custom_components.simple_device_creator.dr.async_get") as mock_async_get, \
+         patch("custom_components.simple_device_creator.er.async_get") as mock_entity_get, \
+         patch("custom_components.simple_device_creator.dr.async_entries_for_config_entry") as mock_entries:
+        device_reg = MagicMock()
+        mock_async_get.return_value = device_reg
+        entity_reg = MagicMock()
+        entity_entry = MagicMock()
+        entity_entry.device_id = None
+        entity_reg.async_get.return_value = entity_entry
+        mock_entity_get.return_value = entity_reg
+        mock_entries.return_value = [unchanged_device]
+        device_reg.devices.values.return_value = [unchanged_device]
+
+        with caplog.at_level("DEBUG", logger="custom_components.simple_device_creator"):
+            result = await async_setup_entry(hass, entry)
+
+    assert result is True
+    device_reg.async_get_or_create.assert_called_once()
+    assert device_reg.async_get_or_create.call_args.kwargs["identifiers"] == {(DOMAIN, "device-2")}
+    entity_reg.async_update_entity.assert_called_once_with(
+        "sensor.linked", device_id="registry-device-1"
+    )
+    assert "1 registry devices written, 1 already up to date" in caplog.text
+    metrics = hass.data[DOMAIN][DATA_METRICS][entry.entry_id]
+    assert metrics.durations[METRIC_SETUP].count == 1
+    assert metrics.device_registry_writes == 1
+    assert metrics.entity_registry_writes == 1
+    assert metrics.entry_writes == 1
+
+
+@pytest.mark.asyncio
+async def test_async_setup_entry_loads_registry_devices_once():
+    """Test setup resolves registry devices from one bulk load instead of per-device lookups."""
+    hass = MagicMock()
+    hass.data = {}
+    entry = MagicMock()
+    entry.entry_id = "test_entry"
+    entry.data = {"devices": [{"id": f"device-{index}", "name": f"Device {index}"} for index in range(3)]}
+    entry.version = 2
+    hass.config_entries.async_forward_entry_setups = AsyncMock(return_value=None)
+
+    with patch("custom_components.simple_device_creator.dr.async_get") as mock_async_get, \
+         patch("custom_components.simple_device_creator.er.async_get") as mock_entity_get, \
+         patch("custom_components.simple_device_creator.dr.async_entries_for_config_entry") as mock_entries:
+        device_reg = MagicMock()
+        mock_async_get.return_value = device_reg
+        mock_entity_get.return_value = MagicMock()
+
+        unmanaged_device = MagicMock()
+        unmanaged_device.id = "unmanaged-device"
+        unmanaged_device.identifiers = {("other_domain", "device-0")}
+        mock_entries.return_value = [unmanaged_device]
+        device_reg.devices.values.return_value = [unmanaged_device]
+
+        result = await async_setup_entry(hass, entry)
+
+    assert result is True
+    mock_entries.assert_called_once_with(device_reg, "test_entry")
+    device_reg.async_get_device.assert_not_called()
+    assert device_reg.async_get_or_create.call_count == 3
+    device_reg.async_remove_device.assert_called_once_with("unmanaged-device")
+
+
 @pytest.mark.asyncio
 async def test_async_setup_entry_prunes_removed_devices():
     """Test pruning devices removed from the entry data."""
@@ -103,6 +216,8 @@ async def test_async_setup_entry_prunes_removed_devices():
 
         mock_entries.return_value = [current_device, old_device]
 
+        device_reg.devices.values.return_value = [current_device, old_device]
+
         result = await async_setup_entry(hass, entry)
 
     assert result is True
@@ -152,7 +267,7 @@ async def test_async_setup_entry_reapplies_linked_orphan_entities():
 
 
 @pytest.mark.asyncio
-async def test_async_setup_entry_removes_missing_linked_entities_from_storage():
+async def test_async_setup_entry_removes_missing_linked_entities_from_storage(hub_storage):
     """Test setup prunes stored linked entities that no longer exist."""
     hass = MagicMock()
     hass.data = {}
@@ -184,13 +299,14 @@ async def test_async_setup_entry_removes_missing_linked_entities_from_storage():
         result = await async_setup_entry(hass, entry)
 
     assert result is True
-    call_kwargs = hass.config_entries.async_update_entry.call_args.kwargs
-    assert call_kwargs["data"]["devices"][0]["entity_ids"] == []
-    assert hass.data[DOMAIN][entry.entry_id]["devices"][0]["entity_ids"] == []
+    assert hub_storage["simple_device_creator.test_entry"]["devices"][0]["entity_ids"] == []
+    runtime = hass.data[DOMAIN][entry.entry_id]
+    assert runtime.devices[0]["entity_ids"] == ()
+    assert runtime.registry_device_ids == {"device-1": "registry-device-id"}
 
 
 @pytest.mark.asyncio
-async def test_async_setup_entry_entity_listener_removes_deleted_link_from_storage():
+async def test_async_setup_entry_entity_listener_removes_deleted_link_from_storage(hub_storage):
     """Test entity registry remove events prune stored linked entities."""
     hass = MagicMock()
     hass.data = {}
@@ -234,8 +350,16 @@ async def test_async_setup_entry_entity_listener_removes_deleted_link_from_stora
     assert entity_listener is not None
     entity_listener(Event(er.EVENT_ENTITY_REGISTRY_UPDATED, {"action": "remove", "entity_id": "sensor.orphan"}))
 
-    call_kwargs = hass.config_entries.async_update_entry.call_args.kwargs
-    assert call_kwargs["data"]["devices"][0]["entity_ids"] == []
+    write_buffer = hass.data[DOMAIN][DATA_STORES][entry.entry_id].write_buffer
+    assert write_buffer.pending == 1
+    assert hub_storage["simple_device_creator.test_entry"]["devices"][0]["entity_ids"] == ["sensor.orphan"]
+
+    with patch("custom_components.simple_device_creator.dr.async_get"), \
+         patch("custom_components.simple_device_creator.er.async_get"):
+        write_buffer.async_flush()
+
+    assert hub_storage["simple_device_creator.test_entry"]["devices"][0]["entity_ids"] == []
+    assert write_buffer.flushes == 1
 
 
 @pytest.mark.asyncio
@@ -262,7 +386,7 @@ async def test_async_setup_entry_entity_listener_reapplies_target_device_on_upda
         initial_registry_device.id = "registry-device-id"
         target_device = MagicMock()
         target_device.id = "registry-device-id"
-        device_reg.async_get_device.side_effect = [None, target_device]
+        device_reg.async_get_device.return_value = target_device
         device_reg.async_get_or_create.return_value = initial_registry_device
         mock_device_get.return_value = device_reg
 
@@ -275,58 +399,57 @@ async def test_async_setup_entry_entity_listener_reapplies_target_device_on_upda
 
         await async_setup_entry(hass, entry)
 
-    entity_listener = None
+    entity_listener = entity_filter = None
     for call in hass.bus.async_listen.call_args_list:
-        args, _ = call
+        args, kwargs = call
         if args[0] == er.EVENT_ENTITY_REGISTRY_UPDATED:
             entity_listener = args[1]
+            entity_filter = kwargs["event_filter"]
             break
 
     assert entity_listener is not None
     entity_reg.async_update_entity.reset_mock()
+    echo_filter_results = []
+    entity_reg.async_update_entity.side_effect = lambda entity_id, **kwargs: echo_filter_results.append(
+        entity_filter({"action": "update", "entity_id": entity_id})
+    )
 
     entity_listener(Event(er.EVENT_ENTITY_REGISTRY_UPDATED, {"action": "update", "entity_id": "sensor.orphan"}))
 
     entity_reg.async_update_entity.assert_called_once_with(
         "sensor.orphan", device_id="registry-device-id"
     )
+    assert echo_filter_results == [False]
+    assert hass.data[DOMAIN][DATA_DISPATCHER].suppressed_echoes == {"test_entry": 1}
 
 
-def test_remove_entity_link_helper_removes_only_matching_entity():
-    """Test helper removes only the requested linked entity."""
-    data = {
-        "devices": [
-            {"id": "device-1", "entity_ids": ["sensor.one", "sensor.two"]},
-            {"id": "device-2", "entity_ids": ["sensor.three"]},
-        ]
-    }
-
-    changed = _remove_entity_link(data, "sensor.two")
+def test_unlink_entity_helper_removes_only_matching_entity():
+    """Test helper removes only the requested linked entity and keeps unchanged records."""
+    device_data = DeviceRecord.from_dict(
+        {"id": "device-1", "name": "Device 1", "entity_ids": ["sensor.one", "sensor.two"]}
+    )
 
-    assert changed is True
-    assert data["devices"][0]["entity_ids"] == ["sensor.one"]
-    assert data["devices"][1]["entity_ids"] == ["sensor.three"]
+    unlinked_device = _unlink_entity(device_data, "sensor.two")
 
+    assert unlinked_device["entity_ids"] == ("sensor.one",)
+    assert unlinked_device["name"] == "Device 1"
+    assert device_data["entity_ids"] == ("sensor.one", "sensor.two")
+    assert _unlink_entity(unlinked_device, "sensor.two") is unlinked_device
 
-def test_linked_entity_targets_helper_ignores_devices_without_ids():
-    """Test helper maps linked entities to internal device IDs and skips invalid devices."""
-    data = {
-        "devices": [
-            {"id": "device-1", "entity_ids": ["sensor.one", "sensor.two"]},
-            {"entity_ids": ["sensor.skip"]},
-            {"id": "device-2", "entity_ids": []},
-        ]
-    }
 
-    targets = _linked_entity_targets(data)
+def test_rename_device_helper_keeps_records_that_already_have_the_name():
+    """Test helper returns the same record when the name does not change."""
+    device_data = DeviceRecord.from_dict({"id": "device-1", "name": "Device 1"})
 
-    assert targets == {"sensor.one": "device-1", "sensor.two": "device-1"}
+    assert _rename_device(device_data, "Device 1") is device_data
+    assert _rename_device(device_data, "Renamed")["name"] == "Renamed"
 
 
 @pytest.mark.asyncio
 async def test_async_migrate_entry_consolidates_legacy_entries():
     """Test legacy single-device entries migrate into one General entry."""
     hass = MagicMock()
+    hass.data = {}
 
     primary_entry = MagicMock()
     primary_entry.entry_id = "entry-1"
@@ -346,8 +469,7 @@ async def test_async_migrate_entry_consolidates_legacy_entries():
     result = await async_migrate_entry(hass, primary_entry)
 
     assert result is True
-    hass.config_entries.async_update_entry.assert_called_once()
-    call_kwargs = hass.config_entries.async_update_entry.call_args.kwargs
+    call_kwargs = hass.config_entries.async_update_entry.call_args_list[0].kwargs
     assert call_kwargs["title"] == "General"
     assert len(call_kwargs["data"]["devices"]) == 2
     hass.config_entries.async_remove.assert_awaited_once_with("entry-2")
@@ -358,7 +480,7 @@ async def test_async_migrate_entry_returns_true_for_current_version():
     """Test migration is a no-op for already current entries."""
     hass = MagicMock()
     entry = MagicMock()
-    entry.version = 2
+    entry.version = 3
 
     result = await async_migrate_entry(hass, entry)
 
@@ -366,10 +488,34 @@ async def test_async_migrate_entry_returns_true_for_current_version():
     hass.config_entries.async_update_entry.assert_not_called()
 
 
+@pytest.mark.asyncio
+async def test_async_migrate_entry_moves_hub_devices_to_store(hub_storage):
+    """Test version 2 hubs move their devices out of the entry data."""
+    hass = MagicMock()
+    hass.data = {}
+    entry = MagicMock()
+    entry.entry_id = "entry-1"
+    entry.version = 2
+    entry.data = {"devices": [{"id": "device-1", "name": "One"}]}
+
+    result = await async_migrate_entry(hass, entry)
+
+    assert result is True
+    assert hub_storage["simple_device_creator.entry-1"] == {
+        "devices": [{"id": "device-1", "name": "One"}]
+    }
+    hass.config_entries.async_update_entry.assert_called_once_with(
+        entry,
+        data={CONF_STORAGE_KEY: "simple_device_creator.entry-1", CONF_STORAGE_VERSION: 1},
+        version=3,
+    )
+
+
 @pytest.mark.asyncio
 async def test_async_migrate_entry_without_async_entries_updates_current_entry():
     """Test migration falls back to updating the current entry when async_entries is unavailable."""
     hass = MagicMock()
+    hass.data = {}
     del hass.config_entries.async_entries
     entry = MagicMock()
     entry.version = 1
@@ -377,7 +523,7 @@ async def test_async_migrate_entry_without_async_entries_updates_current_entry()
     result = await async_migrate_entry(hass, entry)
 
     assert result is True
-    call_kwargs = hass.config_entries.async_update_entry.call_args.kwargs
+    call_kwargs = hass.config_entries.async_update_entry.call_args_list[0].kwargs
     assert call_kwargs["title"] == "General"
     assert call_kwargs["version"] == 2
 
@@ -386,6 +532,7 @@ async def test_async_migrate_entry_without_async_entries_updates_current_entry()
 async def test_async_migrate_entry_handles_no_legacy_entries():
     """Test migration updates version when no legacy entries are returned."""
     hass = MagicMock()
+    hass.data = {}
     entry = MagicMock()
     entry.version = 1
     hass.config_entries.async_entries.return_value = []
@@ -393,7 +540,7 @@ async def test_async_migrate_entry_handles_no_legacy_entries():
     result = await async_migrate_entry(hass, entry)
 
     assert result is True
-    hass.config_entries.async_update_entry.assert_called_once_with(entry, version=2)
+    assert hass.config_entries.async_update_entry.call_args_list[0] == call(entry, version=2)
 
 
 @pytest.mark.asyncio
@@ -424,6 +571,7 @@ async def test_async_migrate_entry_returns_false_for_secondary_legacy_entry():
 async def test_async_migrate_entry_skips_missing_or_duplicate_device_ids():
     """Test migration ignores missing and duplicate legacy device IDs."""
     hass = MagicMock()
+    hass.data = {}
 
     primary_entry = MagicMock()
     primary_entry.entry_id = "entry-1"
@@ -443,7 +591,7 @@ async def test_async_migrate_entry_skips_missing_or_duplicate_device_ids():
     result = await async_migrate_entry(hass, primary_entry)
 
     assert result is True
-    call_kwargs = hass.config_entries.async_update_entry.call_args.kwargs
+    call_kwargs = hass.config_entries.async_update_entry.call_args_list[0].kwargs
     assert len(call_kwargs["data"]["devices"]) == 1
 
 
@@ -462,14 +610,193 @@ async def test_async_unload_entry():
     assert entry.entry_id not in hass.data["simple_device_creator"]
 
 
+@pytest.mark.asyncio
+async def test_async_unload_entry_flushes_pending_handler_changes():
+    """Test unloading applies handler changes still waiting in the write buffer."""
+    hass = MagicMock()
+    entry = MagicMock()
+    entry.entry_id = "test_entry"
+    hub_store = MagicMock()
+    hass.data = {DOMAIN: {entry.entry_id: {"devices": []}, DATA_STORES: {entry.entry_id: hub_store}}}
+    hass.config_entries.async_unload_platforms = AsyncMock(return_value=True)
+
+    assert await async_unload_entry(hass, entry)
+
+    hub_store.write_buffer.async_flush.assert_called_once_with()
+    assert entry.entry_id not in hass.data[DOMAIN]
+
+
 @pytest.mark.asyncio
 async def test_async_reload_entry():
-    """Test reloading the integration."""
+    """Test reloading an entry that is not loaded runs the full setup."""
     hass = MagicMock()
+    hass.data = {}
     entry = MagicMock()
     entry.entry_id = "test_entry"
     hass.config_entries.async_reload = AsyncMock()
 
     await async_reload_entry(hass, entry)
 
-    hass.config_entries.async_reload.assert_called_once_with(entry.entry_id)
\ No newline at end of file
+    hass.config_entries.async_reload.assert_called_once_with(entry.entry_id)
+
+
+@pytest.mark.asyncio
+async def test_async_reload_entry_skips_title_only_updates():
+    """Test renaming a loaded hub neither reloads it nor touches the registries."""
+    hass = MagicMock()
+    hass.config_entries.async_reload = AsyncMock()
+    entry = MagicMock()
+    entry.entry_id = "test_entry"
+    entry.title = "General"
+    entry.data = {CONF_STORAGE_KEY: "simple_device_creator.test_entry", CONF_STORAGE_VERSION: 1}
+    entry.options = {}
+    runtime = HubRuntime(MagicMock(), _entry_fingerprint(entry))
+    hass.data = {DOMAIN: {entry.entry_id: runtime}}
+    entry.title = "Living Room"
+
+    with patch("custom_components.simple_device_creator._async_reconcile_entry") as mock_reconcile:
+        await async_reload_entry(hass, entry)
+
+    mock_reconcile.assert_not_called()
+    hass.config_entries.async_reload.assert_not_called()
+
+    entry.options = {"changed": True}
+    with patch("custom_components.simple_device_creator._async_reconcile_entry") as mock_reconcile:
+        await async_reload_entry(hass, entry)
+
+    mock_reconcile.assert_called_once_with(hass, entry, runtime)
+    assert runtime.fingerprint == _entry_fingerprint(entry)
+
+
+@pytest.mark.asyncio
+async def test_async_reload_entry_reconciles_only_changed_devices(hub_storage):
+    """Test entry updates on a loaded hub touch only added, changed and removed devices."""
+    hass = MagicMock()
+    hass.config_entries.async_reload = AsyncMock()
+    entry = MagicMock()
+    entry.entry_id = "test_entry"
+    hass.data = {}
+    entry.data = {}
+    hub_storage["simple_device_creator.test_entry"] = {
+        "devices": [
+            {"id": "device-1", "name": "Device 1", "sw_version": "2.0", "entity_ids": []},
+            {"id": "device-2", "name": "Device 2", "entity_ids": []},
+            {"id": "device-4", "name": "Device 4", "entity_ids": []},
+        ]
+    }
+    runtime = HubRuntime(
+        await async_get_hub_store(hass, entry),
+        "previous",
+        as_records(
+            [
+                {"id": "device-1", "name": "Device 1", "sw_version": "1.0", "entity_ids": []},
+                {"id": "device-2", "name": "Device 2", "entity_ids": []},
+                {"id": "device-3", "name": "Device 3", "entity_ids": []},
+            ]
+        ),
+        {"device-1": "registry-device-1", "device-2": "registry-device-2", "device-3": "registry-device-3"},
+    )
+    hass.data[DOMAIN][entry.entry_id] = runtime
+
+    with patch("custom_components.simple_device_creator.dr.async_get") as mock_device_get, \
+         patch("custom_components.simple_device_creator.er.async_get"):
+        device_reg = MagicMock()
+        removed_device = MagicMock()
+        removed_device.id = "registry-device-3"
+        removed_device.config_entries = {entry.entry_id}
+
+        device_reg.async_get.side_effect = {"registry-device-3": removed_device}.get
+        device_reg.async_get_device.return_value = None
+        mock_device_get.return_value = device_reg
+
+        await async_reload_entry(hass, entry)
+
+    hass.config_entries.async_reload.assert_not_called()
+    created_ids = [
+        call.kwargs["identifiers"] for call in device_reg.async_get_or_create.call_args_list
+    ]
+    assert created_ids == [{(DOMAIN, "device-1")}, {(DOMAIN, "device-4")}]
+    device_reg.async_remove_device.assert_called_once_with("registry-device-3")
+    hass.config_entries.async_update_entry.assert_not_called()
+    device_reg.async_get_device.assert_not_called()
+    assert runtime.devices[2]["id"] == "device-4"
+    assert runtime.registry_device_ids.keys() == {"device-1", "device-2", "device-4"}
+
+
+@pytest.mark.asyncio
+async def test_async_reload_entry_links_only_new_entities(hub_storage):
+    """Test a link-only change attaches the new entity without rewriting the device."""
+    hass = MagicMock()
+    entry = MagicMock()
+    entry.entry_id = "test_entry"
+    hass.data = {}
+    entry.data = {}
+    hub_storage["simple_device_creator.test_entry"] = {
+        "devices": [
+            {"id": "device-1", "name": "Device 1", "entity_ids": ["sensor.old", "sensor.new"]}
+        ]
+    }
+    hass.data[DOMAIN] = {
+        entry.entry_id: HubRuntime(
+            await async_get_hub_store(hass, entry),
+            "previous",
+            as_records([{"id": "device-1", "name": "Device 1", "entity_ids": ["sensor.old"]}]),
+            {"device-1": "registry-device-id"},
+        )
+    }
+
+    with patch("custom_components.simple_device_creator.dr.async_get") as mock_device_get, \
+         patch("custom_components.simple_device_creator.er.async_get") as mock_entity_get:
+        device_reg = MagicMock()
+        registry_device = MagicMock()
+        registry_device.id = "registry-device-id"
+        device_reg.async_get_device.return_value = registry_device
+        mock_device_get.return_value = device_reg
+
+        entity_reg = MagicMock()
+        entity_entry = MagicMock()
+        entity_entry.device_id = None
+        entity_reg.async_get.return_value = entity_entry
+        mock_entity_get.return_value = entity_reg
+
+        await async_reload_entry(hass, entry)
+
+    device_reg.async_get_or_create.assert_not_called()
+    device_reg.async_get_device.assert_not_called()
+    entity_reg.async_get.assert_called_once_with("sensor.new")
+    entity_reg.async_update_entity.assert_called_once_with(
+        "sensor.new", device_id="registry-device-id"
+    )
+
+
+@pytest.mark.asyncio
+async def test_async_reload_entry_keeps_devices_moved_to_another_hub(hub_storage):
+    """Test removing a moved device from the source hub keeps its registry entry."""
+    hass = MagicMock()
+    entry = MagicMock()
+    entry.entry_id = "source_entry"
+    hass.data = {}
+    entry.data = {}
+    hub_storage["simple_device_creator.source_entry"] = {"devices": []}
+    hass.data[DOMAIN] = {
+        entry.entry_id: HubRuntime(
+            await async_get_hub_store(hass, entry),
+            "previous",
+            as_records([{"id": "device-1", "name": "Device 1"}]),
+            {"device-1": "registry-device-id"},
+        )
+    }
+
+    with patch("custom_components.simple_device_creator.dr.async_get") as mock_device_get, \
+         patch("custom_components.simple_device_creator.er.async_get"):
+        device_reg = MagicMock()
+        moved_device = MagicMock()
+        moved_device.id = "registry-device-id"
+        moved_device.config_entries = {"target_entry"}
+        device_reg.async_get.return_value = moved_device
+        mock_device_get.return_value = device_reg
+
+        await async_reload_entry(hass, entry)
+
+    device_reg.async_get.assert_called_once_with("registry-device-id")
+    device_reg.async_remove_device.assert_not_called()
@@ -9,7 +9,7 @@ from custom_components.simple_device_creator.const import CONF_NAME
 
 
 @pytest.mark.asyncio
-async def test_startup_sync_name_from_registry_updates_device_only():
+async def test_startup_sync_name_from_registry_updates_device_only(hub_storage):
     """Test that startup sync updates only the matching device name."""
     hass = MagicMock()
     hass.data = {}
@@ -19,8 +19,9 @@ async def test_startup_sync_name_from_registry_updates_device_only():
     entry = MagicMock()
     entry.entry_id = "entry_123"
     entry.title = "Kitchen"
-    entry.version = 2
-    entry.data = {
+    entry.version = 3
+    entry.data = {}
+    hub_storage["simple_device_creator.entry_123"] = {
         "devices": [
             {"id": "dev_123", CONF_NAME: "Old Name"},
             {"id": "dev_456", CONF_NAME: "Other Device"},
@@ -37,20 +38,17 @@ async def test_startup_sync_name_from_registry_updates_device_only():
 
         renamed_device = MagicMock()
         renamed_device.id = "reg_dev_123"
+        renamed_device.identifiers = {("simple_device_creator", "dev_123")}
         renamed_device.name_by_user = "New UI Name"
 
-        def async_get_device_side_effect(*, identifiers):
-            if identifiers == {("simple_device_creator", "dev_123")}:
-                return renamed_device
-            return None
+        mock_entries.return_value = [renamed_device]
 
-        device_reg.async_get_device.side_effect = async_get_device_side_effect
-        mock_entries.return_value = []
+        device_reg.devices.values.return_value = [renamed_device]
 
         await async_setup_entry(hass, entry)
 
-    call_kwargs = hass.config_entries.async_update_entry.call_args.kwargs
-    assert "title" not in call_kwargs
-    assert call_kwargs["data"]["devices"][0][CONF_NAME] == "New UI Name"
-    assert call_kwargs["data"]["devices"][1][CONF_NAME] == "Other Device"
+    devices = hub_storage["simple_device_creator.entry_123"]["devices"]
+    assert devices[0][CONF_NAME] == "New UI Name"
+    assert devices[1][CONF_NAME] == "Other Device"
+    hass.config_entries.async_update_entry.assert_not_called()
     device_reg.async_update_device.assert_called_with("reg_dev_123", name_by_user=None)
\ No newline at end of file
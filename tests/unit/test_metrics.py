@@ -0,0 +1,66 @@
+"""Test the hub metrics."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from custom_components.simple_device_creator.const import DATA_METRICS, DOMAIN
+from custom_components.simple_device_creator.metrics import (
+    METRIC_ENTITY_HANDLER,
+    LatencyHistogram,
+    async_get_hub_metrics,
+    async_remove_hub_metrics,
+    async_update_entry,
+)
+
+
+def test_histogram_counts_durations_per_bucket():
+    """Test durations land in the first bucket whose bound they do not exceed."""
+    histogram = LatencyHistogram()
+
+    for seconds in (0.00005, 0.0001, 0.003, 2.0):
+        histogram.record(seconds)
+
+    result = histogram.as_dict()
+    assert result["count"] == 4
+    assert result["last_ms"] == result["max_ms"] == 2000.0
+    assert result["buckets"]["le_0.1ms"] == 2
+    assert result["buckets"]["le_5ms"] == 1
+    assert result["buckets"]["over"] == 1
+    assert sum(result["buckets"].values()) == 4
+
+
+def test_timed_handler_records_every_call():
+    """Test wrapped handlers pass their arguments through and are timed even when they fail."""
+    hass = MagicMock()
+    hass.data = {}
+    metrics = async_get_hub_metrics(hass, "entry-1")
+    handler = MagicMock(side_effect=[None, ValueError])
+    timed_handler = metrics.async_timed(METRIC_ENTITY_HANDLER, handler)
+
+    timed_handler("event", "device-1")
+    with pytest.raises(ValueError):
+        timed_handler("event", "device-2")
+
+    handler.assert_called_with("event", "device-2")
+    assert metrics.durations[METRIC_ENTITY_HANDLER].count == 2
+    assert async_get_hub_metrics(hass, "entry-1") is metrics
+
+
+def test_update_entry_counts_only_changes():
+    """Test config entry writes are counted when the update changed the entry."""
+    hass = MagicMock()
+    hass.data = {}
+    entry = MagicMock()
+    entry.entry_id = "entry-1"
+    hass.config_entries.async_update_entry.side_effect = [True, False]
+
+    assert async_update_entry(hass, entry, title="Kitchen")
+    assert not async_update_entry(hass, entry, title="Kitchen")
+
+    hass.config_entries.async_update_entry.assert_called_with(entry, title="Kitchen")
+    assert async_get_hub_metrics(hass, "entry-1").entry_writes == 1
+
+    async_remove_hub_metrics(hass, "entry-1")
+
+    assert hass.data[DOMAIN][DATA_METRICS] == {}
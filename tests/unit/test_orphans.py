@@ -0,0 +1,138 @@
+"""Test the orphan entity index."""
+
+from unittest.mock import MagicMock
+
+from homeassistant.core import Event
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.simple_device_creator.const import DATA_ORPHAN_INDEX, DOMAIN
+from custom_components.simple_device_creator.orphans import (
+    async_get_orphan_index,
+    async_release_orphan_index,
+)
+
+
+def _registry_entry(entity_id, device_id=None):
+    """Return a mock entity registry entry."""
+    entry = MagicMock()
+    entry.entity_id = entity_id
+    entry.device_id = device_id
+    return entry
+
+
+def _event(data):
+    """Return an entity registry updated event."""
+    return Event(er.EVENT_ENTITY_REGISTRY_UPDATED, data)
+
+
+def test_index_is_built_sorted_once(build_orphan_index):
+    """Test the index lists only orphans, sorted, and is shared by later lookups."""
+    hass, _entries, orphan_index = build_orphan_index(
+        [
+            _registry_entry("sensor.zulu"),
+            _registry_entry("sensor.linked", "device-1"),
+            _registry_entry("light.alpha"),
+        ]
+    )
+
+    assert orphan_index.entity_ids == ["light.alpha", "sensor.zulu"]
+    assert "sensor.zulu" in orphan_index
+    assert "sensor.linked" not in orphan_index
+    assert async_get_orphan_index(hass) is orphan_index
+    assert hass.bus.async_listen.call_count == 1
+
+
+def test_index_follows_registry_events(build_orphan_index):
+    """Test created, linked, renamed and removed entities update the index in place."""
+    _hass, entries, orphan_index = build_orphan_index(
+        [_registry_entry("sensor.bravo"), _registry_entry("sensor.delta", "device-1")]
+    )
+
+    entries["sensor.alpha"] = _registry_entry("sensor.alpha")
+    orphan_index.async_entity_registry_updated(
+        _event({"action": "create", "entity_id": "sensor.alpha"})
+    )
+    entries["sensor.delta"].device_id = None
+    orphan_index.async_entity_registry_updated(
+        _event({"action": "update", "entity_id": "sensor.delta", "changes": {"device_id": "device-1"}})
+    )
+    assert orphan_index.entity_ids == ["sensor.alpha", "sensor.bravo", "sensor.delta"]
+
+    entries["sensor.charlie"] = entries.pop("sensor.bravo")
+    entries["sensor.charlie"].entity_id = "sensor.charlie"
+    orphan_index.async_entity_registry_updated(
+        _event(
+            {
+                "action": "update",
+                "entity_id": "sensor.charlie",
+                "old_entity_id": "sensor.bravo",
+                "changes": {"entity_id": "sensor.bravo"},
+            }
+        )
+    )
+    entries["sensor.alpha"].device_id = "device-2"
+    orphan_index.async_entity_registry_updated(
+        _event({"action": "update", "entity_id": "sensor.alpha", "changes": {"device_id": None}})
+    )
+    orphan_index.async_entity_registry_updated(
+        _event({"action": "remove", "entity_id": "sensor.delta"})
+    )
+
+    assert orphan_index.entity_ids == ["sensor.charlie"]
+    assert len(orphan_index) == 1
+
+
+def test_event_filter_skips_updates_that_keep_the_device(build_orphan_index):
+    """Test updates that cannot change orphan status never schedule the listener."""
+    _hass, _entries, orphan_index = build_orphan_index([])
+
+    assert orphan_index._async_event_filter({"action": "create", "entity_id": "sensor.one"})
+    assert orphan_index._async_event_filter(
+        {"action": "update", "entity_id": "sensor.one", "changes": {"device_id": None}}
+    )
+    assert not orphan_index._async_event_filter(
+        {"action": "update", "entity_id": "sensor.one", "changes": {"name": "Old"}}
+    )
+
+
+def test_release_stops_listening(build_orphan_index):
+    """Test releasing the index removes its bus listener."""
+    hass, _entries, _orphan_index = build_orphan_index([])
+    unsub_listener = hass.bus.async_listen.return_value
+
+    async_release_orphan_index(hass)
+
+    unsub_listener.assert_called_once_with()
+    assert DATA_ORPHAN_INDEX not in hass.data[DOMAIN]
+
+
+def test_search_matches_word_prefixes_by_domain_and_pages(build_orphan_index):
+    """Test searches match every query word by prefix and return bounded pages."""
+    _hass, entries, orphan_index = build_orphan_index(
+        [
+            _registry_entry("sensor.kitchen_temperature"),
+            _registry_entry("sensor.kitchen_humidity"),
+            _registry_entry("light.kitchen_ceiling"),
+            _registry_entry("sensor.garage_temperature"),
+        ]
+    )
+
+    assert orphan_index.search("kit temp") == (["sensor.kitchen_temperature"], 1)
+    assert orphan_index.search("KITCHEN", domain="sensor") == (
+        ["sensor.kitchen_humidity", "sensor.kitchen_temperature"],
+        2,
+    )
+    assert orphan_index.search(domain="sensor", offset=1, limit=1) == (
+        ["sensor.kitchen_humidity"],
+        3,
+    )
+    assert orphan_index.search("attic") == ([], 0)
+    assert orphan_index.domains == ["light", "sensor"]
+
+    entries["light.kitchen_ceiling"].device_id = "device-1"
+    orphan_index.async_entity_registry_updated(
+        _event({"action": "update", "entity_id": "light.kitchen_ceiling", "changes": {"device_id": None}})
+    )
+
+    assert orphan_index.search("ceil") == ([], 0)
+    assert orphan_index.domains == ["sensor"]
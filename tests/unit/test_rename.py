@@ -3,14 +3,21 @@
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 from homeassistant.core import Event
 from homeassistant.helpers import device_registry as dr
 
 from custom_components.simple_device_creator import async_setup_entry
-from custom_components.simple_device_creator.const import CONF_NAME, DOMAIN
+from custom_components.simple_device_creator.const import (
+    CONF_NAME,
+    DATA_DEVICE_INDEX,
+    DATA_DISPATCHER,
+    DATA_STORES,
+    DOMAIN,
+)
 
 
-async def _setup_entry_and_get_listener():
+async def _setup_entry_and_get_listener(hub_storage):
     """Set up the integration and return the registered device listener."""
     hass = MagicMock()
     hass.data = {}
@@ -19,8 +26,9 @@ async def _setup_entry_and_get_listener():
     entry = MagicMock()
     entry.entry_id = "test_entry"
     entry.title = "General"
-    entry.version = 2
-    entry.data = {
+    entry.version = 3
+    entry.data = {}
+    hub_storage["simple_device_creator.test_entry"] = {
         "devices": [
             {"id": "device_123", CONF_NAME: "Device 123"},
             {"id": "device_456", CONF_NAME: "Device 456"},
@@ -38,15 +46,19 @@ async def _setup_entry_and_get_listener():
         device_reg = MagicMock()
         mock_async_get.return_value = device_reg
         device_reg.async_get_device.return_value = None
+        device_reg.async_get_or_create.side_effect = lambda **kwargs: MagicMock(
+            id="reg_device_id" if kwargs["identifiers"] == {(DOMAIN, "device_456")} else "reg_other_id"
+        )
         mock_entity_get.return_value = MagicMock()
         mock_entries.return_value = []
 
         await async_setup_entry(hass, entry)
 
+    dispatcher = hass.data[DOMAIN][DATA_DISPATCHER]
     listener_callback = None
     for call in hass.bus.async_listen.call_args_list:
         args, _ = call
-        if args[0] == dr.EVENT_DEVICE_REGISTRY_UPDATED:
+        if args[0] == dr.EVENT_DEVICE_REGISTRY_UPDATED and args[1] == dispatcher.async_device_registry_updated:
             listener_callback = args[1]
             break
 
@@ -55,9 +67,9 @@ async def _setup_entry_and_get_listener():
 
 
 @pytest.mark.asyncio
-async def test_device_rename_sync_listener_updates_only_matching_device():
+async def test_device_rename_sync_listener_updates_only_matching_device(hub_storage):
     """Test that renaming a device updates only that device in stored data."""
-    hass, _entry, device_reg, listener_callback = await _setup_entry_and_get_listener()
+    hass, _entry, device_reg, listener_callback = await _setup_entry_and_get_listener(hub_storage)
 
     event = Event(
         dr.EVENT_DEVICE_REGISTRY_UPDATED,
@@ -71,20 +83,83 @@ async def test_device_rename_sync_listener_updates_only_matching_device():
     device_entry.name_by_user = "Renamed Device"
 
     device_reg.async_get.return_value = device_entry
+    hass.data[DOMAIN][DATA_DEVICE_INDEX].async_device_registry_updated(
+        Event(dr.EVENT_DEVICE_REGISTRY_UPDATED, {"action": "create", "device_id": "reg_device_id"})
+    )
 
     listener_callback(event)
+    device_reg.async_update_device.assert_not_called()
+    assert hub_storage["simple_device_creator.test_entry"]["devices"][1][CONF_NAME] == "Device 456"
+
+    with patch("custom_components.simple_device_creator.dr.async_get", return_value=device_reg), \
+         patch("custom_components.simple_device_creator.er.async_get"):
+        hass.data[DOMAIN][DATA_STORES]["test_entry"].write_buffer.async_flush()
+
+    devices = hub_storage["simple_device_creator.test_entry"]["devices"]
+    assert devices[0][CONF_NAME] == "Device 123"
+    assert devices[1][CONF_NAME] == "Renamed Device"
+    assert device_reg.async_get_or_create.call_args.kwargs["name"] == "Renamed Device"
+    device_reg.async_update_device.assert_called_once_with("reg_device_id", name_by_user=None)
+    hass.config_entries.async_update_entry.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_device_rename_is_stored_when_home_assistant_stops(hub_storage):
+    """Test a pending rename is flushed by the stop event instead of waiting for the debouncer."""
+    hass, _entry, device_reg, listener_callback = await _setup_entry_and_get_listener(hub_storage)
+    stop_listener = next(
+        call.args[1]
+        for call in hass.bus.async_listen.call_args_list
+        if call.args[0] == EVENT_HOMEASSISTANT_STOP
+    )
+    device_entry = MagicMock()
+    device_entry.id = "reg_device_id"
+    device_entry.identifiers = {(DOMAIN, "device_456")}
+    device_entry.config_entries = {"test_entry"}
+    device_entry.name_by_user = "Renamed Device"
+    device_reg.async_get.return_value = device_entry
+    hass.data[DOMAIN][DATA_DEVICE_INDEX].async_device_registry_updated(
+        Event(dr.EVENT_DEVICE_REGISTRY_UPDATED, {"action": "create", "device_id": "reg_device_id"})
+    )
+    listener_callback(
+        Event(dr.EVENT_DEVICE_REGISTRY_UPDATED, {"action": "update", "device_id": "reg_device_id"})
+    )
+
+    with patch("custom_components.simple_device_creator.dr.async_get", return_value=device_reg), \
+         patch("custom_components.simple_device_creator.er.async_get"):
+        stop_listener(Event(EVENT_HOMEASSISTANT_STOP))
+
+    assert hub_storage["simple_device_creator.test_entry"]["devices"][1][CONF_NAME] == "Renamed Device"
+    assert hass.data[DOMAIN][DATA_STORES]["test_entry"].write_buffer.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_device_rename_to_the_stored_name_clears_the_user_name(hub_storage):
+    """Test a user name equal to the stored name is cleared right away, as no reconcile follows."""
+    hass, _entry, device_reg, listener_callback = await _setup_entry_and_get_listener(hub_storage)
+    device_entry = MagicMock()
+    device_entry.id = "reg_device_id"
+    device_entry.identifiers = {(DOMAIN, "device_456")}
+    device_entry.config_entries = {"test_entry"}
+    device_entry.name_by_user = "Device 456"
+    device_reg.async_get.return_value = device_entry
+    hass.data[DOMAIN][DATA_DEVICE_INDEX].async_device_registry_updated(
+        Event(dr.EVENT_DEVICE_REGISTRY_UPDATED, {"action": "create", "device_id": "reg_device_id"})
+    )
+
+    listener_callback(
+        Event(dr.EVENT_DEVICE_REGISTRY_UPDATED, {"action": "update", "device_id": "reg_device_id"})
+    )
 
-    call_kwargs = hass.config_entries.async_update_entry.call_args.kwargs
-    assert "title" not in call_kwargs
-    assert call_kwargs["data"]["devices"][0][CONF_NAME] == "Device 123"
-    assert call_kwargs["data"]["devices"][1][CONF_NAME] == "Renamed Device"
-    device_reg.async_update_device.assert_called_with("reg_device_id", name_by_user=None)
+    device_reg.async_update_device.assert_called_once_with("reg_device_id", name_by_user=None)
+    hass.data[DOMAIN][DATA_STORES]["test_entry"].write_buffer.async_flush()
+    assert hass.data[DOMAIN][DATA_STORES]["test_entry"].write_buffer.dropped == 1
 
 
 @pytest.mark.asyncio
-async def test_device_rename_listener_ignores_irrelevant_events():
+async def test_device_rename_listener_ignores_irrelevant_events(hub_storage):
     """Test that listener ignores invalid or unrelated registry events."""
-    hass, _entry, device_reg, listener_callback = await _setup_entry_and_get_listener()
+    hass, _entry, device_reg, listener_callback = await _setup_entry_and_get_listener(hub_storage)
 
     listener_callback(Event(dr.EVENT_DEVICE_REGISTRY_UPDATED, {"action": "create"}))
     listener_callback(Event(dr.EVENT_DEVICE_REGISTRY_UPDATED, {"action": "update"}))
@@ -107,9 +182,9 @@ async def test_device_rename_listener_ignores_irrelevant_events():
 
 
 @pytest.mark.asyncio
-async def test_device_rename_listener_ignores_missing_internal_identifier():
+async def test_device_rename_listener_ignores_missing_internal_identifier(hub_storage):
     """Test that listener ignores registry devices without integration identifiers."""
-    hass, _entry, device_reg, listener_callback = await _setup_entry_and_get_listener()
+    hass, _entry, device_reg, listener_callback = await _setup_entry_and_get_listener(hub_storage)
 
     device_entry = MagicMock()
     device_entry.id = "reg_device_id"
@@ -128,9 +203,9 @@ async def test_device_rename_listener_ignores_missing_internal_identifier():
 
 
 @pytest.mark.asyncio
-async def test_device_rename_listener_ignores_updates_without_name_by_user():
+async def test_device_rename_listener_ignores_updates_without_name_by_user(hub_storage):
     """Test that listener ignores updates when the registry entry has no user rename."""
-    hass, _entry, device_reg, listener_callback = await _setup_entry_and_get_listener()
+    hass, _entry, device_reg, listener_callback = await _setup_entry_and_get_listener(hub_storage)
 
     device_entry = MagicMock()
     device_entry.id = "reg_device_id"
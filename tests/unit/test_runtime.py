@@ -0,0 +1,73 @@
+"""Test the hub runtime state."""
+
+import dataclasses
+from unittest.mock import MagicMock
+
+from custom_components.simple_device_creator.const import CONF_NAME, DOMAIN
+from custom_components.simple_device_creator.runtime import (
+    HubRuntime,
+    async_get_hub_runtime,
+    linked_entity_targets,
+)
+from custom_components.simple_device_creator.storage import HubStore, as_records
+
+
+def test_linked_entity_targets_ignores_devices_without_ids():
+    """Test linked entities map to internal device IDs and invalid devices are skipped."""
+    targets = linked_entity_targets(
+        [
+            {"id": "device-1", "entity_ids": ["sensor.one", "sensor.two"]},
+            {"entity_ids": ["sensor.skip"]},
+            {"id": "device-2", "entity_ids": []},
+        ]
+    )
+
+    assert targets == {"sensor.one": "device-1", "sensor.two": "device-1"}
+
+
+def test_runtime_shares_store_indexes_and_tracks_links():
+    """Test the runtime reads the store indexes and replaces its link map on updates."""
+    hass = MagicMock()
+    hass.data = {}
+    hub_store = HubStore(hass, f"{DOMAIN}.entry-1")
+    hub_store.devices = [{"id": "device-1", CONF_NAME: "Plug"}]
+    runtime = HubRuntime(hub_store, "fingerprint")
+    links = runtime.linked_entities
+
+    runtime.async_set_devices(
+        as_records([{"id": "device-1", CONF_NAME: "Plug", "entity_ids": ["switch.plug"]}])
+    )
+
+    assert runtime.name_index is hub_store.name_index
+    assert runtime.device_options() == ([{"value": "device-1", "label": "Plug"}], 1)
+    assert runtime.linked_entities == {"switch.plug": "device-1"}
+    assert links == {}
+
+    assert async_get_hub_runtime(hass, "entry-1") is None
+    hass.data[DOMAIN] = {"entry-1": runtime}
+    assert async_get_hub_runtime(hass, "entry-1") is runtime
+
+
+def test_runtime_replaces_links_of_changed_devices_only():
+    """Test replacing single devices updates their links in place and reports the entities."""
+    hub_store = HubStore(MagicMock(), f"{DOMAIN}.entry-1")
+    devices = as_records(
+        [
+            {"id": "device-1", CONF_NAME: "Plug", "entity_ids": ["switch.plug", "sensor.power"]},
+            {"id": "device-2", CONF_NAME: "Lamp", "entity_ids": ["light.lamp"]},
+            {"id": "device-3", CONF_NAME: "Fan", "entity_ids": ["fan.fan"]},
+        ]
+    )
+    runtime = HubRuntime(hub_store, "fingerprint")
+    runtime.async_set_devices(devices)
+    links = runtime.linked_entities
+    updated_devices = list(devices)
+    updated_devices[0] = dataclasses.replace(devices[0], entity_ids=("switch.plug", "sensor.energy"))
+    updated_devices[2] = dataclasses.replace(devices[2], name="Ceiling Fan")
+
+    relinked_entity_ids = runtime.async_replace_devices(updated_devices, [0, 2])
+
+    assert relinked_entity_ids == {"switch.plug", "sensor.power", "sensor.energy"}
+    assert runtime.linked_entities is links
+    assert links == linked_entity_targets(updated_devices)
+    assert runtime.devices is updated_devices
@@ -0,0 +1,305 @@
+"""Test the integration services."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+from homeassistant.core import ServiceCall
+from homeassistant.exceptions import ServiceValidationError
+import pytest
+
+from custom_components.simple_device_creator.const import (
+    CONF_ENTITY_IDS,
+    CONF_EXTERNAL_KEY,
+    CONF_MANUFACTURER,
+    CONF_MODEL,
+    CONF_NAME,
+    CONF_YAML_KEY,
+    DATA_DISPATCHER,
+    DATA_STORES,
+    DOMAIN,
+    SERVICE_EXPORT_DEVICES,
+    SERVICE_IMPORT_DEVICES,
+)
+from custom_components.simple_device_creator.services import (
+    EXPORT_DEVICES_SCHEMA,
+    FORMAT_YAML,
+    IMPORT_DEVICES_SCHEMA,
+    IMPORT_MODE_SYNC,
+    _async_export_devices,
+    _async_import_devices,
+    async_import_devices,
+    async_setup_services,
+)
+
+STORAGE_KEY = f"{DOMAIN}.entry-1"
+
+
+def _build_hass(hub_storage, devices):
+    """Return a mock Home Assistant instance with one hub and its stored devices."""
+    hass = MagicMock()
+    hass.data = {}
+    entry = MagicMock()
+    entry.entry_id = "entry-1"
+    entry.domain = DOMAIN
+    entry.title = "Hub"
+    entry.data = {}
+    hass.config_entries.async_get_entry.side_effect = {"entry-1": entry}.get
+    hass.config.is_allowed_path.return_value = True
+
+    async def _async_add_executor_job(target, *args):
+        return target(*args)
+
+    hass.async_add_executor_job = _async_add_executor_job
+    hub_storage[STORAGE_KEY] = {"devices": devices}
+    return hass
+
+
+def _call(data):
+    """Return an import service call with validated data."""
+    return ServiceCall(DOMAIN, SERVICE_IMPORT_DEVICES, IMPORT_DEVICES_SCHEMA(data))
+
+
+@pytest.mark.asyncio
+async def test_import_devices_creates_updates_and_rejects_rows(hub_storage):
+    """Test CSV rows create new devices, update same-named ones, and report rejects."""
+    hass = _build_hass(
+        hub_storage,
+        [{"id": "dev-1", CONF_NAME: "Kitchen Plug", CONF_MANUFACTURER: "Old", CONF_ENTITY_IDS: []}],
+    )
+    payload = "\n".join(
+        [
+            "name,manufacturer,model,entity_ids",
+            " kitchen plug ,Acme,P1,switch.kitchen_plug",
+            "Hall Sensor,Acme,,",
+            ",Acme,S1,",
+            "HALL SENSOR,Other,,",
+            "Porch Light,Acme,L1,not-an-entity",
+        ]
+    )
+
+    response = await _async_import_devices(hass, _call({"entry_id": "entry-1", "payload": payload, "format": "csv"}))
+
+    assert response["created"] == 1
+    assert response["updated"] == 1
+    assert response["rejected"] == 3
+    assert [error["row"] for error in response["errors"]] == [3, 4, 5]
+    devices = hub_storage[STORAGE_KEY]["devices"]
+    assert devices[0] == {
+        "id": "dev-1",
+        CONF_NAME: "Kitchen Plug",
+        CONF_MANUFACTURER: "Acme",
+        CONF_MODEL: "P1",
+        CONF_ENTITY_IDS: ["switch.kitchen_plug"],
+    }
+    assert devices[1][CONF_NAME] == "Hall Sensor"
+    assert devices[1][CONF_MODEL] == ""
+
+
+@pytest.mark.asyncio
+async def test_import_devices_commits_in_chunks_and_skips_unchanged(hub_storage, tmp_path):
+    """Test a YAML file is committed one chunk at a time and a re-import changes nothing."""
+    hass = _build_hass(hub_storage, [])
+    import_file = tmp_path / "devices.yaml"
+    import_file.write_text(
+        "devices:\n" + "".join(f"  - name: Device {index}\n    model: 1.0\n" for index in range(5)),
+        encoding="utf-8",
+    )
+    call = _call({"entry_id": "entry-1", "path": str(import_file)})
+
+    with patch("custom_components.simple_device_creator.services.IMPORT_CHUNK_SIZE", 2):
+        response = await _async_import_devices(hass, call)
+        hub_store = hass.data[DOMAIN][DATA_STORES]["entry-1"]
+        with patch.object(hub_store, "async_set_devices") as mock_set_devices:
+            second_response = await _async_import_devices(hass, call)
+
+    assert response["created"] == 5
+    assert [device[CONF_MODEL] for device in hub_storage[STORAGE_KEY]["devices"]] == ["1.0"] * 5
+    assert hub_store._store.async_delay_save.call_count == 3
+    assert second_response["unchanged"] == 5
+    mock_set_devices.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_import_devices_rejects_unknown_hub_and_disallowed_path(hub_storage):
+    """Test the service refuses unknown hubs and paths outside the allowed directories."""
+    hass = _build_hass(hub_storage, [])
+    hass.config.is_allowed_path.return_value = False
+
+    with pytest.raises(ServiceValidationError):
+        await _async_import_devices(hass, _call({"entry_id": "missing", "payload": []}))
+    with pytest.raises(ServiceValidationError):
+        await _async_import_devices(hass, _call({"entry_id": "entry-1", "path": "/etc/devices.csv"}))
+
+
+@pytest.mark.asyncio
+async def test_import_devices_refuses_yaml_hubs(hub_storage):
+    """Test the service refuses hubs declared in YAML, while the YAML sync still imports."""
+    hass = _build_hass(hub_storage, [])
+    entry = hass.config_entries.async_get_entry("entry-1")
+    entry.data = {CONF_YAML_KEY: "hub"}
+    payload = [{CONF_NAME: "Plug"}]
+
+    with pytest.raises(ServiceValidationError):
+        await _async_import_devices(hass, _call({"entry_id": "entry-1", "payload": payload}))
+    response = await async_import_devices(hass, entry, payload, FORMAT_YAML, False, IMPORT_MODE_SYNC)
+
+    assert response["created"] == 1
+
+
+def test_setup_services_registers_import_devices():
+    """Test the import service is registered with a response."""
+    hass = MagicMock()
+
+    async_setup_services(hass)
+
+    args, kwargs = hass.services.async_register.call_args
+    assert args[:2] == (DOMAIN, SERVICE_IMPORT_DEVICES)
+    assert kwargs["schema"] is IMPORT_DEVICES_SCHEMA
+
+
+@pytest.mark.asyncio
+async def test_export_devices_streams_filtered_json_lines(hub_storage, tmp_path):
+    """Test the export writes one JSON line per matching device and imports back."""
+    hass = _build_hass(
+        hub_storage,
+        [
+            {"id": "dev-1", CONF_NAME: "Plug", CONF_MANUFACTURER: "Acme", CONF_MODEL: "P1", CONF_ENTITY_IDS: ["switch.plug"]},
+            {"id": "dev-2", CONF_NAME: "Lamp", CONF_MANUFACTURER: "Other", CONF_MODEL: "L1", CONF_ENTITY_IDS: []},
+            {"id": "dev-3", CONF_NAME: "Socket", CONF_MANUFACTURER: "acme", CONF_MODEL: "P2", CONF_ENTITY_IDS: []},
+        ],
+    )
+    entry = hass.config_entries.async_get_entry("entry-1")
+    hass.config_entries.async_entries.return_value = [entry]
+    export_path = tmp_path / "devices.jsonl"
+    call = ServiceCall(
+        DOMAIN,
+        SERVICE_EXPORT_DEVICES,
+        EXPORT_DEVICES_SCHEMA({"path": str(export_path), "manufacturer": "ACME"}),
+    )
+
+    with patch("custom_components.simple_device_creator.services.EXPORT_CHUNK_SIZE", 1), \
+         patch.object(hass, "async_add_executor_job", wraps=hass.async_add_executor_job) as mock_executor_job:
+        response = await _async_export_devices(hass, call)
+
+    lines = [json.loads(line) for line in export_path.read_text(encoding="utf-8").splitlines()]
+    assert response == {"path": str(export_path), "hubs": 1, "devices": 2}
+    assert [line["id"] for line in lines] == ["dev-1", "dev-3"]
+    assert lines[0]["entry_id"] == "entry-1"
+    assert lines[0][CONF_ENTITY_IDS] == ["switch.plug"]
+    assert mock_executor_job.call_count == 5
+    assert not (tmp_path / "devices.jsonl.tmp").exists()
+
+    import_response = await _async_import_devices(hass, _call({"entry_id": "entry-1", "path": str(export_path)}))
+
+    assert import_response["created"] == 0
+    assert import_response["rejected"] == 0
+
+
+@pytest.mark.asyncio
+async def test_import_devices_sync_applies_only_the_diff(hub_storage):
+    """Test sync mode matches by external key, deletes missing devices, and is idempotent."""
+    hass = _build_hass(
+        hub_storage,
+        [
+            {"id": "dev-a", CONF_NAME: "Plug", CONF_MANUFACTURER: "Acme", CONF_MODEL: "P1", "sw_version": "", "hw_version": "", CONF_ENTITY_IDS: ["switch.plug"]},
+            {"id": "dev-b", CONF_NAME: "Lamp", CONF_MANUFACTURER: "Acme", CONF_MODEL: "L1", "sw_version": "", "hw_version": "", CONF_ENTITY_IDS: [], CONF_EXTERNAL_KEY: "lamp-1"},
+            {"id": "dev-c", CONF_NAME: "Old", CONF_MANUFACTURER: "", CONF_MODEL: "", "sw_version": "", "hw_version": "", CONF_ENTITY_IDS: []},
+        ],
+    )
+    manifest = [
+        {CONF_NAME: "Plug", CONF_MANUFACTURER: "Acme", CONF_MODEL: "P1", CONF_ENTITY_IDS: ["switch.plug"]},
+        {CONF_NAME: "Hall Lamp", CONF_MANUFACTURER: "Acme", CONF_MODEL: "L2", CONF_EXTERNAL_KEY: "lamp-1"},
+        {CONF_NAME: "Sensor", CONF_EXTERNAL_KEY: "sensor-1"},
+        {CONF_NAME: "Sensor Copy", CONF_EXTERNAL_KEY: "sensor-1"},
+    ]
+    call = _call({"entry_id": "entry-1", "payload": manifest, "mode": "sync"})
+
+    response = await _async_import_devices(hass, call)
+    hub_store = hass.data[DOMAIN][DATA_STORES]["entry-1"]
+    with patch.object(hub_store, "async_set_devices") as mock_set_devices:
+        second_response = await _async_import_devices(hass, call)
+
+    assert {key: response[key] for key in ("created", "updated", "deleted", "unchanged", "rejected")} == {
+        "created": 1,
+        "updated": 1,
+        "deleted": 1,
+        "unchanged": 1,
+        "rejected": 1,
+    }
+    devices = {device["id"]: device for device in hub_storage[STORAGE_KEY]["devices"]}
+    assert "dev-c" not in devices
+    assert devices["dev-a"][CONF_NAME] == "Plug"
+    assert devices["dev-b"][CONF_NAME] == "Hall Lamp"
+    assert devices["dev-b"][CONF_MODEL] == "L2"
+    assert [device[CONF_EXTERNAL_KEY] for device in devices.values() if device[CONF_NAME] == "Sensor"] == ["sensor-1"]
+    assert second_response["unchanged"] == 3
+    assert second_response["created"] == second_response["updated"] == second_response["deleted"] == 0
+    mock_set_devices.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_import_devices_merge_keeps_metadata_of_blank_cells(hub_storage):
+    """Test blank cells and fields a row leaves out do not erase stored metadata when merging."""
+    hass = _build_hass(
+        hub_storage,
+        [
+            {"id": "dev-1", CONF_NAME: "Kitchen Plug", CONF_MANUFACTURER: "Acme", CONF_MODEL: "P1"},
+            {"id": "dev-2", CONF_NAME: "Hall Sensor", CONF_MANUFACTURER: "Acme", CONF_MODEL: "S1"},
+        ],
+    )
+    payload = "name,manufacturer,model\nKitchen Plug,,P2\nHall Sensor, ,\n"
+
+    response = await _async_import_devices(hass, _call({"entry_id": "entry-1", "payload": payload, "format": "csv"}))
+    await _async_import_devices(
+        hass, _call({"entry_id": "entry-1", "payload": [{CONF_NAME: "Porch Light", CONF_MODEL: ""}]})
+    )
+
+    assert response["updated"] == 1
+    assert response["unchanged"] == 1
+    devices = hub_storage[STORAGE_KEY]["devices"]
+    assert (devices[0][CONF_MANUFACTURER], devices[0][CONF_MODEL]) == ("Acme", "P2")
+    assert (devices[1][CONF_MANUFACTURER], devices[1][CONF_MODEL]) == ("Acme", "S1")
+    assert (devices[2][CONF_MANUFACTURER], devices[2][CONF_MODEL]) == ("", "")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["merge", "sync"])
+async def test_import_devices_rejects_entities_linked_elsewhere_and_repeated_keys(hub_storage, mode):
+    """Test rows linking entities of another device or repeating an external key are rejected."""
+    hass = _build_hass(
+        hub_storage,
+        [
+            {"id": "dev-1", CONF_NAME: "Plug", CONF_ENTITY_IDS: ["switch.plug"]},
+            {"id": "dev-2", CONF_NAME: "Lamp", CONF_ENTITY_IDS: ["light.lamp"]},
+        ],
+    )
+    dispatcher = MagicMock()
+    dispatcher.async_linked_entities.return_value = {
+        "switch.plug": ("entry-1", "dev-1"),
+        "light.lamp": ("entry-1", "dev-2"),
+        "sensor.other_hub": ("entry-2", "dev-9"),
+    }
+    hass.data[DOMAIN] = {DATA_DISPATCHER: dispatcher}
+    payload = [
+        {CONF_NAME: "Plug", CONF_ENTITY_IDS: ["switch.plug"]},
+        {CONF_NAME: "Lamp", CONF_ENTITY_IDS: ["light.lamp"]},
+        {CONF_NAME: "Fan", CONF_ENTITY_IDS: ["fan.fan"], CONF_EXTERNAL_KEY: "fan-1"},
+        {CONF_NAME: "Fan Copy", CONF_EXTERNAL_KEY: "fan-1"},
+        {CONF_NAME: "Heater", CONF_ENTITY_IDS: ["fan.fan"]},
+        {CONF_NAME: "Outdoor", CONF_ENTITY_IDS: ["sensor.other_hub"]},
+        {CONF_NAME: "Switch", CONF_ENTITY_IDS: ["switch.plug" if mode == "merge" else "fan.other"]},
+    ]
+
+    response = await _async_import_devices(
+        hass, _call({"entry_id": "entry-1", "payload": payload, "mode": mode})
+    )
+
+    assert response["created"] == (1 if mode == "merge" else 2)
+    assert response["errors"] == [
+        {"row": 4, "error": "duplicate external key in import"},
+        {"row": 5, "error": "fan.fan is already linked to another device"},
+        {"row": 6, "error": "sensor.other_hub is already linked to another device"},
+    ] + ([{"row": 7, "error": "switch.plug is already linked to another device"}] if mode == "merge" else [])
+    assert response["rejected"] == len(response["errors"])
+    names = [device[CONF_NAME] for device in hub_storage[STORAGE_KEY]["devices"]]
+    assert names == ["Plug", "Lamp", "Fan"] + (["Switch"] if mode == "sync" else [])
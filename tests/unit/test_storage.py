@@ -0,0 +1,286 @@
+"""Test the per-hub device storage."""
+
+import dataclasses
+from unittest.mock import MagicMock
+
+import pytest
+
+from custom_components.simple_device_creator.const import (
+    CONF_ENTITY_IDS,
+    CONF_MANUFACTURER,
+    CONF_MODEL,
+    CONF_NAME,
+    CONF_STORAGE_KEY,
+    CONF_STORAGE_VERSION,
+    DATA_STORES,
+    DOMAIN,
+)
+from custom_components.simple_device_creator.storage import (
+    STORAGE_VERSION,
+    HubStore,
+    async_get_hub_store,
+    async_remove_hub_store,
+    DeviceRecord,
+    entry_storage_data,
+    replace_device,
+)
+
+
+def _build_entry(entry_id="entry-1", data=None):
+    """Return a mock hub config entry."""
+    entry = MagicMock()
+    entry.entry_id = entry_id
+    entry.data = data or {}
+    return entry
+
+
+@pytest.mark.asyncio
+async def test_get_hub_store_loads_once_per_hub(hub_storage):
+    """Test each hub store is loaded on first use and then reused."""
+    hass = MagicMock()
+    hass.data = {}
+    hub_storage["simple_device_creator.entry-1"] = {"devices": [{"id": "dev-1"}]}
+    entry = _build_entry()
+
+    hub_store = await async_get_hub_store(hass, entry)
+    hub_storage["simple_device_creator.entry-1"] = {"devices": []}
+
+    assert await async_get_hub_store(hass, entry) is hub_store
+    assert hub_store.devices == [{"id": "dev-1"}]
+    assert hass.data[DOMAIN][DATA_STORES] == {"entry-1": hub_store}
+
+
+@pytest.mark.asyncio
+async def test_set_devices_saves_only_the_changed_hub(hub_storage):
+    """Test device changes are written to the store of their own hub only."""
+    hass = MagicMock()
+    hass.data = {}
+    first_store = await async_get_hub_store(hass, _build_entry("entry-1"))
+    second_store = await async_get_hub_store(hass, _build_entry("entry-2"))
+    listener = MagicMock()
+    remove_listener = first_store.async_add_listener(listener)
+
+    first_store.async_set_devices([{"id": "dev-1"}])
+    remove_listener()
+    first_store.async_set_devices([{"id": "dev-2"}])
+
+    listener.assert_called_once_with()
+    assert hub_storage == {"simple_device_creator.entry-1": {"devices": [{"id": "dev-2"}]}}
+    second_store._store.async_delay_save.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_name_index_follows_device_changes(hub_storage):
+    """Test duplicate names are found through the index, ignoring case and spacing."""
+    hass = MagicMock()
+    hass.data = {}
+    hub_storage["simple_device_creator.entry-1"] = {"devices": [{"id": "dev-1", CONF_NAME: "Kitchen Plug"}]}
+    hub_store = await async_get_hub_store(hass, _build_entry())
+
+    assert hub_store.name_taken(" kitchen PLUG ")
+    assert not hub_store.name_taken("Kitchen Plug", excluded_id="dev-1")
+    assert not hub_store.name_taken("Hall Sensor")
+
+    hub_store.async_set_devices([{"id": "dev-2", CONF_NAME: "Hall Sensor"}])
+
+    assert hub_store.name_index == {"hall sensor": "dev-2"}
+    assert not hub_store.name_taken("Kitchen Plug")
+
+
+def test_device_options_are_cached_until_names_change():
+    """Test the name index and selector options are rebuilt only after a device name or ID change."""
+    hub_store = HubStore(MagicMock(), "simple_device_creator.entry-1")
+    hub_store.devices = [
+        {"id": "dev-2", CONF_NAME: "beta"},
+        {"id": "dev-1", CONF_NAME: "Alpha"},
+        {"id": "dev-3", CONF_NAME: "Alpine"},
+    ]
+
+    options, total = hub_store.device_options()
+    assert [option["label"] for option in options] == ["Alpha", "Alpine", "beta"]
+    assert total == 3
+    assert hub_store.device_options("alp", limit=1) == ([{"value": "dev-1", "label": "Alpha"}], 2)
+    cached_options = hub_store._options
+    name_index = hub_store.name_index
+
+    hub_store.devices = [{**device, CONF_ENTITY_IDS: ["light.one"]} for device in hub_store.devices]
+    hub_store.device_options()
+    assert hub_store._options is cached_options
+    assert hub_store.name_index is name_index
+
+    hub_store.devices = [*hub_store.devices[:2], {"id": "dev-3", CONF_NAME: "Zulu"}]
+    assert [option["label"] for option in hub_store.device_options()[0]] == ["Alpha", "beta", "Zulu"]
+    assert hub_store.name_index == {"beta": "dev-2", "alpha": "dev-1", "zulu": "dev-3"}
+
+
+@pytest.mark.asyncio
+async def test_remove_hub_store_deletes_saved_devices(hub_storage):
+    """Test removing a hub forgets its store and deletes the saved devices."""
+    hass = MagicMock()
+    hass.data = {}
+    entry = _build_entry(data={CONF_STORAGE_KEY: "simple_device_creator.custom"})
+    hub_storage["simple_device_creator.custom"] = {"devices": []}
+    await async_get_hub_store(hass, entry)
+
+    await async_remove_hub_store(hass, entry)
+
+    assert hub_storage == {}
+    assert hass.data[DOMAIN][DATA_STORES] == {}
+
+
+def test_entry_storage_data_points_at_the_hub_store():
+    """Test the entry data keeps only the store key and schema version."""
+    assert entry_storage_data(_build_entry()) == {
+        CONF_STORAGE_KEY: "simple_device_creator.entry-1",
+        CONF_STORAGE_VERSION: STORAGE_VERSION,
+    }
+
+
+@pytest.mark.asyncio
+async def test_write_buffer_coalesces_mutations_into_one_save(hub_storage):
+    """Test queued handler changes are applied with a single device update."""
+    hass = MagicMock()
+    hass.data = {}
+    hub_storage["simple_device_creator.entry-1"] = {
+        "devices": [
+            {"id": "dev-1", CONF_ENTITY_IDS: ["sensor.one", "sensor.two"]},
+            {"id": "dev-2", CONF_ENTITY_IDS: ["sensor.three"]},
+        ]
+    }
+    hub_store = await async_get_hub_store(hass, _build_entry())
+    first_record, second_record = hub_store.devices
+    listener = MagicMock()
+    hub_store.async_add_listener(listener)
+
+    def _unlink(entity_id):
+        def _mutation(device):
+            linked_entity_ids = device[CONF_ENTITY_IDS]
+            if entity_id not in linked_entity_ids:
+                return device
+            return DeviceRecord.from_dict(
+                {
+                    **device,
+                    CONF_ENTITY_IDS: [linked_id for linked_id in linked_entity_ids if linked_id != entity_id],
+                }
+            )
+
+        return _mutation
+
+    for entity_id in ("sensor.one", "sensor.two", "sensor.missing"):
+        hub_store.write_buffer.async_add("dev-1", _unlink(entity_id))
+    hub_store.write_buffer.async_add("dev-removed", _unlink("sensor.three"))
+
+    assert hub_store.write_buffer.pending == 4
+    listener.assert_not_called()
+
+    hub_store.write_buffer.async_flush()
+    hub_store.write_buffer.async_flush()
+
+    listener.assert_called_once_with()
+    assert hub_storage["simple_device_creator.entry-1"]["devices"][0][CONF_ENTITY_IDS] == []
+    assert hub_store.write_buffer.pending == 0
+    assert hub_store.write_buffer.flushes == 1
+    assert hub_store.write_buffer.dropped == 2
+    assert first_record[CONF_ENTITY_IDS] == ("sensor.one", "sensor.two")
+    assert hub_store.devices[1] is second_record
+    assert hub_store.device("dev-2") is second_record
+    assert hub_store.device("dev-removed") is None
+
+
+def test_replace_devices_updates_indexes_of_the_changed_devices_only():
+    """Test replacing single devices keeps the indexes and reports the changed IDs."""
+    hub_store = HubStore(MagicMock(), "simple_device_creator.entry-1")
+    hub_store.devices = [
+        {"id": "dev-1", CONF_NAME: "Plug"},
+        {"id": "dev-2", CONF_NAME: "Lamp"},
+        {"id": "dev-3", CONF_NAME: "Fan"},
+    ]
+    first_record, second_record, third_record = hub_store.devices
+    name_index = hub_store.name_index
+    positions = hub_store.device_positions
+    hub_store.device_options()
+    cached_options = hub_store._options
+    listener = MagicMock()
+    hub_store.async_add_listener(listener)
+
+    hub_store.async_replace_devices([dataclasses.replace(first_record, model="P2")])
+
+    assert hub_store.changed_ids == {"dev-1"}
+    assert hub_store.device("dev-1")[CONF_MODEL] == "P2"
+    assert hub_store.devices[1] is second_record
+    hub_store.device_options()
+    assert hub_store._options is cached_options
+
+    renamed_record = dataclasses.replace(third_record, name="Ceiling Fan")
+    hub_store.async_replace_devices(
+        [renamed_record, second_record, DeviceRecord.from_dict({"id": "dev-9", CONF_NAME: "Gone"})]
+    )
+    hub_store.async_replace_devices([renamed_record])
+
+    assert listener.call_count == 2
+    assert hub_store.changed_ids == {"dev-3"}
+    assert hub_store.name_index is name_index
+    assert hub_store.device_positions is positions
+    assert name_index == {"plug": "dev-1", "lamp": "dev-2", "ceiling fan": "dev-3"}
+    assert [option["label"] for option in hub_store.device_options()[0]] == ["Ceiling Fan", "Lamp", "Plug"]
+
+    hub_store.async_set_devices(hub_store.devices)
+
+    assert hub_store.changed_ids is None
+
+
+def test_replace_device_shares_unchanged_records():
+    """Test replacing a device allocates one new record and keeps the others."""
+    first_record = {"id": "dev-1", CONF_NAME: "Plug"}
+    second_record = {"id": "dev-2", CONF_NAME: "Lamp"}
+    devices = [first_record, second_record]
+
+    updated_record = replace_device(devices, "dev-1", {CONF_NAME: "Socket"})
+    assert replace_device(devices, "dev-2", {CONF_NAME: "Lamp"}) is None
+    assert replace_device(devices, "dev-3", {CONF_NAME: "Fan"}) is None
+
+    assert devices == [{"id": "dev-1", CONF_NAME: "Socket"}, second_record]
+    assert devices[0] is updated_record
+    assert devices[1] is second_record
+    assert first_record[CONF_NAME] == "Plug"
+
+
+def test_device_record_reads_like_the_stored_dictionary():
+    """Test records expose only the set fields, intern metadata and round-trip to storage."""
+    stored_device = {
+        "id": "dev-1",
+        CONF_NAME: "Plug",
+        CONF_MANUFACTURER: "".join(["Ac", "me"]),
+        CONF_ENTITY_IDS: ["switch.plug"],
+        "unknown": "dropped",
+    }
+
+    record = DeviceRecord.from_dict(stored_device)
+    other_record = DeviceRecord.from_dict({"id": "dev-2", CONF_MANUFACTURER: "".join(["Acm", "e"])})
+
+    assert record[CONF_NAME] == "Plug"
+    assert record.get(CONF_MODEL, "") == ""
+    assert CONF_MODEL not in record
+    assert record[CONF_ENTITY_IDS] == ("switch.plug",)
+    assert record[CONF_MANUFACTURER] is other_record[CONF_MANUFACTURER]
+    assert record == {"id": "dev-1", CONF_NAME: "Plug", CONF_MANUFACTURER: "Acme", CONF_ENTITY_IDS: ("switch.plug",)}
+    assert record.as_dict() == {"id": "dev-1", CONF_NAME: "Plug", CONF_MANUFACTURER: "Acme", CONF_ENTITY_IDS: ["switch.plug"]}
+    assert not hasattr(record, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        record.name = "Socket"
+
+
+def test_device_record_fast_paths_match_the_mapping_protocol():
+    """Test the direct field lookups agree with the generic mapping behaviour."""
+    record = DeviceRecord.from_dict(
+        {"id": "dev-1", CONF_NAME: "Plug", CONF_ENTITY_IDS: [], "external_key": "plug-1"}
+    )
+
+    assert record.get("as_dict") is None
+    assert "as_dict" not in record
+    assert record.get(CONF_ENTITY_IDS) == ()
+    assert record.as_dict() == {**dict(record), CONF_ENTITY_IDS: []}
+    assert list(record.as_dict()) == list(record)
+    assert record == DeviceRecord.from_dict(record)
+    assert record != DeviceRecord.from_dict({**record, CONF_NAME: "Socket"})
+    assert record != ["dev-1"]
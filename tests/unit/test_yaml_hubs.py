@@ -0,0 +1,109 @@
+"""Test the hubs declared in YAML."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import voluptuous as vol
+
+from custom_components.simple_device_creator import CONFIG_SCHEMA
+from custom_components.simple_device_creator.const import (
+    CONF_ENTRY_TITLE,
+    CONF_NAME,
+    CONF_YAML_KEY,
+    DOMAIN,
+)
+from custom_components.simple_device_creator.services import FORMAT_YAML, IMPORT_MODE_SYNC
+from custom_components.simple_device_creator.yaml_hubs import async_apply_yaml_hubs
+
+
+def _entry(entry_id, title, data, unique_id=None):
+    """Return a mock config entry."""
+    entry = MagicMock()
+    entry.entry_id = entry_id
+    entry.title = title
+    entry.data = data
+    entry.unique_id = unique_id
+    return entry
+
+
+def test_config_schema_validates_hubs():
+    """Test the YAML schema fills defaults and rejects hubs with the same name."""
+    config = CONFIG_SCHEMA({DOMAIN: {"hubs": [{CONF_NAME: "Kitchen"}]}, "other": {}})
+
+    assert config[DOMAIN]["hubs"] == [{CONF_NAME: "Kitchen", "devices": []}]
+    with pytest.raises(vol.Invalid):
+        CONFIG_SCHEMA({DOMAIN: {"hubs": [{CONF_NAME: "Kitchen"}, {CONF_NAME: " kitchen "}]}})
+
+
+@pytest.mark.asyncio
+async def test_apply_yaml_hubs_syncs_creates_and_releases_hubs():
+    """Test existing YAML hubs are synced, new ones created and removed ones unmarked."""
+    kitchen = _entry("entry-kitchen", "Kitchen", {CONF_YAML_KEY: "kitchen"})
+    garage = _entry("entry-garage", "Garage", {CONF_YAML_KEY: "garage", "other": 1})
+    manual = _entry("entry-manual", "Manual", {})
+    attic = _entry("entry-attic", "Attic", {CONF_YAML_KEY: "attic"})
+    hass = MagicMock()
+    hass.config_entries.async_entries.return_value = [kitchen, garage, manual]
+    hass.config_entries.flow.async_init = AsyncMock(return_value={"type": "create_entry", "result": attic})
+    created_tasks = []
+    hass.async_create_task.side_effect = created_tasks.append
+    kitchen_devices = [{CONF_NAME: "Plug"}]
+    attic_devices = [{CONF_NAME: "Lamp"}]
+    yaml_config = {
+        "hubs": [
+            {CONF_NAME: "KITCHEN", "devices": kitchen_devices},
+            {CONF_NAME: "Attic", "devices": attic_devices},
+        ]
+    }
+
+    with patch(
+        "custom_components.simple_device_creator.yaml_hubs.async_import_devices",
+        AsyncMock(return_value={"errors": []}),
+    ) as mock_import:
+        await async_apply_yaml_hubs(hass, yaml_config)
+        for task in created_tasks:
+            await task
+
+    assert mock_import.await_args_list[0].args == (
+        hass, kitchen, kitchen_devices, FORMAT_YAML, False, IMPORT_MODE_SYNC
+    )
+    assert mock_import.await_args_list[1].args == (
+        hass, attic, attic_devices, FORMAT_YAML, False, IMPORT_MODE_SYNC
+    )
+    hass.config_entries.flow.async_init.assert_awaited_once_with(
+        DOMAIN,
+        context={"source": "import"},
+        data={CONF_YAML_KEY: "attic", CONF_ENTRY_TITLE: "Attic"},
+    )
+    update_calls = hass.config_entries.async_update_entry.call_args_list
+    assert update_calls[0].args == (kitchen,)
+    assert update_calls[0].kwargs == {"title": "KITCHEN"}
+    assert update_calls[1].args == (garage,)
+    assert update_calls[1].kwargs == {"data": {"other": 1}}
+    assert len(update_calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_apply_yaml_hubs_adopts_released_hubs_declared_again():
+    """Test a hub handed over to the UI is marked and synced again when it is re-declared."""
+    kitchen = _entry("entry-kitchen", "Kitchen", {"other": 1}, unique_id="yaml_kitchen")
+    manual = _entry("entry-manual", "Manual", {}, unique_id="manual")
+    hass = MagicMock()
+    hass.config_entries.async_entries.return_value = [kitchen, manual]
+    kitchen_devices = [{CONF_NAME: "Plug", "manufacturer": "B"}]
+
+    with patch(
+        "custom_components.simple_device_creator.yaml_hubs.async_import_devices",
+        AsyncMock(return_value={"errors": []}),
+    ) as mock_import:
+        await async_apply_yaml_hubs(
+            hass, {"hubs": [{CONF_NAME: "Kitchen", "devices": kitchen_devices}]}
+        )
+
+    hass.config_entries.async_update_entry.assert_called_once_with(
+        kitchen, data={"other": 1, CONF_YAML_KEY: "kitchen"}
+    )
+    mock_import.assert_awaited_once_with(
+        hass, kitchen, kitchen_devices, FORMAT_YAML, False, IMPORT_MODE_SYNC
+    )
+    hass.config_entries.flow.async_init.assert_not_called()